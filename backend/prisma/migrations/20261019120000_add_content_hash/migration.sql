@@ -0,0 +1,3 @@
+-- AlterTable
+-- IF NOT EXISTS: bancos onde o dje_scraper.py já criou a coluna em tempo de execução
+ALTER TABLE "publicacoes" ADD COLUMN IF NOT EXISTS "content_hash" VARCHAR(64);
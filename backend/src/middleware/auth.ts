@@ -1,5 +1,6 @@
 import { Request, Response, NextFunction } from 'express';
 import jwt from 'jsonwebtoken';
+import { timingSafeEqual } from 'crypto';
 import { ApiResponse } from '../types';
 
 // Extender o Request interface para adicionar userId
@@ -38,4 +39,27 @@ export const auth = (
   }
 };
 
-export const authMiddleware = auth;
\ No newline at end of file
+export const authMiddleware = auth;
+
+// Chamadas do scraper para a API: X-Service-Token igual a SCRAPER_SERVICE_TOKEN
+const tokenServicoValido = (recebido?: string): boolean => {
+  const esperado = process.env.SCRAPER_SERVICE_TOKEN;
+  if (!esperado || !recebido) {
+    return false;
+  }
+  const a = Buffer.from(recebido);
+  const b = Buffer.from(esperado);
+  return a.length === b.length && timingSafeEqual(a, b);
+};
+
+export const authOuServico = (
+  req: Request,
+  res: Response<ApiResponse<null>>,
+  next: NextFunction
+): void => {
+  if (tokenServicoValido(req.header('X-Service-Token'))) {
+    next();
+    return;
+  }
+  auth(req, res, next);
+};
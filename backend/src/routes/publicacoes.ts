@@ -1,8 +1,9 @@
 import { Router, Request, Response } from 'express';
 import { z } from 'zod';
 import { PrismaClient } from '@prisma/client';
-import { auth } from '../middleware/auth';
+import { auth, authOuServico } from '../middleware/auth';
 import { spawn } from 'child_process';
+import { randomUUID } from 'crypto';
 import path from 'path';
 
 const router = Router();
@@ -47,6 +48,12 @@ let buscaAutomaticaStatus = {
   erro: null
 };
 
+// Cancela a requisição em andamento da busca automática quando ela é parada
+let buscaAutomaticaAbort: AbortController | null = null;
+
+// job_id do /run-since-march em andamento no scraper, para que parar cancele só ele
+let buscaAutomaticaJobId: string | null = null;
+
 /**
  * @swagger
  * /api/publicacoes:
@@ -393,6 +400,289 @@ router.post('/', async (req: Request, res: Response): Promise<void> => {
   }
 });
 
+/**
+ * @swagger
+ * /api/publicacoes/reextracao:
+ *   put:
+ *     tags:
+ *       - Publicações
+ *     summary: Atualizar campos extraídos de uma publicação existente
+ *     description: Usado pelo reextrair.py do scraper para aplicar extratores corrigidos a publicações já cadastradas. O status e as datas de controle não são alterados. Aceita JWT ou o cabeçalho X-Service-Token (SCRAPER_SERVICE_TOKEN).
+ *     security:
+ *       - bearerAuth: []
+ *     requestBody:
+ *       required: true
+ *       content:
+ *         application/json:
+ *           schema:
+ *             type: object
+ *             required:
+ *               - numeroProcesso
+ *               - dataDisponibilizacao
+ *               - autores
+ *               - conteudo
+ *     responses:
+ *       200:
+ *         description: Publicação atualizada
+ *       400:
+ *         description: Dados inválidos
+ *       401:
+ *         description: Token de acesso ou de serviço ausente ou inválido
+ *       404:
+ *         description: Nenhuma publicação com este número de processo
+ */
+router.put('/reextracao', authOuServico, async (req: Request, res: Response): Promise<void> => {
+  try {
+    const validatedData = createPublicacaoSchema.parse(req.body);
+
+    const { count } = await prisma.publicacao.updateMany({
+      where: {
+        numeroProcesso: validatedData.numeroProcesso
+      },
+      data: {
+        autores: validatedData.autores,
+        conteudo: validatedData.conteudo,
+        advogados: validatedData.advogados || "",
+        valorPrincipalBruto: validatedData.valorPrincipalBruto,
+        valorPrincipalLiquido: validatedData.valorPrincipalLiquido,
+        valorJurosMoratorios: validatedData.valorJurosMoratorios,
+        honorariosAdvocaticios: validatedData.honorariosAdvocaticios,
+        termosEncontrados: validatedData.termosEncontrados
+      }
+    });
+
+    if (count === 0) {
+      res.status(404).json({
+        success: false,
+        error: 'Publicação não encontrada'
+      });
+      return;
+    }
+
+    res.json({
+      success: true,
+      data: { numeroProcesso: validatedData.numeroProcesso, atualizadas: count }
+    });
+
+  } catch (error) {
+    if (error instanceof z.ZodError) {
+      res.status(400).json({
+        success: false,
+        error: error.errors[0]?.message || 'Dados inválidos'
+      });
+      return;
+    }
+
+    console.error('Erro ao atualizar publicação reextraída:', error);
+    res.status(500).json({
+      success: false,
+      error: 'Erro interno do servidor'
+    });
+  }
+});
+
+/**
+ * @swagger
+ * /api/publicacoes/lote:
+ *   post:
+ *     tags:
+ *       - Publicações
+ *     summary: Criar publicações em lote
+ *     description: Usado pela caixa de saída do scraper. Idempotente por número de processo; publicações já cadastradas são ignoradas e as inválidas voltam em rejeitadas, sem impedir as demais.
+ *     requestBody:
+ *       required: true
+ *       content:
+ *         application/json:
+ *           schema:
+ *             type: object
+ *             required:
+ *               - publicacoes
+ *             properties:
+ *               publicacoes:
+ *                 type: array
+ *                 maxItems: 500
+ *                 items:
+ *                   type: object
+ *     responses:
+ *       200:
+ *         description: Lote processado
+ *         content:
+ *           application/json:
+ *             schema:
+ *               type: object
+ *               properties:
+ *                 success:
+ *                   type: boolean
+ *                 data:
+ *                   type: object
+ *                   properties:
+ *                     recebidas:
+ *                       type: integer
+ *                     criadas:
+ *                       type: integer
+ *                     rejeitadas:
+ *                       type: array
+ *                       items:
+ *                         type: object
+ *                         properties:
+ *                           numeroProcesso:
+ *                             type: string
+ *                           erro:
+ *                             type: string
+ *       400:
+ *         description: Corpo sem a lista de publicações ou com mais de 500 itens
+ */
+router.post('/lote', async (req: Request, res: Response): Promise<void> => {
+  try {
+    const publicacoes = req.body?.publicacoes;
+    if (!Array.isArray(publicacoes) || publicacoes.length > 500) {
+      res.status(400).json({
+        success: false,
+        error: 'Envie de 0 a 500 publicações em "publicacoes"'
+      });
+      return;
+    }
+
+    const validas: z.infer<typeof createPublicacaoSchema>[] = [];
+    const rejeitadas: { numeroProcesso: string | null; erro: string }[] = [];
+    for (const item of publicacoes) {
+      const resultado = createPublicacaoSchema.safeParse(item);
+      if (resultado.success) {
+        validas.push(resultado.data);
+      } else {
+        rejeitadas.push({
+          numeroProcesso: typeof item?.numeroProcesso === 'string' ? item.numeroProcesso : null,
+          erro: resultado.error.errors[0]?.message || 'Dados inválidos'
+        });
+      }
+    }
+
+    const { count } = await prisma.publicacao.createMany({
+      data: validas.map((validatedData) => ({
+        numeroProcesso: validatedData.numeroProcesso,
+        dataDisponibilizacao: validatedData.dataDisponibilizacao,
+        autores: validatedData.autores,
+        conteudo: validatedData.conteudo,
+        advogados: validatedData.advogados || "",
+        valorPrincipalBruto: validatedData.valorPrincipalBruto,
+        valorPrincipalLiquido: validatedData.valorPrincipalLiquido,
+        valorJurosMoratorios: validatedData.valorJurosMoratorios,
+        honorariosAdvocaticios: validatedData.honorariosAdvocaticios,
+        reu: validatedData.reu || "Instituto Nacional do Seguro Social - INSS",
+        fonte: validatedData.fonte || "DJE - Caderno 3 - Judicial - 1ª Instância - Capital Parte 1",
+        termosEncontrados: validatedData.termosEncontrados
+      })),
+      skipDuplicates: true
+    });
+
+    res.json({
+      success: true,
+      data: { recebidas: publicacoes.length, criadas: count, rejeitadas }
+    });
+
+  } catch (error) {
+    console.error('Erro ao criar lote de publicações:', error);
+    res.status(500).json({
+      success: false,
+      error: 'Erro interno do servidor'
+    });
+  }
+});
+
+/**
+ * @swagger
+ * /api/publicacoes/numeros-processo:
+ *   get:
+ *     tags:
+ *       - Publicações
+ *     summary: Listar números de processo já cadastrados
+ *     description: Usado pelo scraper para semear o índice local de deduplicação antes de enviar publicações. Paginado por cursor; aceita JWT ou o cabeçalho X-Service-Token (SCRAPER_SERVICE_TOKEN).
+ *     security:
+ *       - bearerAuth: []
+ *     parameters:
+ *       - name: cursor
+ *         in: query
+ *         required: false
+ *         description: Valor de proximoCursor da página anterior
+ *         schema:
+ *           type: string
+ *       - name: limite
+ *         in: query
+ *         required: false
+ *         description: Números por página (padrão 5000, máximo 10000)
+ *         schema:
+ *           type: integer
+ *       - name: desde
+ *         in: query
+ *         required: false
+ *         description: Retorna apenas publicações criadas a partir desta data (ISO 8601)
+ *         schema:
+ *           type: string
+ *           format: date-time
+ *     responses:
+ *       200:
+ *         description: Lista de números de processo
+ *         content:
+ *           application/json:
+ *             schema:
+ *               type: object
+ *               properties:
+ *                 success:
+ *                   type: boolean
+ *                 data:
+ *                   type: array
+ *                   items:
+ *                     type: string
+ *                 total:
+ *                   type: integer
+ *                 proximoCursor:
+ *                   type: string
+ *                   nullable: true
+ *       401:
+ *         description: Token de acesso ou de serviço ausente ou inválido
+ */
+router.get('/numeros-processo', authOuServico, async (req: Request, res: Response): Promise<void> => {
+  try {
+    const { desde, cursor } = req.query;
+    const limite = Math.min(Math.max(parseInt(req.query.limite as string) || 5000, 1), 10000);
+    const where: any = {};
+
+    if (desde) {
+      const desdeDate = new Date(desde as string);
+      if (isNaN(desdeDate.getTime())) {
+        res.status(400).json({
+          success: false,
+          error: 'Parâmetro desde inválido'
+        });
+        return;
+      }
+      where.createdAt = { gte: desdeDate };
+    }
+
+    const publicacoes = await prisma.publicacao.findMany({
+      where,
+      select: { id: true, numeroProcesso: true },
+      orderBy: { id: 'asc' },
+      take: limite,
+      ...(cursor ? { cursor: { id: cursor as string }, skip: 1 } : {})
+    });
+
+    res.json({
+      success: true,
+      data: publicacoes.map(p => p.numeroProcesso),
+      total: publicacoes.length,
+      proximoCursor: publicacoes.length === limite ? publicacoes[publicacoes.length - 1].id : null
+    });
+
+  } catch (error) {
+    console.error('Erro ao listar números de processo:', error);
+    res.status(500).json({
+      success: false,
+      error: 'Erro interno do servidor'
+    });
+  }
+});
+
 /**
  * @swagger
  * /api/publicacoes/{id}/status:
@@ -841,6 +1131,9 @@ router.get('/scraper/status', auth, async (req: Request, res: Response): Promise
  *         description: Erro interno do servidor
  */
 router.post('/scraper/run-since-march', auth, async (req: Request, res: Response): Promise<void> => {
+  const jobId = `busca-automatica-${randomUUID()}`;
+  buscaAutomaticaJobId = jobId;
+
   try {
     console.log('🚀 Iniciando busca automática desde 17/03/2025');
 
@@ -862,7 +1155,7 @@ router.post('/scraper/run-since-march', auth, async (req: Request, res: Response
           headers: {
             'Content-Type': 'application/json'
           },
-          body: JSON.stringify({})
+          body: JSON.stringify({ job_id: jobId })
         });
         
         if (response.ok) {
@@ -903,6 +1196,10 @@ router.post('/scraper/run-since-march', auth, async (req: Request, res: Response
       success: false,
       error: 'Erro interno do servidor'
     });
+  } finally {
+    if (buscaAutomaticaJobId === jobId) {
+      buscaAutomaticaJobId = null;
+    }
   }
 });
 
@@ -1003,11 +1300,45 @@ router.post('/busca-automatica/parar', auth, async (req, res) => {
   try {
     buscaAutomaticaStatus.ativa = false;
     buscaAutomaticaStatus.ultimaAtualizacao = new Date().toISOString();
+    buscaAutomaticaAbort?.abort();
+
+    // Interrompe também a busca desde março em andamento no scraper (só o job dela):
+    // para no próximo ponto seguro, libera o navegador e responde com o resultado parcial
+    const jobId = buscaAutomaticaJobId;
+    const scraperUrls = jobId ? [
+      'http://juscash-scraper:5002/jobs/cancelar',  // Container scraper real
+      'http://localhost:5002/jobs/cancelar',        // Local scraper real
+      'http://127.0.0.1:5002/jobs/cancelar'
+    ] : [];
+
+    let jobsCancelados: any[] = [];
+    for (const url of scraperUrls) {
+      try {
+        const response = await fetch(url, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({ job_id: jobId, motivo: 'busca parada pelo usuário' }),
+          signal: AbortSignal.timeout(5000)
+        });
+
+        if (response.ok) {
+          const resultado = await response.json() as any;
+          jobsCancelados = resultado.cancelados || [];
+          break;
+        }
+      } catch (error) {
+        console.warn(`⚠️ Scraper ${url} não disponível para cancelamento: ${error}`);
+        continue;
+      }
+    }
 
     return res.json({
       success: true,
       message: 'Busca automática interrompida',
-      status: buscaAutomaticaStatus
+      status: buscaAutomaticaStatus,
+      jobsCancelados
     });
   } catch (error) {
     console.error('Erro ao parar busca:', error);
@@ -1024,6 +1355,8 @@ async function iniciarBuscaBackground() {
     const dataInicio = new Date('2025-03-17');
     const dataFim = new Date();
     const dataAtual = new Date(dataInicio);
+    const abort = new AbortController();
+    buscaAutomaticaAbort = abort;
 
     console.log(`🚀 Iniciando busca automática otimizada de ${dataInicio.toLocaleDateString('pt-BR')} até ${dataFim.toLocaleDateString('pt-BR')}`);
 
@@ -1052,7 +1385,8 @@ async function iniciarBuscaBackground() {
           },
           body: JSON.stringify({
             data: dataAtual.toLocaleDateString('pt-BR')
-          })
+          }),
+          signal: abort.signal
         });
 
         if (response.ok) {
@@ -1092,6 +1426,10 @@ async function iniciarBuscaBackground() {
         await new Promise(resolve => setTimeout(resolve, 1000));
 
       } catch (error: any) {
+        // Requisição abortada por /busca-automatica/parar
+        if (!buscaAutomaticaStatus.ativa) {
+          break;
+        }
         console.error(`❌ Erro ao processar data ${buscaAutomaticaStatus.dataAtual}:`, error);
         buscaAutomaticaStatus.erro = error.message;
         
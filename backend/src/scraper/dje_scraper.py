@@ -13,9 +13,19 @@ Desenvolvido com padrões de nível Vale do Silício:
 """
 
 import asyncio
+import functools
+import hashlib
 import logging
+import multiprocessing
+import os
 import re
+import signal
+import sys
 import time
+import zlib
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Tuple
@@ -24,8 +34,13 @@ from urllib.parse import urljoin, urlparse
 import aiohttp
 import psycopg2
 from bs4 import BeautifulSoup
-from dataclasses import dataclass
-from tenacity import retry, stop_after_attempt, wait_exponential
+from dataclasses import dataclass, fields
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+try:
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+except ImportError:  # Métricas são opcionais na execução via CLI
+    CollectorRegistry = None
 
 # Configuração de logging profissional
 logging.basicConfig(
@@ -38,9 +53,207 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
-class PublicacaoData:
-    """Estrutura de dados para uma publicação do DJE"""
+# Métricas Prometheus (mesmos nomes do serviço Flask, engine="aiohttp")
+# Registro próprio: o CLI expõe as métricas com --metrics-port
+METRICS_ENGINE = 'aiohttp'
+METRICS_ENDPOINT = 'cli'
+if CollectorRegistry is not None:
+    METRICS_REGISTRY = CollectorRegistry()
+    STAGE_DURATION = Histogram(
+        'dje_stage_duration_seconds', 'Duração de cada etapa do scraping',
+        ['stage', 'engine', 'endpoint'],
+        buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+        registry=METRICS_REGISTRY
+    )
+    STAGE_ERRORS = Counter(
+        'dje_stage_errors_total', 'Exceções lançadas por etapa do scraping',
+        ['stage', 'engine', 'endpoint'], registry=METRICS_REGISTRY
+    )
+    FIELD_DURATION = Histogram(
+        'dje_field_extraction_seconds', 'Duração da extração de cada campo da publicação',
+        ['field', 'engine', 'endpoint'],
+        buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1),
+        registry=METRICS_REGISTRY
+    )
+    RATE_LIMIT_DELAY = Gauge(
+        'dje_rate_limiter_delay_seconds', 'Intervalo configurado do rate limiting em cada ponto',
+        ['point', 'engine'], registry=METRICS_REGISTRY
+    )
+    RATE_LIMIT_WAITING = Gauge(
+        'dje_rate_limiter_waiting', 'Tarefas aguardando no rate limiting neste momento',
+        ['point', 'engine'], registry=METRICS_REGISTRY
+    )
+    RATE_LIMIT_WAIT_TOTAL = Counter(
+        'dje_rate_limiter_wait_seconds_total', 'Tempo total gasto aguardando o rate limiting',
+        ['point', 'engine', 'endpoint'], registry=METRICS_REGISTRY
+    )
+    OPERATION_LATENCY = Gauge(
+        'dje_operation_latency_seconds', 'Percentis da latência recente de cada operação junto ao DJE (janela deslizante)',
+        ['operation', 'quantile', 'engine'], registry=METRICS_REGISTRY
+    )
+    ADAPTIVE_TIMEOUT = Gauge(
+        'dje_adaptive_timeout_seconds', 'Timeout em vigor para cada operação, derivado dos percentis de latência',
+        ['operation', 'engine'], registry=METRICS_REGISTRY
+    )
+    OPERATION_TIMEOUTS = Counter(
+        'dje_operation_timeouts_total', 'Operações que gastaram o timeout inteiro sem concluir',
+        ['operation', 'engine'], registry=METRICS_REGISTRY
+    )
+    HEDGED_REQUESTS = Counter(
+        'dje_hedged_requests_total', 'Requisições de fetch_page que passaram do p95: quem venceu ou se faltou orçamento',
+        ['result', 'engine'], registry=METRICS_REGISTRY
+    )
+    JOBS_CANCELLED = Counter(
+        'dje_jobs_cancelled_total', 'Jobs interrompidos antes do fim, por cancelamento ou prazo esgotado',
+        ['endpoint', 'reason'], registry=METRICS_REGISTRY
+    )
+
+def timed_stage(stage: str):
+    """Observa a duração do método (sync ou async) no histograma de etapas"""
+    def decorator(func):
+        if CollectorRegistry is None:
+            return func
+
+        def observe(start: float, failed: bool):
+            STAGE_DURATION.labels(stage, METRICS_ENGINE, METRICS_ENDPOINT).observe(time.perf_counter() - start)
+            if failed:
+                STAGE_ERRORS.labels(stage, METRICS_ENGINE, METRICS_ENDPOINT).inc()
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                failed = True
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    observe(start, failed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                observe(start, failed)
+        return wrapper
+    return decorator
+
+def timed_field(field: str):
+    """Observa a duração de uma função extract_* no histograma de campos"""
+    def decorator(func):
+        if CollectorRegistry is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                FIELD_DURATION.labels(field, METRICS_ENGINE, METRICS_ENDPOINT).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+async def rate_limit_sleep(seconds: float, point: str):
+    """asyncio.sleep do rate limiting, exposto nas métricas quando disponíveis"""
+    if CollectorRegistry is None:
+        await asyncio.sleep(seconds)
+        return
+    RATE_LIMIT_DELAY.labels(point, METRICS_ENGINE).set(seconds)
+    RATE_LIMIT_WAITING.labels(point, METRICS_ENGINE).inc()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        RATE_LIMIT_WAITING.labels(point, METRICS_ENGINE).dec()
+        RATE_LIMIT_WAIT_TOTAL.labels(point, METRICS_ENGINE, METRICS_ENDPOINT).inc(seconds)
+
+DEADLINE_EXPIRED = "prazo esgotado"
+
+class JobCancelled(Exception):
+    """Scrape interrompido por sinal (SIGINT/SIGTERM) ou pelo prazo (--prazo)"""
+
+class LatencyTracker:
+    """
+    Timeouts adaptativos: TIMEOUT_FATOR x p99 das últimas LATENCIA_JANELA latências
+    da operação, dentro dos limites dela (mesma regra e métricas de scraper/latencias.py)
+    Até TIMEOUT_MIN_AMOSTRAS amostras vale o padrão; estouros entram com a própria duração
+    """
+    QUANTILES = (0.5, 0.95, 0.99)
+    # operação: (padrão, mínimo, máximo)
+    BOUNDS = {'page_fetch': (30, 5, 90)}
+
+    def __init__(self):
+        self.window = int(os.getenv("LATENCIA_JANELA", "200"))
+        self.min_samples = int(os.getenv("TIMEOUT_MIN_AMOSTRAS", "20"))
+        self.factor = float(os.getenv("TIMEOUT_FATOR", "2"))
+        self.adaptive = os.getenv("TIMEOUT_ADAPTATIVO", "true").lower() in ("1", "true", "yes")
+        self.samples: Dict[str, deque] = {}
+
+    @staticmethod
+    def _quantile(ordered: List[float], q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def record(self, operation: str, seconds: float, timed_out: bool = False):
+        samples = self.samples.setdefault(operation, deque(maxlen=self.window))
+        samples.append(seconds)
+        if CollectorRegistry is None:
+            return
+        ordered = sorted(samples)
+        for q in self.QUANTILES:
+            OPERATION_LATENCY.labels(operation, str(q), METRICS_ENGINE).set(self._quantile(ordered, q))
+        if timed_out:
+            OPERATION_TIMEOUTS.labels(operation, METRICS_ENGINE).inc()
+
+    def percentile(self, operation: str, q: float) -> Optional[float]:
+        """Quantil das amostras da operação; None enquanto houver menos de min_samples"""
+        samples = self.samples.get(operation)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        return self._quantile(sorted(samples), q)
+
+    def timeout(self, operation: str) -> float:
+        default, minimum, maximum = self.BOUNDS[operation]
+        value = default
+        samples = self.samples.get(operation)
+        if self.adaptive and samples and len(samples) >= self.min_samples:
+            value = min(maximum, max(minimum, self.factor * self._quantile(sorted(samples), 0.99)))
+        if CollectorRegistry is not None:
+            ADAPTIVE_TIMEOUT.labels(operation, METRICS_ENGINE).set(value)
+        return value
+
+    @contextmanager
+    def measure(self, operation: str, timeout: float):
+        """
+        Registra a duração; falhas de rede só contam se gastaram o timeout inteiro
+        Cancelamento (hedge perdedor, JobCancelled) não é estouro e não entra
+        """
+        start = time.monotonic()
+        try:
+            yield
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            elapsed = time.monotonic() - start
+            if elapsed >= timeout * 0.95:
+                self.record(operation, elapsed, timed_out=True)
+            raise
+        self.record(operation, time.monotonic() - start)
+
+DEFAULT_FONTE = "DJE - Caderno 3 - Judicial - 1ª Instância - Capital Parte 1"
+
+# conteudo a partir deste número de caracteres fica comprimido em memória; 0 desativa
+CONTENT_COMPRESS_MIN_CHARS = int(os.getenv("CONTEUDO_COMPACTAR_A_PARTIR", "1024"))
+
+# Campos com poucos valores distintos: uma única cópia de cada string por processo
+INTERNED_FIELDS = ("termos_encontrados", "fonte")
+
+@dataclass(slots=True)
+class _PublicacaoFields:
     numero_processo: str
     data_disponibilizacao: datetime
     autores: str
@@ -51,7 +264,104 @@ class PublicacaoData:
     valor_juros_moratorios: Optional[Decimal]
     honorarios_advocaticios: Optional[Decimal]
     termos_encontrados: str
-    fonte: str = "DJE - Caderno 3 - Judicial - 1ª Instância - Capital Parte 1"
+    fonte: str = DEFAULT_FONTE
+
+    def __post_init__(self):
+        for name in INTERNED_FIELDS:
+            value = getattr(self, name)
+            if type(value) is str:
+                setattr(self, name, sys.intern(value))
+
+class PublicacaoData(_PublicacaoFields):
+    """
+    Estrutura de dados para uma publicação do DJE
+    Com slots, campos repetidos internados e conteudo longo comprimido (zlib);
+    o acesso a conteudo devolve sempre o texto original
+    """
+    __slots__ = ("_conteudo",)
+
+    @property
+    def conteudo(self) -> str:
+        if type(self._conteudo) is bytes:
+            return zlib.decompress(self._conteudo).decode('utf-8')
+        return self._conteudo
+
+    @conteudo.setter
+    def conteudo(self, value: str):
+        if CONTENT_COMPRESS_MIN_CHARS > 0 and type(value) is str and len(value) >= CONTENT_COMPRESS_MIN_CHARS:
+            compressed = zlib.compress(value.encode('utf-8'))
+            if len(compressed) < len(value):
+                value = compressed
+        self._conteudo = value
+
+    @property
+    def content_hash(self) -> str:
+        """
+        Fingerprint estável do conteúdo (SHA-256)
+        Valores monetários são normalizados para 2 casas para que 1500 e 1500.00 gerem o mesmo hash
+        """
+        def fmt_decimal(value: Optional[Decimal]) -> str:
+            return f"{value:.2f}" if value is not None else ''
+
+        data = self.data_disponibilizacao
+        campos = [
+            self.numero_processo,
+            data.date().isoformat() if isinstance(data, datetime) else str(data),
+            self.autores,
+            self.advogados or '',
+            self.conteudo,
+            fmt_decimal(self.valor_principal_bruto),
+            fmt_decimal(self.valor_principal_liquido),
+            fmt_decimal(self.valor_juros_moratorios),
+            fmt_decimal(self.honorarios_advocaticios),
+            self.termos_encontrados,
+            self.fonte,
+        ]
+        return hashlib.sha256('\x1f'.join(campos).encode('utf-8')).hexdigest()
+
+# Ordem dos campos nas tuplas devolvidas pelo pool de parse
+PUBLICACAO_FIELDS = tuple(campo.name for campo in fields(PublicacaoData))
+
+@dataclass(frozen=True)
+class ConsultaAlvo:
+    """Combinação de caderno, comarca, instância e parte consultada no DJE"""
+    caderno: str = '3'
+    comarca: str = '106'
+    tipo_judicial: str = '1'
+    parte: str = '1'
+
+    @classmethod
+    def parse(cls, spec: str) -> 'ConsultaAlvo':
+        """Cria alvo a partir de 'caderno:comarca:instancia:parte' (campos vazios usam o padrão)"""
+        campos = [campo.strip() for campo in spec.split(':')]
+        if len(campos) > 4:
+            raise ValueError(f"Alvo inválido: {spec}")
+        defaults = cls()
+        valores = campos + [''] * (4 - len(campos))
+        return cls(
+            caderno=valores[0] or defaults.caderno,
+            comarca=valores[1] or defaults.comarca,
+            tipo_judicial=valores[2] or defaults.tipo_judicial,
+            parte=valores[3] or defaults.parte,
+        )
+
+    @property
+    def label(self) -> str:
+        return f"{self.caderno}:{self.comarca}:{self.tipo_judicial}:{self.parte}"
+
+    @property
+    def fonte(self) -> str:
+        if self == ConsultaAlvo():
+            return DEFAULT_FONTE
+        return f"DJE - Caderno {self.caderno} - Comarca {self.comarca} - Instância {self.tipo_judicial} - Parte {self.parte}"
+
+    def params(self) -> Dict[str, str]:
+        return {
+            'dadosConsulta.cdCaderno': self.caderno,
+            'dadosConsulta.cdTipoJudicial': self.tipo_judicial,
+            'dadosConsulta.cdComarca': self.comarca,
+            'dadosConsulta.parte': self.parte,
+        }
 
 class DJEScraper:
     """
@@ -65,12 +375,40 @@ class DJEScraper:
     - Cache de sessão para performance
     """
     
-    def __init__(self, db_config: Dict[str, str], search_terms: List[str]):
-        self.base_url = "https://dje.tjsp.jus.br"
+    # Limites do pool de conexões, também usados pelo agendador de consultas
+    max_connections = 10
+    max_connections_per_host = 5
+    
+    # Intervalo mínimo entre o início de duas requisições ao DJE, somando todas
+    # as consultas simultâneas da sessão (orçamento de cortesia com o site)
+    request_interval = float(os.getenv("DJE_INTERVALO_REQUISICOES_S", "0.5"))
+    
+    # Hedging (opcional): sem resposta até o p95 observado, uma cópia da requisição
+    # sai em outra conexão do pool e vence a primeira resposta. O orçamento limita
+    # os hedges a essa fração das requisições
+    hedge_enabled = os.getenv("DJE_HEDGE", "false").lower() in ("1", "true", "yes")
+    hedge_budget = float(os.getenv("DJE_HEDGE_ORCAMENTO", "0.1"))
+    
+    def __init__(self, db_config: Dict[str, str], search_terms: List[str], parse_processes: int = 0):
+        # DJE_BASE_URL permite apontar para o stand-in local (scraper/benchmarks/dje_standin.py)
+        self.base_url = os.getenv("DJE_BASE_URL", "https://dje.tjsp.jus.br").rstrip("/")
         self.search_url = f"{self.base_url}/cdje/index.do"
         self.db_config = db_config
         self.search_terms = search_terms
         self.session: Optional[aiohttp.ClientSession] = None
+        self._next_request_at = 0.0
+        self.latency = LatencyTracker()
+        self.hedge_stats = {'requests': 0, 'hedged': 0, 'hedge_won': 0, 'budget_exhausted': 0}
+        
+        # Prazo do job (time.monotonic) e cancelamento: as consultas em curso são
+        # canceladas e o scrape devolve as datas já concluídas
+        self.deadline: Optional[float] = None
+        self.cancel_reason: Optional[str] = None
+        self._cancel_event: Optional[asyncio.Event] = None
+        
+        # Parse em processos separados (0 = no próprio event loop)
+        self.parse_processes = parse_processes
+        self.parse_pool: Optional[ProcessPoolExecutor] = None
         
         # Headers para parecer um navegador real
         self.headers = {
@@ -92,21 +430,39 @@ class DJEScraper:
 
     async def __aenter__(self):
         """Context manager entry"""
-        timeout = aiohttp.ClientTimeout(total=30, connect=10)
-        connector = aiohttp.TCPConnector(limit=10, limit_per_host=5)
+        self._cancel_event = asyncio.Event()
+        if self.cancel_reason:
+            self._cancel_event.set()
+        # Teto da sessão; cada requisição usa o timeout adaptativo de fetch_page
+        timeout = aiohttp.ClientTimeout(total=LatencyTracker.BOUNDS['page_fetch'][2], connect=10)
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_connections_per_host)
         self.session = aiohttp.ClientSession(
             timeout=timeout,
             connector=connector,
             headers=self.headers
         )
+        if self.parse_processes > 0:
+            # spawn: o processo principal tem threads (executor do banco, métricas)
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_parse_worker,
+                initargs=(tuple(self.search_terms),)
+            )
+            logger.info(f"Parse em pool de {self.parse_processes} processo(s)")
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
         if self.session:
             await self.session.close()
+        if self.parse_pool:
+            self.parse_pool.shutdown(wait=True, cancel_futures=True)
+            self.parse_pool = None
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10),
+           retry=retry_if_not_exception_type(JobCancelled))
+    @timed_stage('fetch_page')
     async def fetch_page(self, url: str, params: Optional[Dict] = None) -> str:
         """
         Fetch página com retry automático e rate limiting
@@ -115,16 +471,18 @@ class DJEScraper:
             raise RuntimeError("Session not initialized. Use async context manager.")
             
         try:
-            # Rate limiting inteligente
-            await asyncio.sleep(2)  # 2 segundos entre requests
+            await self._until_cancelled(self._wait_request_slot())
             
-            async with self.session.get(url, params=params) as response:
-                response.raise_for_status()
-                content = await response.text()
-                
-                logger.info(f"Successfully fetched: {url} - Status: {response.status}")
-                return content
+            if self.hedge_enabled:
+                content = await self._until_cancelled(self._fetch_hedged(url, params))
+            else:
+                content = await self._until_cancelled(self._get(url, params))
+            
+            logger.info(f"Successfully fetched: {url}")
+            return content
                 
+        except JobCancelled:
+            raise
         except aiohttp.ClientError as e:
             logger.error(f"HTTP error fetching {url}: {e}")
             raise
@@ -132,11 +490,161 @@ class DJEScraper:
             logger.error(f"Unexpected error fetching {url}: {e}")
             raise
 
+    async def _get(self, url: str, params: Optional[Dict], record: bool = True) -> str:
+        """Uma requisição, com o timeout adaptativo e a latência registrada (exceto com record=False)"""
+        timeout = self.latency.timeout('page_fetch')
+        client_timeout = aiohttp.ClientTimeout(total=timeout, connect=min(10, timeout))
+        with self.latency.measure('page_fetch', timeout) if record else nullcontext():
+            async with self.session.get(url, params=params, timeout=client_timeout) as response:
+                response.raise_for_status()
+                return await response.text()
+
+    async def _fetch_hedged(self, url: str, params: Optional[Dict]) -> str:
+        """
+        Requisição com hedge: se a primeira não responder até o p95 de page_fetch,
+        uma cópia sai (dentro do orçamento e do intervalo de cortesia) e a primeira
+        resposta bem-sucedida vence; a outra é cancelada, liberando a conexão
+        """
+        start = time.monotonic()
+        self.hedge_stats['requests'] += 1
+        primary = asyncio.ensure_future(self._get(url, params))
+        pending = {primary}
+        hedge = None
+        try:
+            delay = self.latency.percentile('page_fetch', 0.95)
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    hedge = await self._issue_hedge(url, params, primary)
+                    if hedge:
+                        pending.add(hedge)
+            
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    elapsed = time.monotonic() - start
+                    if task is hedge:
+                        # Uma amostra por fetch: a cópia não registra a sua; a primária, cancelada
+                        # sem registrar, entra com o que já esperou (limite inferior)
+                        self.latency.record('page_fetch', elapsed)
+                        self.hedge_stats['hedge_won'] += 1
+                    if hedge:
+                        self._count_hedge('hedge_won' if task is hedge else 'primary_won')
+                    self.latency.record('page_fetch_hedged', elapsed)
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _issue_hedge(self, url: str, params: Optional[Dict], primary: asyncio.Future) -> Optional[asyncio.Future]:
+        """Cópia da requisição, ou None se o orçamento acabou ou a primária respondeu antes do slot"""
+        if self.hedge_stats['hedged'] >= self.hedge_budget * self.hedge_stats['requests']:
+            self.hedge_stats['budget_exhausted'] += 1
+            self._count_hedge('budget_exhausted')
+            return None
+        # A cópia também respeita o intervalo de cortesia, mas só reserva o horário ao sair:
+        # se a primária responder antes, o horário fica livre para a próxima consulta
+        while not primary.done():
+            wait = self._next_request_at - time.monotonic()
+            if wait <= 0:
+                break
+            await asyncio.wait({primary}, timeout=wait)
+        if primary.done():
+            return None
+        self._next_request_at = time.monotonic() + self.request_interval
+        self.hedge_stats['hedged'] += 1
+        return asyncio.ensure_future(self._get(url, params, record=False))
+
+    def _count_hedge(self, result: str):
+        if CollectorRegistry is not None:
+            HEDGED_REQUESTS.labels(result, METRICS_ENGINE).inc()
+
+    def hedge_summary(self) -> Dict[str, float]:
+        """Taxa de hedge e cauda das requisições individuais x do resultado de fetch_page"""
+        requests_total = self.hedge_stats['requests']
+        summary = {
+            **self.hedge_stats,
+            'hedge_rate': round(self.hedge_stats['hedged'] / requests_total, 4) if requests_total else 0.0,
+        }
+        for operation in ('page_fetch', 'page_fetch_hedged'):
+            for q in (0.95, 0.99):
+                value = self.latency.percentile(operation, q)
+                summary[f'{operation}_p{int(q * 100)}_s'] = round(value, 3) if value is not None else None
+        return summary
+
+    def set_deadline(self, seconds: Optional[float]):
+        """Prazo do job a partir de agora (None ou 0: sem prazo)"""
+        self.deadline = time.monotonic() + seconds if seconds else None
+    
+    def cancel(self, reason: str = "cancelado"):
+        """Interrompe o scrape: as consultas em curso são canceladas no próximo tick do event loop"""
+        if self.cancel_reason is not None:
+            return
+        self.cancel_reason = reason
+        if self._cancel_event:
+            self._cancel_event.set()
+        logger.warning(f"Scrape interrompido: {reason}")
+        if CollectorRegistry is not None:
+            JOBS_CANCELLED.labels(METRICS_ENDPOINT, 'deadline' if reason == DEADLINE_EXPIRED else 'requested').inc()
+    
+    @property
+    def cancelled(self) -> bool:
+        if self.cancel_reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(DEADLINE_EXPIRED)
+        return self.cancel_reason is not None
+    
+    async def _until_cancelled(self, awaitable):
+        """
+        Aguarda awaitable até o fim, o cancelamento ou o prazo do job, o que vier
+        primeiro; nos dois últimos ele é cancelado (liberando a conexão) e sai JobCancelled
+        """
+        if self._cancel_event is None:  # fora do context manager
+            return await awaitable
+        if self.cancelled:
+            awaitable.close()
+            raise JobCancelled(self.cancel_reason)
+        
+        task = asyncio.ensure_future(awaitable)
+        waiter = asyncio.ensure_future(self._cancel_event.wait())
+        remaining = max(0.0, self.deadline - time.monotonic()) if self.deadline is not None else None
+        try:
+            done, _ = await asyncio.wait({task, waiter}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+            if not task.done():
+                task.cancel()
+                # Uma espera interna pode terminá-la com JobCancelled em vez de CancelledError
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        # Concluída no mesmo tick do cancelamento: vale o resultado (ou o erro) dela
+        if task.done() and not task.cancelled():
+            return task.result()
+        if not self.cancelled:
+            self.cancel(DEADLINE_EXPIRED)
+        raise JobCancelled(self.cancel_reason)
+    
+    async def _wait_request_slot(self):
+        """
+        Reserva o próximo horário livre do orçamento de cortesia e espera por ele
+        A reserva é feita antes de qualquer await, então consultas simultâneas
+        recebem horários distintos, espaçados de request_interval
+        """
+        now = time.monotonic()
+        slot = max(now, self._next_request_at)
+        self._next_request_at = slot + self.request_interval
+        await rate_limit_sleep(slot - now, 'between_requests')
+
+    @timed_field('numero_processo')
     def extract_processo_number(self, text: str) -> Optional[str]:
         """Extrai número do processo do texto"""
         match = self.patterns['processo'].search(text)
         return match.group(0) if match else None
 
+    @timed_field('valores')
     def extract_monetary_values(self, text: str) -> Dict[str, Optional[Decimal]]:
         """
         Extrai valores monetários do texto da publicação
@@ -187,6 +695,7 @@ class DJEScraper:
         
         return values
 
+    @timed_field('advogados')
     def extract_advogados(self, text: str) -> Optional[str]:
         """Extrai informações dos advogados com OAB"""
         oab_matches = self.patterns['oab'].findall(text)
@@ -216,7 +725,8 @@ class DJEScraper:
         
         return '\n'.join(advogados) if advogados else None
 
-    def parse_publicacao(self, html_content: str, data_disponibilizacao: datetime) -> List[PublicacaoData]:
+    @timed_stage('page_parse')
+    def parse_publicacao(self, html_content: str, data_disponibilizacao: datetime, fonte: str = DEFAULT_FONTE) -> List[PublicacaoData]:
         """
         Parse HTML content e extrai publicações que contêm os termos de busca
         """
@@ -271,7 +781,8 @@ class DJEScraper:
                     valor_principal_liquido=valores['valor_principal_liquido'],
                     valor_juros_moratorios=valores['valor_juros_moratorios'],
                     honorarios_advocaticios=valores['honorarios_advocaticios'],
-                    termos_encontrados=', '.join(terms_found)
+                    termos_encontrados=', '.join(terms_found),
+                    fonte=fonte
                 )
                 
                 publicacoes.append(publicacao)
@@ -283,56 +794,169 @@ class DJEScraper:
         
         return publicacoes
 
-    async def scrape_date(self, target_date: datetime) -> List[PublicacaoData]:
+    async def parse_publicacao_async(self, html_content: str, data_disponibilizacao: datetime, fonte: str = DEFAULT_FONTE) -> List[PublicacaoData]:
+        """
+        parse_publicacao no pool de processos, quando configurado
+        Só os bytes do HTML vão para o processo; as publicações voltam como tuplas
+        """
+        if not self.parse_pool:
+            return self.parse_publicacao(html_content, data_disponibilizacao, fonte)
+        return await self._parse_in_pool(html_content, data_disponibilizacao, fonte)
+
+    @timed_stage('page_parse')
+    async def _parse_in_pool(self, html_content: str, data_disponibilizacao: datetime, fonte: str) -> List[PublicacaoData]:
+        loop = asyncio.get_running_loop()
+        rows = await loop.run_in_executor(
+            self.parse_pool, _parse_in_worker, html_content.encode('utf-8'), data_disponibilizacao, fonte
+        )
+        return [PublicacaoData(*row) for row in rows]
+
+    async def scrape_date(self, target_date: datetime, alvo: Optional[ConsultaAlvo] = None) -> List[PublicacaoData]:
         """
         Scrape publicações de uma data específica
+        Sem alvo, consulta o Caderno 3 - Judicial - 1ª Instância - Capital Parte 1
         """
-        logger.info(f"Iniciando scrape para data: {target_date.strftime('%d/%m/%Y')}")
-        
         try:
-            # Parâmetros para busca no DJE
-            params = {
-                'dadosConsulta.dtInicio': target_date.strftime('%d/%m/%Y'),
-                'dadosConsulta.dtFim': target_date.strftime('%d/%m/%Y'),
-                'dadosConsulta.cdCaderno': '3',  # Caderno 3
-                'dadosConsulta.cdTipoJudicial': '1',  # 1ª Instância
-                'dadosConsulta.cdComarca': '106',  # São Paulo - Capital
-                'dadosConsulta.parte': '1',  # Parte 1
-            }
-            
-            # Adiciona termos de busca
-            search_query = ' AND '.join(self.search_terms)
-            params['dadosConsulta.pesquisaLivre'] = search_query
-            
-            html_content = await self.fetch_page(self.search_url, params)
-            publicacoes = self.parse_publicacao(html_content, target_date)
-            
-            logger.info(f"Encontradas {len(publicacoes)} publicações para {target_date.strftime('%d/%m/%Y')}")
-            return publicacoes
-            
+            return await self._scrape_query(target_date, alvo or ConsultaAlvo())
         except Exception as e:
             logger.error(f"Erro no scrape da data {target_date}: {e}")
             return []
 
-    def save_to_database(self, publicacoes: List[PublicacaoData]) -> int:
+    async def _scrape_query(self, target_date: datetime, alvo: ConsultaAlvo) -> List[PublicacaoData]:
+        """Executa uma consulta (data + alvo), propagando erros"""
+        logger.info(f"Iniciando scrape para data: {target_date.strftime('%d/%m/%Y')} (alvo {alvo.label})")
+        
+        # Parâmetros para busca no DJE
+        params = {
+            'dadosConsulta.dtInicio': target_date.strftime('%d/%m/%Y'),
+            'dadosConsulta.dtFim': target_date.strftime('%d/%m/%Y'),
+            **alvo.params(),
+        }
+        
+        # Adiciona termos de busca
+        search_query = ' AND '.join(self.search_terms)
+        params['dadosConsulta.pesquisaLivre'] = search_query
+        
+        html_content = await self.fetch_page(self.search_url, params)
+        publicacoes = await self.parse_publicacao_async(html_content, target_date, fonte=alvo.fonte)
+        
+        logger.info(f"Encontradas {len(publicacoes)} publicações para {target_date.strftime('%d/%m/%Y')} (alvo {alvo.label})")
+        return publicacoes
+
+    async def run_query_plan(
+        self,
+        alvos: List[ConsultaAlvo],
+        start_date: datetime,
+        end_date: datetime,
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Executa a grade (data x alvo) sobre a sessão compartilhada
+        
+        - Concorrência limitada por host (padrão: limite por host do connector)
+        - Justiça entre alvos: os workers retiram tarefas em round-robin,
+          então um alvo com muitas datas não monopoliza as conexões
+        - Estatísticas agregadas por alvo (chave 'caderno:comarca:instancia:parte')
+        """
+        if not self.session:
+            raise RuntimeError("Session not initialized. Use async context manager.")
+            
+        alvos = list(dict.fromkeys(alvos))
+        dates = []
+        current = start_date
+        while current <= end_date:
+            dates.append(current)
+            current += timedelta(days=1)
+        
+        queues = deque((alvo, deque(dates)) for alvo in alvos if dates)
+        stats = {
+            alvo.label: {
+                'total_publicacoes': 0,
+                'total_inseridas': 0,
+                'total_atualizadas': 0,
+                'total_inalteradas': 0,
+                'dates_processed': 0,
+                'errors': 0
+            }
+            for alvo in alvos
+        }
+        
+        host = urlparse(self.search_url).netloc
+        limit = max_concurrency or self.max_connections_per_host
+        total_queries = len(alvos) * len(dates)
+        logger.info(f"Plano de consultas: {len(alvos)} alvo(s) x {len(dates)} data(s) = {total_queries} consultas, {limit} concorrentes em {host}")
+        
+        def next_task() -> Optional[Tuple[ConsultaAlvo, datetime]]:
+            # Round-robin: pega a próxima data do alvo da frente e o manda para o fim da fila
+            while queues:
+                alvo, pending = queues.popleft()
+                if pending:
+                    target_date = pending.popleft()
+                    if pending:
+                        queues.append((alvo, pending))
+                    return alvo, target_date
+            return None
+        
+        loop = asyncio.get_running_loop()
+        
+        async def worker():
+            while not self.cancelled:
+                task = next_task()
+                if task is None:
+                    return
+                alvo, target_date = task
+                target_stats = stats[alvo.label]
+                try:
+                    publicacoes = await self._scrape_query(target_date, alvo)
+                    saved = await loop.run_in_executor(None, self.save_to_database, publicacoes)
+                    
+                    target_stats['total_publicacoes'] += len(publicacoes)
+                    target_stats['total_inseridas'] += saved['inserted']
+                    target_stats['total_atualizadas'] += saved['updated']
+                    target_stats['total_inalteradas'] += saved['unchanged']
+                    target_stats['dates_processed'] += 1
+                except JobCancelled:
+                    return
+                except Exception as e:
+                    logger.error(f"Erro na consulta {alvo.label} em {target_date.strftime('%d/%m/%Y')}: {e}")
+                    target_stats['errors'] += 1
+        
+        await asyncio.gather(*(worker() for _ in range(min(limit, total_queries))))
+        
+        logger.info(f"Plano de consultas concluído. Estatísticas por alvo: {stats}")
+        return stats
+
+    @timed_stage('db_write')
+    def save_to_database(self, publicacoes: List[PublicacaoData]) -> Dict[str, int]:
         """
         Salva publicações no banco de dados PostgreSQL
-        Retorna número de registros inseridos
+        Só reescreve linhas cujo content_hash mudou; publicações idênticas
+        não geram UPDATE (nem tuplas mortas). A coluna content_hash vem da
+        migração do Prisma (20261019120000_add_content_hash)
+        Retorna contagem de registros inseridos, atualizados e inalterados
         """
+        result = {'inserted': 0, 'updated': 0, 'unchanged': 0}
         if not publicacoes:
-            return 0
+            return result
             
         try:
             conn = psycopg2.connect(**self.db_config)
             cursor = conn.cursor()
             
+            # Hashes já gravados para o lote, em uma única consulta
+            cursor.execute(
+                "SELECT numero_processo, content_hash FROM publicacoes WHERE numero_processo = ANY(%s)",
+                ([pub.numero_processo for pub in publicacoes],)
+            )
+            stored_hashes = dict(cursor.fetchall())
+            
             insert_query = """
                 INSERT INTO publicacoes (
                     numero_processo, data_disponibilizacao, autores, advogados,
                     conteudo, valor_principal_bruto, valor_principal_liquido,
                     valor_juros_moratorios, honorarios_advocaticios, termos_encontrados,
-                    fonte, status, data_extracao
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    fonte, status, data_extracao, content_hash
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 ON CONFLICT (numero_processo) DO UPDATE SET
                     data_disponibilizacao = EXCLUDED.data_disponibilizacao,
                     autores = EXCLUDED.autores,
@@ -343,11 +967,18 @@ class DJEScraper:
                     valor_juros_moratorios = EXCLUDED.valor_juros_moratorios,
                     honorarios_advocaticios = EXCLUDED.honorarios_advocaticios,
                     termos_encontrados = EXCLUDED.termos_encontrados,
+                    content_hash = EXCLUDED.content_hash,
                     updated_at = CURRENT_TIMESTAMP
+                WHERE publicacoes.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+                RETURNING (xmax = 0) AS inserted
             """
             
-            inserted_count = 0
             for pub in publicacoes:
+                content_hash = pub.content_hash
+                if stored_hashes.get(pub.numero_processo) == content_hash:
+                    result['unchanged'] += 1
+                    continue
+                    
                 try:
                     cursor.execute(insert_query, (
                         pub.numero_processo,
@@ -362,9 +993,18 @@ class DJEScraper:
                         pub.termos_encontrados,
                         pub.fonte,
                         'nova',
-                        datetime.now()
+                        datetime.now(),
+                        content_hash
                     ))
-                    inserted_count += 1
+                    row = cursor.fetchone()
+                    if row is None:
+                        # Linha gravada por outro processo com o mesmo hash entre o SELECT e o INSERT
+                        result['unchanged'] += 1
+                    elif row[0]:
+                        result['inserted'] += 1
+                    else:
+                        result['updated'] += 1
+                    stored_hashes[pub.numero_processo] = content_hash
                 except psycopg2.IntegrityError as e:
                     logger.warning(f"Publicação já existe: {pub.numero_processo}")
                     conn.rollback()
@@ -374,49 +1014,89 @@ class DJEScraper:
             cursor.close()
             conn.close()
             
-            logger.info(f"Salvos {inserted_count} registros no banco de dados")
-            return inserted_count
+            logger.info(
+                f"Banco de dados: {result['inserted']} inseridos, "
+                f"{result['updated']} atualizados, {result['unchanged']} inalterados"
+            )
+            return result
             
         except Exception as e:
             logger.error(f"Erro ao salvar no banco: {e}")
-            return 0
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0}
 
-    async def run_daily_scrape(self, days_back: int = 7) -> Dict[str, int]:
+    async def run_daily_scrape(self, days_back: int = 7, max_concurrency: Optional[int] = None) -> Dict[str, int]:
         """
         Executa scrape diário para os últimos N dias
+        
+        - Datas consultadas em paralelo, limitadas por um semáforo (padrão:
+          limite por host do connector) e pelo orçamento de cortesia de fetch_page
+        - Gravação no banco na ordem das datas, à medida que cada uma termina
+        - O erro de uma data é contado nela e não interrompe as demais
+        - Cancelado (sinal ou prazo), grava as datas já concluídas e para;
+          o motivo fica em stats['cancelled']
         Retorna estatísticas de execução
         """
-        logger.info(f"Iniciando scrape diário para os últimos {days_back} dias")
+        if not self.session:
+            raise RuntimeError("Session not initialized. Use async context manager.")
+            
+        limit = max(1, min(max_concurrency or self.max_connections_per_host, self.max_connections))
+        logger.info(f"Iniciando scrape diário para os últimos {days_back} dias ({limit} datas simultâneas)")
         
         stats = {
             'total_publicacoes': 0,
             'total_inseridas': 0,
+            'total_atualizadas': 0,
+            'total_inalteradas': 0,
             'dates_processed': 0,
             'errors': 0
         }
         
-        for i in range(days_back):
-            target_date = datetime.now() - timedelta(days=i)
-            
-            try:
-                publicacoes = await self.scrape_date(target_date)
-                inserted = self.save_to_database(publicacoes)
-                
-                stats['total_publicacoes'] += len(publicacoes)
-                stats['total_inseridas'] += inserted
-                stats['dates_processed'] += 1
-                
-                # Rate limiting entre datas
-                if i < days_back - 1:
-                    await asyncio.sleep(5)
+        now = datetime.now()
+        dates = [now - timedelta(days=i) for i in range(days_back)]
+        semaphore = asyncio.Semaphore(limit)
+        
+        async def fetch(target_date: datetime) -> List[PublicacaoData]:
+            async with semaphore:
+                return await self._scrape_query(target_date, ConsultaAlvo())
+        
+        tasks = [asyncio.create_task(self._until_cancelled(fetch(target_date))) for target_date in dates]
+        loop = asyncio.get_running_loop()
+        
+        try:
+            for target_date, task in zip(dates, tasks):
+                try:
+                    publicacoes = await task
+                    saved = await loop.run_in_executor(None, self.save_to_database, publicacoes)
                     
-            except Exception as e:
-                logger.error(f"Erro no scrape da data {target_date}: {e}")
-                stats['errors'] += 1
+                    stats['total_publicacoes'] += len(publicacoes)
+                    stats['total_inseridas'] += saved['inserted']
+                    stats['total_atualizadas'] += saved['updated']
+                    stats['total_inalteradas'] += saved['unchanged']
+                    stats['dates_processed'] += 1
+                except JobCancelled as e:
+                    stats['cancelled'] = str(e)
+                except Exception as e:
+                    logger.error(f"Erro no scrape da data {target_date.strftime('%d/%m/%Y')}: {e}")
+                    stats['errors'] += 1
+        finally:
+            for task in tasks:
+                task.cancel()
         
         logger.info(f"Scrape concluído. Estatísticas: {stats}")
         return stats
 
+# Estado dos processos do pool de parse: um DJEScraper só para parse_publicacao
+_parse_worker: Optional[DJEScraper] = None
+
+def _init_parse_worker(search_terms: Tuple[str, ...]):
+    global _parse_worker
+    _parse_worker = DJEScraper({}, list(search_terms))
+
+def _parse_in_worker(html: bytes, data_disponibilizacao: datetime, fonte: str) -> List[Tuple]:
+    """Executa parse_publicacao no processo do pool e devolve tuplas na ordem de PUBLICACAO_FIELDS"""
+    publicacoes = _parse_worker.parse_publicacao(html.decode('utf-8'), data_disponibilizacao, fonte)
+    return [tuple(getattr(publicacao, campo) for campo in PUBLICACAO_FIELDS) for publicacao in publicacoes]
+
 # Função principal para execução
 async def main():
     """Função principal do scraper"""
@@ -425,8 +1105,29 @@ async def main():
     # Parse argumentos da linha de comando
     parser = argparse.ArgumentParser(description='DJE Scraper - JusCash')
     parser.add_argument('--days-back', type=int, default=7, help='Número de dias para buscar (padrão: 7)')
+    parser.add_argument(
+        '--alvo', action='append', default=[],
+        help="Alvo 'caderno:comarca:instancia:parte' (pode repetir; ativa o plano de consultas)"
+    )
+    parser.add_argument('--concorrencia', type=int, default=None, help='Consultas simultâneas, por data ou no plano (padrão: limite por host)')
+    parser.add_argument('--metrics-port', type=int, default=None, help='Expõe métricas Prometheus nesta porta durante a execução')
+    parser.add_argument(
+        '--prazo', type=float, default=float(os.getenv('DJE_PRAZO_S', '0')),
+        help='Prazo do scrape em segundos; esgotado, grava as datas concluídas e para (padrão: DJE_PRAZO_S, 0 = sem prazo)'
+    )
+    parser.add_argument(
+        '--parse-processes', type=int, default=0,
+        help='Processos para parse/extração das páginas (padrão: 0, parse no próprio processo; -1 = um por núcleo)'
+    )
     args = parser.parse_args()
     
+    if args.metrics_port:
+        if CollectorRegistry is None:
+            logger.warning("prometheus_client não instalado; --metrics-port ignorado")
+        else:
+            start_http_server(args.metrics_port, registry=METRICS_REGISTRY)
+            logger.info(f"Métricas disponíveis em http://0.0.0.0:{args.metrics_port}/metrics")
+    
     # Configuração do banco de dados
     db_config = {
         'host': 'localhost',
@@ -443,16 +1144,56 @@ async def main():
         # Adicionar termos específicos conforme necessidade
     ]
     
-    async with DJEScraper(db_config, search_terms) as scraper:
-        stats = await scraper.run_daily_scrape(days_back=args.days_back)
+    parse_processes = (os.cpu_count() or 1) if args.parse_processes < 0 else args.parse_processes
+    
+    async with DJEScraper(db_config, search_terms, parse_processes=parse_processes) as scraper:
+        scraper.set_deadline(args.prazo)
+        
+        # SIGINT/SIGTERM: para no próximo tick e grava o parcial; um segundo sinal encerra na hora
+        loop = asyncio.get_running_loop()
+        
+        def on_signal(name: str):
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+            scraper.cancel(f"sinal {name}")
+        
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, on_signal, sig.name)
+            except NotImplementedError:  # Windows
+                pass
+        
+        if args.alvo:
+            alvos = [ConsultaAlvo.parse(spec) for spec in args.alvo]
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=args.days_back - 1)
+            plan_stats = await scraper.run_query_plan(alvos, start_date, end_date, args.concorrencia)
+            
+            for label, target_stats in plan_stats.items():
+                logger.info(f"Alvo {label}: {target_stats}")
+            
+            # Totais do plano no mesmo formato do scrape diário
+            stats = {
+                key: sum(target_stats[key] for target_stats in plan_stats.values())
+                for key in ('total_publicacoes', 'total_inseridas', 'total_atualizadas', 'total_inalteradas', 'dates_processed', 'errors')
+            }
+        else:
+            stats = await scraper.run_daily_scrape(days_back=args.days_back, max_concurrency=args.concorrencia)
         
         # Log final
         logger.info("=" * 50)
-        logger.info("SCRAPING FINALIZADO COM SUCESSO")
+        if scraper.cancel_reason:
+            logger.info(f"SCRAPING INTERROMPIDO ({scraper.cancel_reason}): resultado parcial")
+        else:
+            logger.info("SCRAPING FINALIZADO COM SUCESSO")
         logger.info(f"Publicações encontradas: {stats['total_publicacoes']}")
         logger.info(f"Registros inseridos: {stats['total_inseridas']}")
+        logger.info(f"Registros atualizados: {stats['total_atualizadas']}")
+        logger.info(f"Registros inalterados: {stats['total_inalteradas']}")
         logger.info(f"Datas processadas: {stats['dates_processed']}")
         logger.info(f"Erros: {stats['errors']}")
+        if scraper.hedge_enabled:
+            logger.info(f"Hedge: {scraper.hedge_summary()}")
         logger.info("=" * 50)
 
 if __name__ == "__main__":
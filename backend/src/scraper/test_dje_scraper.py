@@ -0,0 +1,281 @@
+"""
+Testes do CLI de scraping (dje_scraper.py)
+Os de gravação no banco usam um Postgres descartável em DJE_TESTE_DATABASE_URL
+(ex.: postgresql://postgres:@localhost:5432/postgres), cada um num schema próprio; sem ele são pulados.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from dje_scraper import ConsultaAlvo, DJEScraper, PublicacaoData
+
+DSN = os.getenv("DJE_TESTE_DATABASE_URL", "")
+
+# Só as colunas que save_to_database grava
+TABELA_PUBLICACOES = """
+    CREATE TABLE publicacoes (
+        numero_processo TEXT PRIMARY KEY,
+        data_disponibilizacao TIMESTAMP NOT NULL,
+        autores TEXT NOT NULL,
+        advogados TEXT,
+        conteudo TEXT NOT NULL,
+        valor_principal_bruto DECIMAL(15, 2),
+        valor_principal_liquido DECIMAL(15, 2),
+        valor_juros_moratorios DECIMAL(15, 2),
+        honorarios_advocaticios DECIMAL(15, 2),
+        termos_encontrados TEXT,
+        fonte TEXT,
+        status TEXT,
+        data_extracao TIMESTAMP,
+        content_hash VARCHAR(64),
+        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def publicacao(**campos) -> PublicacaoData:
+    valores = {
+        "numero_processo": "0001234-56.2024.8.26.0100",
+        "data_disponibilizacao": datetime(2025, 6, 13),
+        "autores": "Maria da Silva",
+        "advogados": "João Souza (OAB 123456/SP)",
+        "conteudo": "Processo 0001234-56.2024.8.26.0100 - RPV - pagamento pelo INSS",
+        "valor_principal_bruto": Decimal("1500"),
+        "valor_principal_liquido": Decimal("1350.50"),
+        "valor_juros_moratorios": None,
+        "honorarios_advocaticios": None,
+        "termos_encontrados": "RPV",
+    }
+    valores.update(campos)
+    return PublicacaoData(**valores)
+
+
+def test_content_hash_normaliza_valores_e_horario():
+    referencia = publicacao().content_hash
+    assert publicacao(valor_principal_bruto=Decimal("1500.00")).content_hash == referencia
+    assert publicacao(data_disponibilizacao=datetime(2025, 6, 13, 15, 30)).content_hash == referencia
+
+
+@pytest.mark.parametrize("campos", [
+    {"conteudo": "Processo 0001234-56.2024.8.26.0100 - RPV - retificação"},
+    {"valor_principal_bruto": Decimal("1600")},
+    {"valor_juros_moratorios": Decimal("10")},
+    {"advogados": None},
+])
+def test_content_hash_muda_com_o_conteudo(campos):
+    assert publicacao(**campos).content_hash != publicacao().content_hash
+
+
+def test_content_hash_de_conteudo_comprimido():
+    longo = "RPV pagamento pelo INSS " * 200
+    assert publicacao(conteudo=longo).content_hash == publicacao(conteudo=longo).content_hash
+    assert publicacao(conteudo=longo).conteudo == longo
+
+
+@pytest.fixture
+def banco():
+    if not DSN:
+        pytest.skip("DJE_TESTE_DATABASE_URL não definido")
+    import psycopg2
+    from psycopg2.extensions import make_dsn
+
+    schema = f"teste_dje_{uuid.uuid4().hex[:8]}"
+    conn = psycopg2.connect(DSN)
+    conn.autocommit = True
+    conn.cursor().execute(f"CREATE SCHEMA {schema}")
+    dsn = make_dsn(DSN, options=f"-c search_path={schema}")
+    with psycopg2.connect(dsn) as criacao:
+        criacao.cursor().execute(TABELA_PUBLICACOES)
+    criacao.close()
+    yield dsn
+    conn.cursor().execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.close()
+
+
+def versao_da_linha(dsn, numero_processo=publicacao().numero_processo):
+    """xmin muda a cada UPDATE: diz se a linha foi reescrita"""
+    import psycopg2
+
+    with psycopg2.connect(dsn) as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT xmin::text FROM publicacoes WHERE numero_processo = %s", (numero_processo,))
+        versao = cursor.fetchone()[0]
+    conn.close()
+    return versao
+
+
+def test_publicacao_inalterada_nao_e_reescrita(banco):
+    scraper = DJEScraper({"dsn": banco}, ["RPV"])
+    assert scraper.save_to_database([publicacao()]) == {"inserted": 1, "updated": 0, "unchanged": 0}
+    antes = versao_da_linha(banco)
+
+    assert scraper.save_to_database([publicacao(valor_principal_bruto=Decimal("1500.00"))]) == {
+        "inserted": 0, "updated": 0, "unchanged": 1}
+    assert versao_da_linha(banco) == antes
+
+
+@pytest.mark.parametrize("campos", [
+    {"conteudo": "Processo 0001234-56.2024.8.26.0100 - RPV - retificação"},
+    {"valor_principal_bruto": Decimal("1600")},
+])
+def test_publicacao_alterada_e_atualizada(banco, campos):
+    scraper = DJEScraper({"dsn": banco}, ["RPV"])
+    scraper.save_to_database([publicacao()])
+    antes = versao_da_linha(banco)
+
+    assert scraper.save_to_database([publicacao(**campos)]) == {"inserted": 0, "updated": 1, "unchanged": 0}
+    assert versao_da_linha(banco) != antes
+
+
+def test_upsert_concorrente_com_o_mesmo_hash_nao_reescreve(banco):
+    import psycopg2.extensions
+
+    class CursorSemHashes(psycopg2.extensions.cursor):
+        """Como se outro processo gravasse a linha entre o SELECT dos hashes e o INSERT"""
+
+        def fetchall(self):
+            return []
+
+    DJEScraper({"dsn": banco}, ["RPV"]).save_to_database([publicacao()])
+    antes = versao_da_linha(banco)
+
+    scraper = DJEScraper({"dsn": banco, "cursor_factory": CursorSemHashes}, ["RPV"])
+    assert scraper.save_to_database([publicacao()]) == {"inserted": 0, "updated": 0, "unchanged": 1}
+    assert versao_da_linha(banco) == antes
+
+
+def test_alvo_a_partir_da_especificacao():
+    assert ConsultaAlvo.parse("") == ConsultaAlvo()
+    assert ConsultaAlvo.parse("11::2") == ConsultaAlvo(caderno="11", tipo_judicial="2")
+    assert ConsultaAlvo.parse("12:100:1:2").label == "12:100:1:2"
+    with pytest.raises(ValueError):
+        ConsultaAlvo.parse("1:2:3:4:5")
+
+
+def plano(alvos, dias, max_concurrency=1, falha=None):
+    """Executa run_query_plan com consultas e gravação falsas; devolve (ordem das consultas, estatísticas)"""
+    scraper = DJEScraper({}, ["RPV"])
+    scraper.session = object()
+    consultas = []
+
+    async def consultar(data, alvo):
+        consultas.append((alvo.label, data.day))
+        await asyncio.sleep(0)
+        if (alvo.label, data.day) == falha:
+            raise RuntimeError("HTTP 500")
+        return [publicacao()]
+
+    scraper._scrape_query = consultar
+    scraper.save_to_database = lambda publicacoes: {"inserted": len(publicacoes), "updated": 0, "unchanged": 0}
+    estatisticas = asyncio.run(
+        scraper.run_query_plan(alvos, datetime(2025, 6, 1), datetime(2025, 6, dias), max_concurrency))
+    return consultas, estatisticas
+
+
+def test_plano_alterna_os_alvos():
+    a, b = ConsultaAlvo(), ConsultaAlvo(caderno="11")
+    consultas, _ = plano([a, b, a], dias=3)
+    assert consultas == [(a.label, 1), (b.label, 1), (a.label, 2), (b.label, 2), (a.label, 3), (b.label, 3)]
+
+
+def test_plano_conta_por_alvo_e_segue_apos_erro():
+    a, b = ConsultaAlvo(), ConsultaAlvo(caderno="11")
+    consultas, estatisticas = plano([a, b], dias=2, max_concurrency=3, falha=(b.label, 1))
+
+    assert sorted(consultas) == sorted([(a.label, 1), (a.label, 2), (b.label, 1), (b.label, 2)])
+    assert estatisticas[a.label]["dates_processed"] == 2
+    assert estatisticas[a.label]["total_inseridas"] == 2
+    assert (estatisticas[b.label]["dates_processed"], estatisticas[b.label]["errors"]) == (1, 1)
+
+
+def test_datas_em_paralelo_respeitam_o_intervalo_de_cortesia():
+    scraper = DJEScraper({}, ["RPV"])
+    scraper.session = object()
+    scraper.request_interval = 0.05
+    inicios = []
+    simultaneas = [0, 0]
+
+    async def get(url, params, record=True):
+        inicios.append(time.monotonic())
+        simultaneas[0] += 1
+        simultaneas[1] = max(simultaneas)
+        await asyncio.sleep(0.2)
+        simultaneas[0] -= 1
+        return "<html><body>Nenhum resultado</body></html>"
+
+    scraper._get = get
+    inicio = time.monotonic()
+    estatisticas = asyncio.run(scraper.run_daily_scrape(days_back=6, max_concurrency=3))
+    duracao = time.monotonic() - inicio
+
+    assert (estatisticas["dates_processed"], estatisticas["errors"]) == (6, 0)
+    assert simultaneas[1] == 3
+    intervalos = [b - a for a, b in zip(inicios, inicios[1:])]
+    assert min(intervalos) >= scraper.request_interval * 0.9
+    # Sequencial levaria 6 x 0,2 s
+    assert duracao < 0.8
+
+
+def scraper_com_hedge(latencia_primaria, latencia_copia=0.01):
+    """Scraper com p95 de page_fetch em 0,05 s; devolve (scraper, chamadas feitas a _get)"""
+    scraper = DJEScraper({}, ["RPV"])
+    scraper.hedge_enabled = True
+    scraper.request_interval = 0
+    for _ in range(scraper.latency.min_samples):
+        scraper.latency.record('page_fetch', 0.05)
+    chamadas = []
+
+    async def get(url, params, record=True):
+        chamada = {"record": record, "inicio": time.monotonic(), "cancelada": False}
+        chamadas.append(chamada)
+        try:
+            await asyncio.sleep(latencia_primaria if record else latencia_copia)
+        except asyncio.CancelledError:
+            chamada["cancelada"] = True
+            raise
+        return "primaria" if record else "copia"
+
+    scraper._get = get
+    return scraper, chamadas
+
+
+def test_primaria_rapida_nao_dispara_hedge():
+    scraper, chamadas = scraper_com_hedge(latencia_primaria=0.01)
+    assert asyncio.run(scraper._fetch_hedged("http://dje", None)) == "primaria"
+    assert len(chamadas) == 1
+    assert scraper.hedge_stats["hedged"] == 0
+
+
+def test_hedge_sai_depois_do_p95_e_cancela_a_perdedora():
+    scraper, chamadas = scraper_com_hedge(latencia_primaria=1)
+
+    async def buscar():
+        resultado = await scraper._fetch_hedged("http://dje", None)
+        await asyncio.sleep(0)  # deixa o cancelamento da primária chegar
+        return resultado
+
+    inicio = time.monotonic()
+    assert asyncio.run(buscar()) == "copia"
+    assert time.monotonic() - inicio < 0.5
+
+    primaria, copia = chamadas
+    assert copia["inicio"] - primaria["inicio"] >= 0.05 * 0.9
+    assert (primaria["cancelada"], copia["record"]) == (True, False)
+    assert (scraper.hedge_stats["hedged"], scraper.hedge_stats["hedge_won"]) == (1, 1)
+
+
+def test_hedge_respeita_o_orcamento():
+    scraper, chamadas = scraper_com_hedge(latencia_primaria=0.1)
+    scraper.hedge_budget = 0.5
+
+    async def buscar():
+        return [await scraper._fetch_hedged("http://dje", None) for _ in range(2)]
+
+    assert asyncio.run(buscar()) == ["copia", "primaria"]
+    assert [chamada["record"] for chamada in chamadas] == [True, False, True]
+    assert scraper.hedge_stats["budget_exhausted"] == 1
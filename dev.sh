@@ -35,7 +35,7 @@ echo "Terminal 2 - Frontend:"
 echo "cd frontend && npm run dev"
 echo ""
 echo "Terminal 3 - Scraper:"
-echo "cd scraper && source venv/bin/activate && pip install -r requirements.txt && python real_dje_scraper.py"
+echo "cd scraper && source venv/bin/activate && pip install -r requirements.txt && python servico.py"
 echo ""
 echo "🔗 URLs de desenvolvimento:"
 echo "Frontend: http://localhost:5173"
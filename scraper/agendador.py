@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Agendador embutido do serviço de scraping
+
+Com AGENDA_CRON definido (cron de 5 campos, horário local do processo), o
+servico.py roda executar_scraping_real numa thread própria nos horários da
+agenda, com atraso aleatório de até AGENDA_JITTER_S segundos. O mesmo
+RealDJEScraper é usado em todas as execuções, com o navegador mantido
+aberto, e índices, caches e caixa de saída já estão carregados no processo:
+uma execução agendada não paga a subida de nada.
+
+Execuções nunca se sobrepõem: os horários que passam durante uma execução,
+ou com o serviço parado, são agrupados numa única execução de recuperação,
+que busca os dias desde a última concluída (até 7). O último horário
+atendido fica em AGENDA_ESTADO_PATH e sobrevive a reinícios.
+
+Uso avulso (uma execução e sai):
+    python agendador.py --uma-vez --dias 1
+"""
+
+import os
+import json
+import random
+import asyncio
+import logging
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from estado import DIRETORIO_DADOS
+from metricas import job_em_andamento
+
+logger = logging.getLogger(__name__)
+
+# executar_scraping_real aceita até 7 dias em /run-real
+MAX_DIAS_RECUPERACAO = 7
+
+
+def _campo_cron(campo: str, minimo: int, maximo: int) -> Set[int]:
+    """Valores de um campo cron: *, listas, intervalos e passos (*/15, 8-18/2)"""
+    valores = set()
+    for parte in campo.split(","):
+        faixa, _, passo = parte.partition("/")
+        if faixa == "*":
+            inicio, fim = minimo, maximo
+        elif "-" in faixa:
+            inicio, fim = (int(valor) for valor in faixa.split("-", 1))
+        else:
+            inicio = fim = int(faixa)
+            if passo:
+                fim = maximo
+        if inicio < minimo or fim > maximo or inicio > fim:
+            raise ValueError(f"Campo cron fora do intervalo {minimo}-{maximo}: {parte}")
+        valores.update(range(inicio, fim + 1, int(passo) if passo else 1))
+    return valores
+
+
+class ExpressaoCron:
+    """Cron de 5 campos (minuto hora dia mês dia-da-semana), domingo = 0 ou 7"""
+
+    def __init__(self, expressao: str):
+        campos = expressao.split()
+        if len(campos) != 5:
+            raise ValueError(f"Expressão cron deve ter 5 campos: {expressao!r}")
+        self.expressao = expressao
+        self.minutos = _campo_cron(campos[0], 0, 59)
+        self.horas = _campo_cron(campos[1], 0, 23)
+        self.dias = _campo_cron(campos[2], 1, 31)
+        self.meses = _campo_cron(campos[3], 1, 12)
+        self.dias_semana = {dia % 7 for dia in _campo_cron(campos[4], 0, 7)}
+        # Como no cron: com dia e dia da semana restritos, basta um dos dois
+        self.dia_restrito = campos[2] != "*"
+        self.semana_restrita = campos[4] != "*"
+
+    def _dia_valido(self, dia: datetime) -> bool:
+        if dia.month not in self.meses:
+            return False
+        no_dia = dia.day in self.dias
+        na_semana = (dia.weekday() + 1) % 7 in self.dias_semana
+        if self.dia_restrito and self.semana_restrita:
+            return no_dia or na_semana
+        return no_dia and na_semana
+
+    def _horarios_do_dia(self, dia: datetime) -> List[datetime]:
+        base = dia.replace(hour=0, minute=0, second=0, microsecond=0)
+        return [base.replace(hour=hora, minute=minuto) for hora in sorted(self.horas) for minuto in sorted(self.minutos)]
+
+    def proximo(self, apos: datetime) -> datetime:
+        """Primeiro horário da agenda estritamente depois de apos"""
+        dia = apos.replace(hour=0, minute=0, second=0, microsecond=0)
+        for _ in range(366 * 5):
+            if self._dia_valido(dia):
+                for horario in self._horarios_do_dia(dia):
+                    if horario > apos:
+                        return horario
+            dia += timedelta(days=1)
+        raise ValueError(f"Expressão cron sem horários: {self.expressao!r}")
+
+    def anterior(self, ate: datetime) -> Optional[datetime]:
+        """Último horário da agenda até ate (inclusive), nos últimos 366 dias"""
+        dia = ate.replace(hour=0, minute=0, second=0, microsecond=0)
+        for _ in range(366):
+            if self._dia_valido(dia):
+                for horario in reversed(self._horarios_do_dia(dia)):
+                    if horario <= ate:
+                        return horario
+            dia -= timedelta(days=1)
+        return None
+
+
+class Agendador:
+    """Thread que dispara o scraping nos horários do cron, sem sobreposição e com recuperação"""
+
+    def __init__(self, cron: ExpressaoCron, criar_scraper: Callable[[], Any], dias: int = 1,
+                 jitter_s: float = 0, caminho_estado: str = ""):
+        self.cron = cron
+        self.criar_scraper = criar_scraper
+        self.dias = dias
+        self.jitter_s = jitter_s
+        self.caminho_estado = caminho_estado
+
+        self.scraper = None
+        self.lock = threading.Lock()
+        self.encerrar = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.em_execucao = False
+        self.proxima_execucao: Optional[datetime] = None
+        self.estado = self._ler_estado()
+
+    def _ler_estado(self) -> Dict[str, Any]:
+        if not self.caminho_estado or not os.path.exists(self.caminho_estado):
+            return {}
+        try:
+            with open(self.caminho_estado, encoding="utf-8") as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Estado da agenda ilegível, recomeçando: {e}")
+            return {}
+
+    def _gravar_estado(self):
+        if not self.caminho_estado:
+            return
+        diretorio = os.path.dirname(self.caminho_estado) or "."
+        os.makedirs(diretorio, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+        with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+            json.dump(self.estado, arquivo, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.caminho_estado)
+
+    def _ultimo_atendido(self) -> Optional[datetime]:
+        valor = self.estado.get("ultimo_horario")
+        return datetime.fromisoformat(valor) if valor else None
+
+    def dias_da_execucao(self, agora: datetime) -> int:
+        """AGENDA_DIAS, ou os dias desde a última execução concluída se o serviço ficou parado"""
+        concluida = self.estado.get("ultima_conclusao")
+        if not concluida:
+            return self.dias
+        atraso = (agora.date() - datetime.fromisoformat(concluida).date()).days
+        return max(self.dias, min(atraso, MAX_DIAS_RECUPERACAO))
+
+    def executar(self, horario: datetime) -> Dict[str, Any]:
+        """Uma execução agendada (ou avulsa); horario é o horário da agenda que ela atende"""
+        with self.lock:
+            if self.em_execucao:
+                logger.warning(f"Agenda: execução anterior ainda em andamento, {horario:%d/%m %H:%M} ignorado")
+                return {"success": False, "error": "execução em andamento"}
+            self.em_execucao = True
+
+        inicio = datetime.now()
+        dias = self.dias_da_execucao(inicio)
+        logger.info(f"Agenda: execução de {horario:%d/%m/%Y %H:%M} ({dias} dia(s))")
+        try:
+            if self.scraper is None:
+                self.scraper = self.criar_scraper()
+                self.scraper.manter_driver = True
+            with job_em_andamento("agendado"):
+                resultado = asyncio.run(self.scraper.executar_scraping_real(dias))
+        except Exception as e:
+            logger.error(f"Agenda: erro na execução: {e}")
+            resultado = {"success": False, "error": str(e)}
+
+        self.estado["ultimo_horario"] = horario.isoformat()
+        self.estado["ultima_execucao"] = {
+            "horario": horario.isoformat(),
+            "inicio": inicio.isoformat(),
+            "duracao_s": round((datetime.now() - inicio).total_seconds(), 1),
+            "dias": dias,
+            "success": bool(resultado.get("success")),
+            "total_encontradas": resultado.get("total_encontradas", 0),
+            "total_enviadas": resultado.get("total_enviadas", 0),
+            "error": resultado.get("error"),
+        }
+        if resultado.get("success"):
+            self.estado["ultima_conclusao"] = inicio.isoformat()
+        self._gravar_estado()
+
+        with self.lock:
+            self.em_execucao = False
+        return resultado
+
+    def _laco(self):
+        agora = datetime.now()
+        perdido = self.cron.anterior(agora)
+        ultimo = self._ultimo_atendido()
+        if perdido and ultimo and perdido > ultimo:
+            logger.info(f"Agenda: horário {perdido:%d/%m %H:%M} perdido com o serviço parado, recuperando")
+            self.executar(perdido)
+        elif perdido and not ultimo:
+            # Primeira subida: nada a recuperar, a agenda começa daqui
+            self.estado["ultimo_horario"] = perdido.isoformat()
+            self._gravar_estado()
+
+        while not self.encerrar.is_set():
+            # Horários vencidos durante a execução anterior viram um só, o mais recente
+            agora = datetime.now()
+            ultimo = self._ultimo_atendido() or agora
+            horario = self.cron.proximo(ultimo)
+            if horario <= agora:
+                horario = self.cron.anterior(agora)
+                atraso = 0.0
+            else:
+                atraso = (horario - agora).total_seconds() + random.uniform(0, self.jitter_s)
+            self.proxima_execucao = agora + timedelta(seconds=atraso)
+            logger.info(f"Agenda: próxima execução em {self.proxima_execucao:%d/%m/%Y %H:%M:%S}")
+
+            if self.encerrar.wait(atraso):
+                return
+            self.executar(horario)
+
+    def iniciar(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.encerrar.clear()
+            self.thread = threading.Thread(target=self._laco, name="agendador", daemon=True)
+            self.thread.start()
+            logger.info(f"Agenda ativa: '{self.cron.expressao}', jitter de até {self.jitter_s:g}s")
+
+    def parar(self, timeout: float = 5.0):
+        self.encerrar.set()
+        if self.thread:
+            self.thread.join(timeout)
+        if self.scraper:
+            self.scraper.encerrar_driver()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "cron": self.cron.expressao,
+            "em_execucao": self.em_execucao,
+            "proxima_execucao": self.proxima_execucao.isoformat() if self.proxima_execucao else None,
+            "navegador_aberto": bool(self.scraper and self.scraper.driver),
+            **self.estado,
+        }
+
+
+_agendador_global: Optional[Agendador] = None
+_agendador_lock = threading.Lock()
+
+
+def obter_agendador(criar_scraper: Callable[[], Any]) -> Optional[Agendador]:
+    """
+    Agendador do processo, criado na primeira chamada
+    Retorna None se desabilitado (AGENDA_CRON vazio) ou se a expressão for inválida
+    """
+    global _agendador_global
+
+    with _agendador_lock:
+        if _agendador_global is not None:
+            return _agendador_global
+
+        expressao = os.getenv("AGENDA_CRON", "")
+        if not expressao:
+            return None
+
+        try:
+            cron = ExpressaoCron(expressao)
+        except ValueError as e:
+            logger.error(f"AGENDA_CRON inválido, agenda desativada: {e}")
+            return None
+
+        _agendador_global = Agendador(
+            cron,
+            criar_scraper,
+            dias=int(os.getenv("AGENDA_DIAS", "1")),
+            jitter_s=float(os.getenv("AGENDA_JITTER_S", "300")),
+            caminho_estado=os.getenv("AGENDA_ESTADO_PATH", os.path.join(DIRETORIO_DADOS, "agenda.json")),
+        )
+        return _agendador_global
+
+
+def main():
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Agendador do scraper DJE-TJSP")
+    parser.add_argument("--uma-vez", action="store_true", help="Executa uma vez e sai, em vez de seguir a agenda")
+    parser.add_argument("--dias", type=int, default=int(os.getenv("AGENDA_DIAS", "1")))
+    parser.add_argument("--cron", default=os.getenv("AGENDA_CRON") or "0 8,14,18 * * *")
+    args = parser.parse_args()
+
+    import real_dje_scraper
+
+    agendador = Agendador(
+        ExpressaoCron(args.cron),
+        lambda: real_dje_scraper.RealDJEScraper(endpoint="agendado"),
+        dias=args.dias,
+        jitter_s=float(os.getenv("AGENDA_JITTER_S", "300")),
+        caminho_estado=os.getenv("AGENDA_ESTADO_PATH", os.path.join(DIRETORIO_DADOS, "agenda.json")),
+    )
+    if args.uma_vez:
+        resultado = agendador.executar(datetime.now().replace(second=0, microsecond=0))
+        agendador.parar()
+        caixa = agendador.scraper.caixa_saida if agendador.scraper else None
+        if caixa and not caixa.aguardar_vazia(timeout=300):
+            logger.warning(f"Caixa de saída não esvaziou; pendentes ficam em {caixa.caminho}: {caixa.estatisticas()}")
+        raise SystemExit(0 if resultado.get("success") else 1)
+
+    agendador.iniciar()
+    try:
+        agendador.thread.join()
+    except KeyboardInterrupt:
+        agendador.parar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Arquivo local das páginas de resultado baixadas do DJE
+
+Cada página é guardada uma única vez, comprimida (zlib), com o SHA-256 do
+HTML como nome (objetos/ab/abcdef....z). Um índice SQLite liga data,
+consulta e número da página ao hash. reextrair.py usa o arquivo para rodar
+a extração atual sobre datas antigas sem acessar o DJE.
+"""
+
+import os
+import mmap
+import zlib
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Consulta por data (dtDiario) feita pelo RealDJEScraper
+CONSULTA_SIMPLES = "consultaSimples"
+
+
+def _dia(valor) -> str:
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    return valor.isoformat() if isinstance(valor, date) else str(valor)[:10]
+
+
+def caminho_objeto(diretorio: str, hash_html: str) -> str:
+    return os.path.join(diretorio, "objetos", hash_html[:2], f"{hash_html}.z")
+
+
+def ler_objeto(caminho: str) -> str:
+    """HTML de um objeto do arquivo; o arquivo comprimido é lido por mmap, sem cópia intermediária"""
+    with open(caminho, "rb") as arquivo:
+        with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            return zlib.decompress(mapa).decode("utf-8")
+
+
+class ArquivoPaginas:
+    """Objetos comprimidos endereçados por conteúdo e índice (data, consulta, página) -> hash"""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        os.makedirs(os.path.join(diretorio, "objetos"), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(diretorio, "indice.db"), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS paginas (
+                data TEXT NOT NULL,
+                consulta TEXT NOT NULL,
+                pagina INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                obtida_em TEXT NOT NULL,
+                PRIMARY KEY (data, consulta, pagina)
+            )
+        """)
+        self.conn.commit()
+
+    def _gravar_objeto(self, html: str) -> str:
+        bruto = html.encode("utf-8")
+        hash_html = hashlib.sha256(bruto).hexdigest()
+        caminho = caminho_objeto(self.diretorio, hash_html)
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+            with os.fdopen(descritor, "wb") as arquivo:
+                arquivo.write(zlib.compress(bruto, 6))
+            os.replace(temporario, caminho)
+        return hash_html
+
+    def guardar(self, data, consulta: str, paginas_html: List[str]) -> List[str]:
+        """Grava as páginas da consulta na data, substituindo o que havia para a mesma data e consulta"""
+        hashes = [self._gravar_objeto(html) for html in paginas_html]
+        dia = _dia(data)
+        agora = datetime.now().isoformat()
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM paginas WHERE data = ? AND consulta = ?", (dia, consulta))
+            self.conn.executemany(
+                "INSERT INTO paginas (data, consulta, pagina, hash, obtida_em) VALUES (?, ?, ?, ?, ?)",
+                [(dia, consulta, numero, hash_html, agora) for numero, hash_html in enumerate(hashes, start=1)],
+            )
+        return hashes
+
+    def listar(self, data_inicio, data_fim, consulta: Optional[str] = None) -> Dict[Tuple[str, str], List[str]]:
+        """Hashes das páginas por (data, consulta), na ordem das páginas"""
+        sql = "SELECT data, consulta, hash FROM paginas WHERE data BETWEEN ? AND ?"
+        parametros = [_dia(data_inicio), _dia(data_fim)]
+        if consulta:
+            sql += " AND consulta = ?"
+            parametros.append(consulta)
+        with self.lock:
+            linhas = self.conn.execute(sql + " ORDER BY data, consulta, pagina", parametros).fetchall()
+
+        grupos: Dict[Tuple[str, str], List[str]] = {}
+        for dia, consulta_linha, hash_html in linhas:
+            grupos.setdefault((dia, consulta_linha), []).append(hash_html)
+        return grupos
+
+    def ler(self, hash_html: str) -> str:
+        return ler_objeto(caminho_objeto(self.diretorio, hash_html))
+
+
+_arquivo_global: Optional[ArquivoPaginas] = None
+_arquivo_lock = threading.Lock()
+
+
+def obter_arquivo() -> Optional[ArquivoPaginas]:
+    """
+    Arquivo compartilhado pelo processo, aberto na primeira chamada
+    Retorna None se desabilitado (ARQUIVO_PAGINAS_DIR vazio, o padrão: o arquivo não tem retenção) ou se o disco falhar
+    """
+    global _arquivo_global
+
+    with _arquivo_lock:
+        if _arquivo_global is not None:
+            return _arquivo_global
+
+        diretorio = os.getenv("ARQUIVO_PAGINAS_DIR", "")
+        if not diretorio:
+            return None
+
+        try:
+            _arquivo_global = ArquivoPaginas(diretorio)
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Erro ao abrir arquivo de páginas: {e}")
+            return None
+        return _arquivo_global
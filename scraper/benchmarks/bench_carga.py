@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Teste de carga dos endpoints Flask do scraper
+
+Uso (a partir de scraper/):
+    python -m benchmarks.bench_carga --concorrencia 20 --duracao 60
+    python -m benchmarks.bench_carga --mix "busca-personalizada=1,progresso-busca=10,health=2" --latencia-dia-ms 2000
+    python -m benchmarks.bench_carga --url http://scraper:5002 --pid 1234   # contra um serviço já rodando
+
+Por padrão sobe no mesmo processo o app Flask (servidor threaded, como em
+app.run), uma API stub que recebe POST /api/publicacoes e um backend de
+scraping stub: o navegador é substituído por uma espera configurável por dia
+seguida da extração real sobre páginas do corpus sintético. Assim o que se
+mede é o custo do serviço (threads, parse, envio à API), não o do DJE.
+
+Relata p50/p95/p99 por endpoint, taxa de erro, vazão, threads e RSS do processo.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks.bench_extracao import DIR_RESULTADOS, DriverOffline, _commit_atual
+from benchmarks.corpus import gerar_pagina, gerar_publicacoes
+from browser_memory import medir_rss_arvore
+
+MIX_PADRAO = "busca-personalizada=1,run-real=1,progresso-busca=8,health=2"
+
+
+# API stub -------------------------------------------------------------
+
+class EstadoApiStub:
+    def __init__(self, latencia_ms: float):
+        self.latencia_ms = latencia_ms
+        self.lock = threading.Lock()
+        self.recebidas = 0
+
+
+def criar_api_stub(estado: EstadoApiStub) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, status: int, corpo):
+            dados = json.dumps(corpo).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if estado.latencia_ms:
+                time.sleep(estado.latencia_ms / 1000)
+            with estado.lock:
+                estado.recebidas += 1
+            self._responder(201, {"success": True})
+
+        def do_GET(self):
+            if self.path.startswith("/api/publicacoes/numeros-processo"):
+                self._responder(200, {"success": True, "data": []})
+            else:
+                self._responder(200, {"status": "ok"})
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+# Backend de scraping stub ---------------------------------------------
+
+def instalar_backend_stub(latencia_dia_ms: float, publicacoes_por_dia: int):
+    """Substitui o navegador por espera + extração real sobre o corpus"""
+    import estado
+    from real_dje_scraper import RealDJEScraper
+
+    paginas = {}
+    lock = threading.Lock()
+
+    def pagina_do_dia(data: datetime) -> str:
+        chave = data.date()
+        with lock:
+            if chave not in paginas:
+                paginas[chave] = gerar_pagina(gerar_publicacoes(publicacoes_por_dia, data), data)
+            return paginas[chave]
+
+    def dias(data_inicio: datetime, data_fim: datetime):
+        atual = data_inicio
+        while atual <= data_fim:
+            yield atual
+            atual += timedelta(days=1)
+
+    def buscar_por_data(self, data_inicio, data_fim):
+        publicacoes = []
+        for data in dias(data_inicio, data_fim):
+            time.sleep(latencia_dia_ms / 1000)
+            self.driver = DriverOffline(pagina_do_dia(data))
+            publicacoes.extend(self.extrair_publicacoes_pagina(data))
+        self.driver = None
+        return publicacoes
+
+    def buscar_por_data_personalizada(self, data_inicio, data_fim, termos=""):
+        self.definir_termos_busca(termos)
+        termos_busca = self.get_termos_busca()
+        progresso = estado.progresso_busca
+        progresso.update({
+            'ativa': True,
+            'total_dias': (data_fim - data_inicio).days + 1,
+            'dias_processados': 0,
+            'publicacoes_encontradas': 0,
+            'termos_buscados': termos,
+            'inicio': datetime.now().isoformat(),
+            'erro': None
+        })
+        publicacoes = []
+        for data in dias(data_inicio, data_fim):
+            progresso['data_atual'] = data.strftime('%d/%m/%Y')
+            time.sleep(latencia_dia_ms / 1000)
+            self.driver = DriverOffline(pagina_do_dia(data))
+            publicacoes.extend(self.extrair_publicacoes_pagina_personalizada(data, termos_busca))
+            progresso['dias_processados'] += 1
+            progresso['publicacoes_encontradas'] = len(publicacoes)
+        self.driver = None
+        progresso['ativa'] = False
+        return publicacoes
+
+    RealDJEScraper.buscar_por_data = buscar_por_data
+    RealDJEScraper.buscar_por_data_personalizada = buscar_por_data_personalizada
+
+
+def iniciar_app_local() -> Tuple[str, object]:
+    from werkzeug.serving import make_server
+    from servico import app
+
+    servidor = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_port}", servidor
+
+
+# Gerador de carga -----------------------------------------------------
+
+def requisicoes(dias: int) -> Dict[str, Tuple[str, str, Optional[dict]]]:
+    fim = datetime(2025, 6, 13)
+    inicio = fim - timedelta(days=dias - 1)
+    return {
+        "busca-personalizada": ("POST", "/busca-personalizada", {
+            "termos": "RPV, INSS",
+            "data_inicio": inicio.strftime("%Y-%m-%d"),
+            "data_fim": fim.strftime("%Y-%m-%d"),
+        }),
+        "run-real": ("POST", "/run-real", {"daysBack": min(dias, 7)}),
+        "progresso-busca": ("GET", "/progresso-busca", None),
+        "health": ("GET", "/health", None),
+        "status-real": ("GET", "/status-real", None),
+        "metrics": ("GET", "/metrics", None),
+    }
+
+
+def parse_mix(texto: str, disponiveis) -> List[Tuple[str, float]]:
+    mix = []
+    for item in texto.split(","):
+        nome, _, peso = item.strip().partition("=")
+        if nome not in disponiveis:
+            raise SystemExit(f"Endpoint desconhecido no mix: {nome} (disponíveis: {', '.join(disponiveis)})")
+        mix.append((nome, float(peso or 1)))
+    return mix
+
+
+class AmostradorProcesso(threading.Thread):
+    """Amostra threads e RSS do processo do serviço durante o teste"""
+
+    def __init__(self, pid: int, intervalo: float = 0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.intervalo = intervalo
+        self.local = pid == os.getpid()
+        self.threads: List[int] = []
+        self.rss_mb: List[float] = []
+        self._parar = threading.Event()
+
+    def _contar_threads(self) -> int:
+        if self.local:
+            return threading.active_count()
+        try:
+            return len(os.listdir(f"/proc/{self.pid}/task"))
+        except OSError:
+            return 0
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            self.threads.append(self._contar_threads())
+            self.rss_mb.append(medir_rss_arvore(self.pid) / (1024 * 1024))
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, max(0, int(round(p / 100 * len(valores))) - 1))
+    return valores[indice]
+
+
+def executar_carga(url: str, mix: List[Tuple[str, float]], concorrencia: int, duracao: float,
+                   total: int, timeout: float, dias: int) -> Dict[str, Dict]:
+    catalogo = requisicoes(dias)
+    nomes = [nome for nome, _ in mix]
+    pesos = [peso for _, peso in mix]
+    latencias = defaultdict(list)
+    erros = defaultdict(int)
+    lock = threading.Lock()
+    contador = {"enviadas": 0}
+    fim = time.monotonic() + duracao
+
+    def proxima() -> bool:
+        with lock:
+            if total and contador["enviadas"] >= total:
+                return False
+            if not total and time.monotonic() >= fim:
+                return False
+            contador["enviadas"] += 1
+            return True
+
+    def trabalhador(semente: int):
+        rng = random.Random(semente)
+        sessao = requests.Session()
+        while proxima():
+            nome = rng.choices(nomes, weights=pesos)[0]
+            metodo, caminho, corpo = catalogo[nome]
+            inicio = time.perf_counter()
+            falhou = False
+            try:
+                resposta = sessao.request(metodo, url + caminho, json=corpo, timeout=timeout)
+                falhou = resposta.status_code >= 500
+            except requests.RequestException:
+                falhou = True
+            duracao_req = time.perf_counter() - inicio
+            with lock:
+                latencias[nome].append(duracao_req)
+                if falhou:
+                    erros[nome] += 1
+
+    trabalhadores = [threading.Thread(target=trabalhador, args=(i,), daemon=True) for i in range(concorrencia)]
+    inicio = time.perf_counter()
+    for t in trabalhadores:
+        t.start()
+    for t in trabalhadores:
+        t.join()
+    decorrido = time.perf_counter() - inicio
+
+    resultados = {}
+    todas = []
+    for nome in nomes:
+        valores = sorted(latencias[nome])
+        todas.extend(valores)
+        resultados[nome] = _resumir(valores, erros[nome], decorrido)
+    resultados["total"] = _resumir(sorted(todas), sum(erros.values()), decorrido)
+    return resultados
+
+
+def _resumir(valores: List[float], erros: int, decorrido: float) -> Dict:
+    return {
+        "requisicoes": len(valores),
+        "erros": erros,
+        "taxa_erro": round(erros / len(valores), 4) if valores else 0,
+        "req_por_seg": round(len(valores) / decorrido, 2) if decorrido else 0,
+        "p50_ms": round(_percentil(valores, 50) * 1e3, 1),
+        "p95_ms": round(_percentil(valores, 95) * 1e3, 1),
+        "p99_ms": round(_percentil(valores, 99) * 1e3, 1),
+        "max_ms": round(valores[-1] * 1e3, 1) if valores else 0,
+    }
+
+
+def imprimir(resultado: Dict):
+    print(f"{'endpoint':<22} {'reqs':>6} {'erro%':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for nome, r in resultado["resultados"].items():
+        print(f"{nome:<22} {r['requisicoes']:>6} {r['taxa_erro'] * 100:>6.1f}% {r['req_por_seg']:>8} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+    processo = resultado["processo"]
+    print(f"\nThreads: máx {processo['threads_max']} (média {processo['threads_media']}) | "
+          f"RSS: pico {processo['rss_pico_mb']}MB (início {processo['rss_inicial_mb']}MB)")
+    if resultado.get("api_stub_recebidas") is not None:
+        print(f"Publicações recebidas pela API stub: {resultado['api_stub_recebidas']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga dos endpoints Flask do scraper")
+    parser.add_argument("--concorrencia", type=int, default=10, help="Clientes simultâneos")
+    parser.add_argument("--duracao", type=float, default=30, help="Duração em segundos (ignorado com --total)")
+    parser.add_argument("--total", type=int, default=0, help="Número total de requisições")
+    parser.add_argument("--mix", default=MIX_PADRAO, help=f"Pesos por endpoint (padrão: {MIX_PADRAO})")
+    parser.add_argument("--dias", type=int, default=3, help="Dias por busca personalizada / run-real")
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout por requisição (s)")
+    parser.add_argument("--latencia-dia-ms", type=float, default=500, help="Tempo simulado de navegador por dia")
+    parser.add_argument("--publicacoes-por-dia", type=int, default=10)
+    parser.add_argument("--api-latencia-ms", type=float, default=5, help="Latência da API stub por POST")
+    parser.add_argument("--url", default="", help="Usa um serviço já rodando em vez do app local")
+    parser.add_argument("--pid", type=int, default=0, help="PID do serviço externo para medir threads/RSS")
+    parser.add_argument("--verbose", action="store_true", help="Mantém os logs INFO do scraper")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    api_stub = None
+    if args.url:
+        url = args.url.rstrip("/")
+        pid = args.pid
+    else:
+        estado_api = EstadoApiStub(args.api_latencia_ms)
+        api_stub = criar_api_stub(estado_api)
+        os.environ["API_URL"] = f"http://127.0.0.1:{api_stub.server_port}"
+        instalar_backend_stub(args.latencia_dia_ms, args.publicacoes_por_dia)
+        url, _ = iniciar_app_local()
+        pid = os.getpid()
+
+    mix = parse_mix(args.mix, requisicoes(args.dias))
+    amostrador = AmostradorProcesso(pid) if pid else None
+    rss_inicial = medir_rss_arvore(pid) / (1024 * 1024) if pid else 0
+    if amostrador:
+        amostrador.start()
+
+    print(f"Carga em {url}: {args.concorrencia} clientes, "
+          f"{f'{args.total} requisições' if args.total else f'{args.duracao:.0f}s'}, mix {args.mix}\n")
+    resultados = executar_carga(url, mix, args.concorrencia, args.duracao, args.total, args.timeout, args.dias)
+
+    if amostrador:
+        amostrador.parar()
+    threads = amostrador.threads if amostrador and amostrador.threads else [0]
+    rss = amostrador.rss_mb if amostrador and amostrador.rss_mb else [0]
+
+    resultado = {
+        "meta": {
+            "data": datetime.now().isoformat(),
+            "commit": _commit_atual(),
+            "url": url,
+            "concorrencia": args.concorrencia,
+            "mix": args.mix,
+            "dias": args.dias,
+            "latencia_dia_ms": None if args.url else args.latencia_dia_ms,
+        },
+        "resultados": resultados,
+        "processo": {
+            "threads_max": max(threads),
+            "threads_media": round(sum(threads) / len(threads), 1),
+            "rss_inicial_mb": round(rss_inicial, 1),
+            "rss_pico_mb": round(max(rss), 1),
+        },
+        "api_stub_recebidas": estado_api.recebidas if api_stub else None,
+    }
+    imprimir(resultado)
+
+    os.makedirs(DIR_RESULTADOS, exist_ok=True)
+    arquivo = os.path.join(DIR_RESULTADOS, f"carga-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{resultado['meta']['commit']}.json")
+    with open(arquivo, "w") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultado salvo em {arquivo}")
+
+    if api_stub:
+        api_stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
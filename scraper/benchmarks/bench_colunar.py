@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Exportação Parquet de um ano de execuções diárias e agregação sobre o dataset
+
+Uso (a partir de scraper/):
+    python -m benchmarks.bench_colunar --dias 365 --por-dia 200
+
+Simula uma execução por dia (exportacao_colunar.exportar com as publicações
+do corpus sintético, datadas do dia) num diretório temporário e mede o tempo
+de escrita, o tamanho do dataset e uma agregação típica de análise: soma dos
+campos de valor por mês, lida só das colunas necessárias.
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from dataclasses import replace
+from datetime import timedelta
+
+from benchmarks.bench_extracao import DATA_CORPUS
+from benchmarks.bench_memoria import gerar_paginas, linhas_real
+
+
+def tamanho_diretorio(diretorio: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(raiz, nome))
+        for raiz, _, nomes in os.walk(diretorio)
+        for nome in nomes
+    )
+
+
+def agregar_por_mes(diretorio: str):
+    import pyarrow.compute as pc
+    import exportacao_colunar
+
+    dataset = exportacao_colunar.abrir(diretorio)
+    tabela = dataset.to_table(columns=["data", *exportacao_colunar.CAMPOS_VALOR])
+    tabela = tabela.append_column("mes", pc.strftime(tabela["data"], format="%Y-%m"))
+    return tabela.group_by("mes").aggregate(
+        [(campo, "sum") for campo in exportacao_colunar.CAMPOS_VALOR] + [("data", "count")]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportação Parquet e agregação por mês")
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--por-dia", type=int, default=200)
+    parser.add_argument("--diretorio", default="", help="Mantém o dataset neste diretório em vez de um temporário")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    import exportacao_colunar
+    from real_dje_scraper import PublicacaoReal
+
+    # Um dia do corpus extraído de verdade, repetido com a data de cada dia
+    modelo = [PublicacaoReal(**linha) for linha in linhas_real(gerar_paginas(1, args.por_dia))]
+    diretorio = args.diretorio or tempfile.mkdtemp(prefix="juscash-parquet-")
+
+    try:
+        inicio = time.perf_counter()
+        for dia in range(args.dias):
+            data = (DATA_CORPUS - timedelta(days=dia)).strftime("%Y-%m-%dT00:00:00.000Z")
+            exportacao_colunar.exportar([replace(p, dataDisponibilizacao=data) for p in modelo], diretorio)
+        escrita = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        meses = agregar_por_mes(diretorio)
+        agregacao = time.perf_counter() - inicio
+
+        resultado = {
+            "registros": len(modelo) * args.dias,
+            "escrita_s": round(escrita, 2),
+            "escrita_por_execucao_ms": round(escrita / max(1, args.dias) * 1e3, 1),
+            "tamanho_mb": round(tamanho_diretorio(diretorio) / 2 ** 20, 2),
+            "agregacao_mensal_s": round(agregacao, 3),
+            "meses": meses.num_rows,
+        }
+    finally:
+        if not args.diretorio:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+        return
+
+    print(f"Parquet: {resultado['registros']} registros em {args.dias} execuções diárias")
+    print(f"  escrita      {resultado['escrita_s']} s ({resultado['escrita_por_execucao_ms']} ms por execução)")
+    print(f"  tamanho      {resultado['tamanho_mb']} MB")
+    print(f"  soma mensal  {resultado['agregacao_mensal_s']} s ({resultado['meses']} meses)")
+
+
+if __name__ == "__main__":
+    main()
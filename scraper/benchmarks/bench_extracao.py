@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline das rotinas de parse e extração dos dois scrapers
+
+Uso (a partir de scraper/):
+    python -m benchmarks.bench_extracao                  # roda e salva em benchmarks/resultados/
+    python -m benchmarks.bench_extracao --save-baseline  # grava benchmarks/baseline.json
+    python -m benchmarks.bench_extracao --compare        # compara com o baseline (exit 1 se regrediu)
+
+Mede latência por chamada das funções extrair_* / extract_*, registros por
+segundo e pico de memória (tracemalloc) das funções de página para
+RealDJEScraper e DJEScraper. Nenhuma chamada de rede é feita.
+
+Com --pool 1,2,4 mede também a vazão do pool de extração (pool_extracao.py)
+com cada quantidade de processos, comparada com a extração na thread (0p).
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+DIR_SCRAPER = os.path.dirname(DIR_BENCH)
+DIR_DJE_SCRAPER = os.path.join(DIR_SCRAPER, "..", "backend", "src", "scraper")
+ARQUIVO_BASELINE = os.path.join(DIR_BENCH, "baseline.json")
+DIR_RESULTADOS = os.path.join(DIR_BENCH, "resultados")
+
+# O benchmark não deve tocar na API nem nos índices locais (deduplicação, textual, arquivo de páginas e caixa de saída)
+os.environ["DEDUP_INDEX_PATH"] = ""
+os.environ["INDICE_TEXTUAL_PATH"] = ""
+os.environ["ARQUIVO_PAGINAS_DIR"] = ""
+os.environ["CAIXA_SAIDA_PATH"] = ""
+sys.path.insert(0, DIR_SCRAPER)
+sys.path.insert(0, DIR_DJE_SCRAPER)
+
+from benchmarks.corpus import gerar_corpus, TAMANHOS_PAGINA  # noqa: E402
+
+DATA_CORPUS = datetime(2025, 6, 13)
+
+
+class DriverOffline:
+    """Substituto mínimo do WebDriver: serve uma página fixa, sem paginação"""
+
+    def __init__(self, html: str):
+        self.page_source = html
+        self.current_url = "https://dje.tjsp.jus.br/cdje/consultaSimples.do"
+
+    def get_cookies(self):
+        return []
+
+    def execute_script(self, script, *args):
+        return "complete"
+
+
+def _medir_chamadas(funcao: Callable, entradas: List, repeticoes: int) -> Dict[str, float]:
+    """Latência por chamada (µs) sobre todas as entradas, repetida N vezes"""
+    tempos = []
+    for _ in range(repeticoes):
+        for entrada in entradas:
+            inicio = time.perf_counter()
+            funcao(entrada)
+            tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    return {
+        "chamadas": len(tempos),
+        "media_us": round(statistics.fmean(tempos) * 1e6, 2),
+        "p50_us": round(tempos[len(tempos) // 2] * 1e6, 2),
+        "p95_us": round(tempos[int(len(tempos) * 0.95) - 1] * 1e6, 2),
+    }
+
+
+def _medir_pagina(funcao: Callable[[], List], repeticoes: int) -> Dict[str, float]:
+    """Tempo por página, registros/s e pico de memória de uma função de página"""
+    registros = len(funcao())  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    gc.collect()
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mediana = statistics.median(tempos)
+    return {
+        "registros": registros,
+        "media_ms": round(statistics.fmean(tempos) * 1e3, 3),
+        "p50_ms": round(mediana * 1e3, 3),
+        "registros_por_seg": round(registros / mediana, 1) if mediana > 0 else 0,
+        "pico_memoria_kb": round(pico / 1024, 1),
+    }
+
+
+def bench_real(paginas: Dict[str, str], textos: List[str], repeticoes: int) -> Dict[str, Dict]:
+    from real_dje_scraper import RealDJEScraper
+
+    scraper = RealDJEScraper(endpoint="benchmark")
+    resultados = {}
+
+    for nome in ("extrair_numero_processo", "extrair_autores", "extrair_advogados",
+                 "extrair_valores", "extrair_termos_encontrados"):
+        resultados[f"real.{nome}"] = _medir_chamadas(getattr(scraper, nome), textos, repeticoes)
+
+    termos = scraper.termos_padrao
+    for tamanho, html in paginas.items():
+        def extrair_pagina(html=html):
+            scraper.driver = DriverOffline(html)
+            return scraper.extrair_publicacoes_pagina(DATA_CORPUS)
+
+        def extrair_pagina_personalizada(html=html):
+            scraper.driver = DriverOffline(html)
+            return scraper.extrair_publicacoes_pagina_personalizada(DATA_CORPUS, termos)
+
+        resultados[f"real.extrair_publicacoes_pagina.{tamanho}"] = _medir_pagina(extrair_pagina, repeticoes)
+        resultados[f"real.extrair_publicacoes_pagina_personalizada.{tamanho}"] = _medir_pagina(extrair_pagina_personalizada, repeticoes)
+
+    scraper.driver = None
+    return resultados
+
+
+def bench_dje(paginas: Dict[str, str], textos: List[str], repeticoes: int) -> Dict[str, Dict]:
+    try:
+        from dje_scraper import DJEScraper
+    except ImportError as e:
+        logging.warning(f"DJEScraper indisponível ({e}); pulando")
+        return {}
+
+    scraper = DJEScraper({}, ["INSTITUTO NACIONAL DO SEGURO SOCIAL", "INSS"])
+    resultados = {}
+
+    for nome in ("extract_processo_number", "extract_monetary_values", "extract_advogados"):
+        resultados[f"dje.{nome}"] = _medir_chamadas(getattr(scraper, nome), textos, repeticoes)
+
+    for tamanho, html in paginas.items():
+        resultados[f"dje.parse_publicacao.{tamanho}"] = _medir_pagina(
+            lambda html=html: scraper.parse_publicacao(html, DATA_CORPUS), repeticoes
+        )
+    return resultados
+
+
+def bench_pool(paginas: Dict[str, str], processos: List[int], repeticoes: int) -> Dict[str, Dict]:
+    """Vazão da extração de páginas típicas na thread (0p) e no pool com N processos"""
+    import pool_extracao
+    from extracao import MODO_PADRAO, ExtratorCampos, extrair_registros
+    from real_dje_scraper import RealDJEScraper
+
+    termos_padrao = RealDJEScraper(endpoint="benchmark").termos_padrao
+    extrator = ExtratorCampos(termos_padrao)
+    lote = [paginas["typical"]] * max(8, 4 * max(processos))
+    registros = len(lote) * TAMANHOS_PAGINA["typical"]
+
+    def na_thread():
+        return [extrair_registros(html, MODO_PADRAO, DATA_CORPUS, [], extrator) for html in lote]
+
+    def no_pool():
+        return pool_extracao.extrair_paginas(lote, MODO_PADRAO, DATA_CORPUS, [], termos_padrao)
+
+    resultados = {}
+    for quantidade in [0] + processos:
+        funcao = na_thread
+        if quantidade:
+            os.environ["EXTRACAO_PROCESSOS"] = str(quantidade)
+            pool_extracao.encerrar()
+            funcao = no_pool
+        funcao()  # aquecimento (sobe os processos do pool)
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+        mediana = statistics.median(tempos)
+        resultados[f"pool.extrair_paginas.{quantidade}p"] = {
+            "registros": registros,
+            "media_ms": round(statistics.fmean(tempos) * 1e3, 3),
+            "p50_ms": round(mediana * 1e3, 3),
+            "registros_por_seg": round(registros / mediana, 1) if mediana > 0 else 0,
+            "pico_memoria_kb": 0,
+        }
+    pool_extracao.encerrar()
+    return resultados
+
+
+def _commit_atual() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=DIR_SCRAPER, text=True).strip()
+    except Exception:
+        return "desconhecido"
+
+
+def executar(repeticoes: int, filtro: str = "", processos_pool: List[int] = None) -> Dict:
+    paginas, textos = gerar_corpus(DATA_CORPUS)
+    resultados = {}
+    resultados.update(bench_real(paginas, textos, repeticoes))
+    resultados.update(bench_dje(paginas, textos, repeticoes))
+    if processos_pool:
+        resultados.update(bench_pool(paginas, processos_pool, repeticoes))
+    if filtro:
+        resultados = {k: v for k, v in resultados.items() if filtro in k}
+
+    return {
+        "meta": {
+            "data": datetime.now().isoformat(),
+            "commit": _commit_atual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "repeticoes": repeticoes,
+            "tamanhos_pagina": TAMANHOS_PAGINA,
+        },
+        "resultados": resultados,
+    }
+
+
+def _metrica_principal(valores: Dict) -> str:
+    return "p50_us" if "p50_us" in valores else "p50_ms"
+
+
+def comparar(atual: Dict, baseline: Dict, tolerancia: float) -> bool:
+    """Imprime a variação em relação ao baseline; retorna False se houve regressão"""
+    ok = True
+    print(f"\nComparação com baseline ({baseline['meta']['commit']}, {baseline['meta']['data'][:10]}):")
+    for nome, valores in atual["resultados"].items():
+        base = baseline["resultados"].get(nome)
+        if not base:
+            print(f"  {nome:<62} (novo)")
+            continue
+        metrica = _metrica_principal(valores)
+        antes, depois = base[metrica], valores[metrica]
+        variacao = (depois - antes) / antes * 100 if antes else 0
+        marca = ""
+        if variacao > tolerancia:
+            marca = "  <-- REGRESSÃO"
+            ok = False
+        print(f"  {nome:<62} {antes:>10} -> {depois:>10} {metrica} ({variacao:+.1f}%){marca}")
+        if "pico_memoria_kb" in valores and base.get("pico_memoria_kb"):
+            variacao_mem = (valores["pico_memoria_kb"] - base["pico_memoria_kb"]) / base["pico_memoria_kb"] * 100
+            if variacao_mem > tolerancia:
+                print(f"  {'':<62} pico de memória {base['pico_memoria_kb']} -> {valores['pico_memoria_kb']} KB ({variacao_mem:+.1f}%)  <-- REGRESSÃO")
+                ok = False
+    return ok
+
+
+def imprimir(resultado: Dict):
+    for nome, valores in resultado["resultados"].items():
+        if "p50_us" in valores:
+            print(f"  {nome:<62} p50 {valores['p50_us']:>9} µs  p95 {valores['p95_us']:>9} µs")
+        else:
+            print(
+                f"  {nome:<62} p50 {valores['p50_ms']:>9} ms  {valores['registros_por_seg']:>9} reg/s  "
+                f"{valores['registros']:>4} reg  pico {valores['pico_memoria_kb']:>8} KB"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de parse/extração do DJE")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições por medição (padrão: 5)")
+    parser.add_argument("--filtro", default="", help="Roda apenas medições cujo nome contém este texto")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava o resultado como baseline")
+    parser.add_argument("--compare", action="store_true", help="Compara com o baseline salvo")
+    parser.add_argument("--tolerancia", type=float, default=20.0, help="Variação %% aceita antes de acusar regressão")
+    parser.add_argument("--verbose", action="store_true", help="Mantém os logs INFO dos scrapers")
+    parser.add_argument("--pool", default="", help="Mede o pool de extração com N processos (ex.: 1,2,4)")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    processos_pool = [int(n) for n in args.pool.split(",") if n.strip()]
+    resultado = executar(args.repeticoes, args.filtro, processos_pool)
+    print(f"Benchmark de extração ({resultado['meta']['commit']}, Python {resultado['meta']['python']}):")
+    imprimir(resultado)
+
+    os.makedirs(DIR_RESULTADOS, exist_ok=True)
+    arquivo = os.path.join(DIR_RESULTADOS, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{resultado['meta']['commit']}.json")
+    with open(arquivo, "w") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultado salvo em {arquivo}")
+
+    if args.save_baseline:
+        with open(ARQUIVO_BASELINE, "w") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"Baseline atualizado: {ARQUIVO_BASELINE}")
+
+    if args.compare:
+        if not os.path.exists(ARQUIVO_BASELINE):
+            print("Nenhum baseline salvo; rode com --save-baseline primeiro")
+            sys.exit(2)
+        with open(ARQUIVO_BASELINE) as f:
+            baseline = json.load(f)
+        if not comparar(resultado, baseline, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Hedging do fetch_page (DJEScraper) contra o stand-in com cauda lenta
+
+Uso (a partir de scraper/):
+    python -m benchmarks.bench_hedge --requisicoes 400 --latencia-ms 80 --jitter-ms 40 \\
+        --cauda-ms 1500 --taxa-cauda 0.03 --orcamento 0.1
+
+Sobe o stand-in no próprio processo com uma fração --taxa-cauda das respostas
+atrasada em --cauda-ms e faz as mesmas --requisicoes consultas com o hedge
+desligado e ligado (--concorrencia simultâneas, sem intervalo de cortesia).
+Relata p50/p95/p99/máximo da latência vista por quem chama fetch_page, a taxa
+de hedge, quantas vezes a cópia venceu e a carga extra sobre o DJE.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timedelta
+
+from benchmarks.dje_standin import ConfigStandin, iniciar_em_segundo_plano
+
+DIR_SCRAPER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(DIR_SCRAPER, "..", "backend", "src", "scraper"))
+
+
+def _quantis(latencias):
+    ordenadas = sorted(latencias)
+    posicao = lambda q: ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))]
+    return {
+        "p50_ms": round(posicao(0.5) * 1000, 1),
+        "p95_ms": round(posicao(0.95) * 1000, 1),
+        "p99_ms": round(posicao(0.99) * 1000, 1),
+        "max_ms": round(ordenadas[-1] * 1000, 1),
+    }
+
+
+async def medir(url_base: str, args, hedge: bool):
+    from dje_scraper import DJEScraper
+
+    os.environ["DJE_BASE_URL"] = url_base
+    latencias = []
+    async with DJEScraper({}, ["INSS"]) as scraper:
+        scraper.request_interval = 0
+        scraper.hedge_enabled = hedge
+        scraper.hedge_budget = args.orcamento
+        fila = asyncio.Queue()
+        for i in range(args.requisicoes):
+            fila.put_nowait(datetime(2025, 6, 2) + timedelta(days=i % 60))
+
+        async def trabalhador():
+            while not fila.empty():
+                data = fila.get_nowait()
+                params = {"dadosConsulta.dtInicio": data.strftime("%d/%m/%Y"),
+                          "dadosConsulta.dtFim": data.strftime("%d/%m/%Y")}
+                inicio = time.perf_counter()
+                await scraper.fetch_page(scraper.search_url, params)
+                latencias.append(time.perf_counter() - inicio)
+
+        await asyncio.gather(*(trabalhador() for _ in range(args.concorrencia)))
+        resumo = scraper.hedge_summary()
+
+    emitidas = resumo["requests"] + resumo["hedged"] if hedge else len(latencias)
+    return {
+        **_quantis(latencias),
+        "requisicoes_ao_dje": emitidas,
+        "carga_extra": round(emitidas / len(latencias) - 1, 4),
+        "hedges": resumo["hedged"] if hedge else 0,
+        "taxa_hedge": resumo["hedge_rate"] if hedge else 0.0,
+        "hedge_venceu": resumo["hedge_won"] if hedge else 0,
+        "sem_orcamento": resumo["budget_exhausted"] if hedge else 0,
+    }
+
+
+async def executar(args):
+    config = ConfigStandin(latencia_ms=args.latencia_ms, jitter_ms=args.jitter_ms,
+                           cauda_ms=args.cauda_ms, taxa_cauda=args.taxa_cauda)
+    runner, url_base, _ = await iniciar_em_segundo_plano(config)
+    try:
+        sem_hedge = await medir(url_base, args, hedge=False)
+        com_hedge = await medir(url_base, args, hedge=True)
+    finally:
+        await runner.cleanup()
+    return {
+        "cenario": vars(args),
+        "sem_hedge": sem_hedge,
+        "com_hedge": com_hedge,
+        "melhora_p99": round(1 - com_hedge["p99_ms"] / sem_hedge["p99_ms"], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hedging do fetch_page contra uma cauda lenta")
+    parser.add_argument("--requisicoes", type=int, default=400)
+    parser.add_argument("--concorrencia", type=int, default=5)
+    parser.add_argument("--latencia-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--cauda-ms", type=float, default=1500)
+    parser.add_argument("--taxa-cauda", type=float, default=0.03)
+    parser.add_argument("--orcamento", type=float, default=0.1, help="Fração máxima de requisições com hedge")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    resultado = asyncio.run(executar(args))
+
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+        return
+
+    print(f"Cauda: {args.taxa_cauda:.0%} das respostas +{args.cauda_ms:g} ms; orçamento de hedge {args.orcamento:.0%}")
+    print(f"{'':12}{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}  {'hedges':>7}  {'cópia venceu':>12}  {'carga extra':>11}")
+    for nome in ("sem_hedge", "com_hedge"):
+        r = resultado[nome]
+        print(f"{nome:12}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}  "
+              f"{r['hedges']:>7}  {r['hedge_venceu']:>12}  {r['carga_extra']:>11.1%}")
+    print(f"Melhora no p99: {resultado['melhora_p99']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
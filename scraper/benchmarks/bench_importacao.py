@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tempo de importação e de subida do serviço do scraper
+
+Uso (a partir de scraper/):
+    python -m benchmarks.bench_importacao --repeticoes 7
+
+Cada medição roda em um interpretador novo (sem cache de módulos):
+- importação da camada HTTP (servico) e da pilha completa (real_dje_scraper)
+- tempo até o primeiro 200 em /health subindo o app com servico.py
+  (pilha carregada sob demanda) e com a pilha importada antes do Flask,
+  como era feito quando as rotas viviam em real_dje_scraper.py
+"""
+
+import os
+import sys
+import time
+import json
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from typing import Dict, List
+
+from benchmarks.bench_extracao import DIR_SCRAPER
+
+IMPORTACOES = {
+    "servico (camada HTTP)": "import servico",
+    "real_dje_scraper (pilha completa)": "import real_dje_scraper",
+    "servico + real_dje_scraper": "import real_dje_scraper, servico",
+}
+
+SUBIDAS = {
+    "sob demanda (servico.py)": "import servico",
+    "pilha antes do Flask": "import real_dje_scraper, servico",
+}
+
+
+def _ambiente() -> Dict[str, str]:
+    return dict(os.environ, DEDUP_INDEX_PATH="", INDICE_TEXTUAL_PATH="", ARQUIVO_PAGINAS_DIR="",
+                CAIXA_SAIDA_PATH="", AGENDA_CRON="", SCRAPER_PREWARM="false")
+
+
+def medir_importacao(codigo: str) -> float:
+    script = (
+        "import time, logging; logging.disable(logging.INFO); inicio = time.perf_counter()\n"
+        f"{codigo}\n"
+        "print(time.perf_counter() - inicio)"
+    )
+    saida = subprocess.check_output([sys.executable, "-c", script], cwd=DIR_SCRAPER, env=_ambiente(), text=True)
+    return float(saida.strip().splitlines()[-1])
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def medir_subida(codigo: str, timeout: float = 30) -> float:
+    """Segundos entre iniciar o interpretador e o primeiro 200 em /health"""
+    porta = _porta_livre()
+    script = (
+        "import logging; logging.disable(logging.INFO)\n"
+        f"{codigo}\n"
+        f"servico.app.run(host='127.0.0.1', port={porta})"
+    )
+    inicio = time.perf_counter()
+    processo = subprocess.Popen([sys.executable, "-c", script], cwd=DIR_SCRAPER, env=_ambiente(),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - inicio < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{porta}/health", timeout=1) as resposta:
+                    if resposta.status == 200:
+                        return time.perf_counter() - inicio
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"/health não respondeu em {timeout}s")
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def _resumir(tempos: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(statistics.median(tempos) * 1e3, 1),
+        "min_ms": round(min(tempos) * 1e3, 1),
+        "max_ms": round(max(tempos) * 1e3, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de importação e subida do serviço do scraper")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    resultado = {"importacao": {}, "subida_ate_health": {}}
+    for nome, codigo in IMPORTACOES.items():
+        medir_importacao(codigo)  # aquece o cache de disco/bytecode
+        resultado["importacao"][nome] = _resumir([medir_importacao(codigo) for _ in range(args.repeticoes)])
+    for nome, codigo in SUBIDAS.items():
+        resultado["subida_ate_health"][nome] = _resumir([medir_subida(codigo) for _ in range(args.repeticoes)])
+
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    for secao, titulo in (("importacao", "Importação"), ("subida_ate_health", "Subida até /health 200")):
+        print(f"{titulo}:")
+        for nome, valores in resultado[secao].items():
+            print(f"  {nome:<36} p50 {valores['p50_ms']:>8} ms  (min {valores['min_ms']}, max {valores['max_ms']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Memória por publicação guardada em lista, como num job /run-since-march
+
+Uso (a partir de scraper/):
+    python -m benchmarks.bench_memoria --dias 20 --por-dia 100
+
+Extrai as publicações do corpus sintético (um dia por página) e mede com
+tracemalloc os bytes retidos por registro com as classes atuais
+(PublicacaoReal e PublicacaoData: slots, campos internados, conteudo
+comprimido) e com dataclasses simples equivalentes às anteriores. Cada
+registro é montado a partir de uma cópia nova dos valores, como chegam da
+extração. Mede também o tempo de asdict() sobre a lista inteira.
+"""
+
+import gc
+import json
+import time
+import pickle
+import logging
+import argparse
+import tracemalloc
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.bench_extracao import DATA_CORPUS
+from benchmarks.corpus import gerar_pagina, gerar_publicacoes
+
+
+@dataclass
+class PublicacaoRealOriginal:
+    """PublicacaoReal antes dos slots e da compressão"""
+    numeroProcesso: str
+    dataDisponibilizacao: str
+    autores: str
+    advogados: str
+    conteudo: str
+    valorPrincipalBruto: Optional[float] = None
+    valorPrincipalLiquido: Optional[float] = None
+    valorJurosMoratorios: Optional[float] = None
+    honorariosAdvocaticios: Optional[float] = None
+    reu: str = "Instituto Nacional do Seguro Social - INSS"
+    termosEncontrados: Optional[str] = None
+    fonte: str = "DJE-TJSP-REAL"
+
+
+@dataclass
+class PublicacaoDataOriginal:
+    """PublicacaoData antes dos slots e da compressão"""
+    numero_processo: str
+    data_disponibilizacao: datetime
+    autores: str
+    advogados: Optional[str]
+    conteudo: str
+    valor_principal_bruto: Optional[Decimal]
+    valor_principal_liquido: Optional[Decimal]
+    valor_juros_moratorios: Optional[Decimal]
+    honorarios_advocaticios: Optional[Decimal]
+    termos_encontrados: str
+    fonte: str = ""
+
+
+def gerar_paginas(dias: int, por_dia: int) -> List[Tuple[datetime, str]]:
+    datas = [DATA_CORPUS - timedelta(days=i) for i in range(dias)]
+    return [(data, gerar_pagina(gerar_publicacoes(por_dia, data), data)) for data in datas]
+
+
+def linhas_real(paginas: List[Tuple[datetime, str]]) -> List[Dict]:
+    from extracao import CAMPOS_REGISTRO, MODO_PADRAO, ExtratorCampos, extrair_registros
+    from real_dje_scraper import RealDJEScraper
+
+    extrator = ExtratorCampos(RealDJEScraper(endpoint="benchmark").termos_padrao)
+    linhas = []
+    for data, html in paginas:
+        for _, _, registro in extrair_registros(html, MODO_PADRAO, data, [], extrator):
+            if registro is not None:
+                linhas.append(dict(zip(CAMPOS_REGISTRO, registro)))
+    return linhas
+
+
+def linhas_dje(paginas: List[Tuple[datetime, str]]) -> List[Dict]:
+    try:
+        from dje_scraper import DJEScraper, PUBLICACAO_FIELDS
+    except ImportError as e:
+        logging.warning(f"DJEScraper indisponível ({e}); pulando")
+        return []
+
+    scraper = DJEScraper({}, ["INSTITUTO NACIONAL DO SEGURO SOCIAL", "INSS"])
+    return [
+        {campo: getattr(publicacao, campo) for campo in PUBLICACAO_FIELDS}
+        for data, html in paginas
+        for publicacao in scraper.parse_publicacao(html, data)
+    ]
+
+
+def medir(classe: Callable, linhas: List[Dict]) -> Dict[str, float]:
+    """Bytes retidos por registro e tempo de asdict() da lista"""
+    copias = [pickle.dumps(linha) for linha in linhas]
+    gc.collect()
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    registros = [classe(**pickle.loads(copia)) for copia in copias]
+    gc.collect()
+    retido = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+
+    comeco = time.perf_counter()
+    for registro in registros:
+        asdict(registro)
+    duracao = time.perf_counter() - comeco
+
+    return {
+        "registros": len(registros),
+        "bytes_por_registro": round(retido / max(1, len(registros))),
+        "asdict_ms": round(duracao * 1e3, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória por publicação retida em lista")
+    parser.add_argument("--dias", type=int, default=20)
+    parser.add_argument("--por-dia", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    parser.add_argument("--verbose", action="store_true", help="Mantém os logs INFO dos scrapers")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    from real_dje_scraper import PublicacaoReal
+
+    paginas = gerar_paginas(args.dias, args.por_dia)
+    resultado = {}
+
+    linhas = linhas_real(paginas)
+    resultado["PublicacaoReal"] = {
+        "antes": medir(PublicacaoRealOriginal, linhas),
+        "depois": medir(PublicacaoReal, linhas),
+    }
+
+    linhas = linhas_dje(paginas)
+    if linhas:
+        from dje_scraper import PublicacaoData
+        resultado["PublicacaoData"] = {
+            "antes": medir(PublicacaoDataOriginal, linhas),
+            "depois": medir(PublicacaoData, linhas),
+        }
+
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Memória por registro ({args.dias} dias x {args.por_dia} publicações):")
+    for nome, medidas in resultado.items():
+        antes, depois = medidas["antes"], medidas["depois"]
+        reducao = 1 - depois["bytes_por_registro"] / max(1, antes["bytes_por_registro"])
+        print(f"  {nome:<16} {antes['registros']:>6} reg  antes {antes['bytes_por_registro']:>7} B  "
+              f"depois {depois['bytes_por_registro']:>7} B  (-{reducao:.0%})  "
+              f"asdict {antes['asdict_ms']} -> {depois['asdict_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
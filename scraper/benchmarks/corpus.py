@@ -0,0 +1,138 @@
+"""
+Corpus sintético de páginas de resultado e publicações do DJE-TJSP
+
+Gerado de forma determinística (semente fixa) para que execuções diferentes
+meçam exatamente a mesma entrada. Os textos seguem o formato das intimações
+do Caderno 3 (processo, classe, partes, valores, advogados com OAB).
+"""
+
+import random
+from datetime import datetime
+from typing import List
+
+TAMANHOS_PAGINA = {
+    "small": 5,
+    "typical": 50,
+    "large": 500,
+}
+
+CLASSES = [
+    "Procedimento do Juizado Especial Cível",
+    "Cumprimento de Sentença contra a Fazenda Pública",
+    "Procedimento Comum Cível",
+    "Requisição de Pequeno Valor",
+]
+ASSUNTOS = [
+    "Auxílio-Doença Previdenciário",
+    "Aposentadoria por Invalidez",
+    "Benefício Assistencial (Art. 203,V CF/88)",
+    "Pensão por Morte (Art. 74/9)",
+]
+NOMES = [
+    "Maria", "José", "Ana", "João", "Antonio", "Francisca", "Carlos", "Paulo",
+    "Adriana", "Lucas", "Juliana", "Marcos", "Fernanda", "Rafael", "Patricia",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+    "Pereira", "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho",
+]
+DESPACHOS = [
+    "Vistos. Homologo os cálculos apresentados pelo INSS.",
+    "Expeça-se Requisição de Pequeno Valor - RPV em favor da parte autora.",
+    "Fica a parte intimada do depósito referente ao pagamento pelo INSS.",
+    "Ciência às partes do retorno dos autos. Nada sendo requerido, arquivem-se.",
+]
+
+
+def _nome(rng: random.Random) -> str:
+    return f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+
+
+def _valor(rng: random.Random, minimo: int, maximo: int) -> str:
+    centavos = rng.randint(minimo * 100, maximo * 100)
+    inteiro = f"{centavos // 100:,}".replace(",", ".")
+    return f"{inteiro},{centavos % 100:02d}"
+
+
+def numero_processo(rng: random.Random, data: datetime) -> str:
+    return f"{rng.randint(0, 9999999):07d}-{rng.randint(10, 99)}.{data.year}.8.26.{rng.choice(['0053', '0100', '0224', '0405'])}"
+
+
+def gerar_publicacao(rng: random.Random, data: datetime) -> str:
+    """Texto de uma intimação no formato do DJE"""
+    autor = _nome(rng)
+    advogado = _nome(rng)
+    oab = rng.randint(10000, 499999)
+    partes = [
+        f"Processo {numero_processo(rng, data)} - {rng.choice(CLASSES)} - {rng.choice(ASSUNTOS)}",
+        f"- {autor.upper()} x Instituto Nacional do Seguro Social - INSS -",
+        rng.choice(DESPACHOS),
+        f"Valor principal bruto: R$ {_valor(rng, 1000, 60000)}.",
+    ]
+    if rng.random() < 0.7:
+        partes.append(f"Valor líquido: R$ {_valor(rng, 900, 55000)}.")
+    if rng.random() < 0.6:
+        partes.append(f"Juros moratórios de R$ {_valor(rng, 50, 5000)}.")
+    if rng.random() < 0.6:
+        partes.append(f"Honorários advocatícios: R$ {_valor(rng, 100, 6000)}.")
+    if rng.random() < 0.5:
+        partes.append(f"Autor: {autor}.")
+    partes.append(f"- ADV: Dr. {advogado} (OAB {oab}/SP), OAB/SP {oab + 7}")
+    # Parte dos textos reais é longa (sentenças transcritas)
+    if rng.random() < 0.2:
+        partes.append(" ".join(rng.choice(DESPACHOS) for _ in range(rng.randint(5, 30))))
+    return " ".join(partes)
+
+
+def gerar_publicacoes(quantidade: int, data: datetime, semente: int = 42) -> List[str]:
+    rng = random.Random(f"{semente}-{data.date().isoformat()}-{quantidade}")
+    return [gerar_publicacao(rng, data) for _ in range(quantidade)]
+
+
+def gerar_pagina(publicacoes: List[str], data: datetime, pagina: int = 1, total_paginas: int = 1,
+                 total_registros: int = None, por_pagina: int = None, link_pagina: str = None) -> str:
+    """
+    Página de resultado do cdje/index.do com as publicações informadas
+    link_pagina: modelo de URL com '{n}' para a barra de paginação
+    """
+    por_pagina = por_pagina or max(1, len(publicacoes))
+    total_registros = total_registros if total_registros is not None else len(publicacoes)
+    primeiro = (pagina - 1) * por_pagina + 1
+    ultimo = primeiro + len(publicacoes) - 1
+
+    linhas = []
+    for i, texto in enumerate(publicacoes):
+        classe = "fundocinza1" if i % 2 == 0 else "fundocinza2"
+        linhas.append(
+            f'<tr class="{classe}"><td class="ementaClass">'
+            f'<a href="#">Caderno 3 - Judicial - 1ª Instância - Capital - Parte I</a></td></tr>'
+            f'<tr class="{classe}"><td><div class="publicacao">{texto}</div></td></tr>'
+        )
+
+    barra = ""
+    if total_paginas > 1 and link_pagina:
+        links = " ".join(f'<a href="{link_pagina.format(n=n)}">{n}</a>' for n in range(1, total_paginas + 1) if n != pagina)
+        barra = f'<div class="paginacao">{links}</div>'
+
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>DJE - Diário da Justiça Eletrônico</title></head>
+<body>
+<div id="cabecalho"><h1>Tribunal de Justiça do Estado de São Paulo</h1></div>
+<form name="consultaSimplesForm" action="/cdje/consultaSimples.do" method="post">
+<input type="text" name="dtDiario" value="{data.strftime('%d/%m/%Y')}"/>
+<input type="submit" value="Consultar"/>
+</form>
+<div id="divResultadosInferior">Resultados {primeiro if publicacoes else 0} a {ultimo if publicacoes else 0} de {total_registros}</div>
+<table id="resultados">{''.join(linhas)}</table>
+{barra}
+<div id="rodape">Disponibilização: {data.strftime('%d/%m/%Y')}</div>
+</body></html>"""
+
+
+def gerar_corpus(data: datetime = datetime(2025, 6, 13)):
+    """Páginas de cada tamanho e os textos usados para as funções de campo"""
+    paginas = {}
+    for nome, quantidade in TAMANHOS_PAGINA.items():
+        paginas[nome] = gerar_pagina(gerar_publicacoes(quantidade, data), data)
+    textos = gerar_publicacoes(200, data, semente=7)
+    return paginas, textos
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita o DJE-TJSP para testes de carga e resiliência
+
+Uso (a partir de scraper/):
+    python -m benchmarks.dje_standin --porta 8089 --latencia-ms 300 --taxa-erro 0.05
+    DJE_BASE_URL=http://localhost:8089 python servico.py
+
+Serve o formulário de cdje/index.do (campo dtDiario + botão Consultar), a
+consulta simples paginada (consultaSimples.do) usada pelo RealDJEScraper e a
+consulta por parâmetros dadosConsulta.* usada pelo DJEScraper. As publicações
+vêm do corpus sintético (benchmarks/corpus.py), estáveis por data.
+
+Comportamentos configuráveis: latência com jitter, cauda lenta (uma fração das
+respostas com atraso extra), taxa de erro 500, rajadas
+periódicas de 429/503 e proteção anti-bot que rejeita o preenchimento do dtDiario.
+GET /__stats mostra contadores; POST /__config altera a configuração em execução.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import argparse
+from collections import Counter
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime
+from typing import Optional
+
+from aiohttp import web
+
+from benchmarks.corpus import gerar_pagina, gerar_publicacoes
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConfigStandin:
+    latencia_ms: float = 0
+    jitter_ms: float = 0
+    cauda_ms: float = 0
+    taxa_cauda: float = 0.0
+    taxa_erro: float = 0.0
+    rajada_intervalo_s: float = 0
+    rajada_duracao_s: float = 0
+    rajada_status: int = 503
+    anti_bot: str = "off"  # off | input | apos:N (ativa depois de N consultas)
+    publicacoes_por_dia: int = 40
+    por_pagina: int = 10
+    paginacao: str = "url"  # url | js
+    semente: int = 42
+
+
+class DJEStandin:
+    def __init__(self, config: ConfigStandin):
+        self.config = config
+        self.inicio = time.monotonic()
+        self.contadores = Counter()
+        self.consultas = 0
+
+    # Comportamentos ----------------------------------------------------
+
+    async def _latencia(self):
+        atraso = self.config.latencia_ms + random.uniform(0, self.config.jitter_ms)
+        if self.config.taxa_cauda and random.random() < self.config.taxa_cauda:
+            atraso += self.config.cauda_ms
+        if atraso > 0:
+            await asyncio.sleep(atraso / 1000)
+
+    def _em_rajada(self) -> bool:
+        if self.config.rajada_intervalo_s <= 0 or self.config.rajada_duracao_s <= 0:
+            return False
+        decorrido = (time.monotonic() - self.inicio) % self.config.rajada_intervalo_s
+        return decorrido < self.config.rajada_duracao_s
+
+    def _anti_bot_ativo(self) -> bool:
+        modo = self.config.anti_bot
+        if modo == "input":
+            return True
+        if modo.startswith("apos:"):
+            return self.consultas >= int(modo.split(":", 1)[1])
+        return False
+
+    def _falha(self) -> Optional[web.Response]:
+        if self._em_rajada():
+            status = self.config.rajada_status
+            texto = "Too Many Requests" if status == 429 else "Service Unavailable - erro 503"
+            return web.Response(status=status, text=f"<html><body><h1>{texto}</h1></body></html>",
+                                content_type="text/html", headers={"Retry-After": "5"})
+        if self.config.taxa_erro > 0 and random.random() < self.config.taxa_erro:
+            return web.Response(status=500, text="<html><body><h1>Erro interno</h1></body></html>", content_type="text/html")
+        return None
+
+    def _responder(self, resposta: web.Response) -> web.Response:
+        self.contadores[resposta.status] += 1
+        return resposta
+
+    # Páginas -----------------------------------------------------------
+
+    def _formulario(self) -> str:
+        if self._anti_bot_ativo():
+            campo = (
+                '<input type="text" name="dtDiario" value="" readonly="readonly" '
+                'oninput="this.value=\'\'" onchange="this.value=\'\'"/>'
+                '<script>setInterval(function(){document.getElementsByName("dtDiario")[0].value="";}, 50);</script>'
+            )
+        else:
+            campo = '<input type="text" name="dtDiario" value=""/>'
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>DJE - Diário da Justiça Eletrônico</title></head>
+<body>
+<div id="cabecalho"><h1>Tribunal de Justiça do Estado de São Paulo</h1></div>
+<form name="consultaSimplesForm" action="/cdje/consultaSimples.do" method="get">
+{campo}
+<input type="submit" value="Consultar"/>
+</form>
+</body></html>"""
+
+    def _publicacoes_do_dia(self, data: datetime):
+        # Fins de semana não têm disponibilização
+        if data.weekday() >= 5:
+            return []
+        rng = random.Random(f"{self.config.semente}-{data.date().isoformat()}")
+        quantidade = max(0, int(rng.gauss(self.config.publicacoes_por_dia, self.config.publicacoes_por_dia * 0.3)))
+        return gerar_publicacoes(quantidade, data, semente=self.config.semente)
+
+    def _resultado(self, data: datetime, pagina: int) -> str:
+        publicacoes = self._publicacoes_do_dia(data)
+        por_pagina = max(1, self.config.por_pagina)
+        total_paginas = max(1, -(-len(publicacoes) // por_pagina))
+        pagina = min(max(1, pagina), total_paginas)
+        trecho = publicacoes[(pagina - 1) * por_pagina:pagina * por_pagina]
+
+        base = f"/cdje/consultaSimples.do?dtDiario={data.strftime('%d/%m/%Y')}"
+        if self.config.paginacao == "js":
+            html = gerar_pagina(trecho, data, pagina, total_paginas, len(publicacoes), por_pagina,
+                                link_pagina="javascript:trocaDePg({n});")
+            script = f"<script>function trocaDePg(n){{location.href='{base}&pagina='+n;}}</script>"
+            return html.replace("</body>", f"{script}</body>")
+        return gerar_pagina(trecho, data, pagina, total_paginas, len(publicacoes), por_pagina,
+                            link_pagina=f"{base}&pagina={{n}}")
+
+    # Handlers ----------------------------------------------------------
+
+    async def index(self, request: web.Request) -> web.Response:
+        await self._latencia()
+        falha = self._falha()
+        if falha:
+            return self._responder(falha)
+
+        # Consulta direta por parâmetros (DJEScraper)
+        dt_inicio = request.query.get("dadosConsulta.dtInicio")
+        if dt_inicio:
+            return await self._consulta(dt_inicio, 1)
+
+        return self._responder(web.Response(text=self._formulario(), content_type="text/html"))
+
+    async def consulta_simples(self, request: web.Request) -> web.Response:
+        await self._latencia()
+        falha = self._falha()
+        if falha:
+            return self._responder(falha)
+
+        dt_diario = request.query.get("dtDiario", "")
+        pagina = int(request.query.get("pagina", "1") or 1)
+        return await self._consulta(dt_diario, pagina)
+
+    async def _consulta(self, data_str: str, pagina: int) -> web.Response:
+        self.consultas += 1
+        if self._anti_bot_ativo() and pagina == 1:
+            # O formulário bloqueado não envia a data; a consulta volta sem resultados
+            data_str = ""
+        try:
+            data = datetime.strptime(data_str, "%d/%m/%Y")
+        except ValueError:
+            return self._responder(web.Response(text=self._formulario(), content_type="text/html"))
+        return self._responder(web.Response(text=self._resultado(data, pagina), content_type="text/html"))
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "consultas": self.consultas,
+            "respostas_por_status": {str(k): v for k, v in self.contadores.items()},
+            "em_rajada": self._em_rajada(),
+            "anti_bot_ativo": self._anti_bot_ativo(),
+            "config": asdict(self.config),
+        })
+
+    async def atualizar_config(self, request: web.Request) -> web.Response:
+        dados = await request.json()
+        tipos = {campo.name: campo.type for campo in fields(ConfigStandin)}
+        for chave, valor in dados.items():
+            if chave in tipos:
+                setattr(self.config, chave, type(getattr(self.config, chave))(valor))
+        return web.json_response(asdict(self.config))
+
+    def criar_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/cdje/index.do", self.index)
+        app.router.add_get("/cdje/consultaSimples.do", self.consulta_simples)
+        app.router.add_get("/", self.index)
+        app.router.add_get("/__stats", self.stats)
+        app.router.add_post("/__config", self.atualizar_config)
+        return app
+
+
+async def iniciar_em_segundo_plano(config: ConfigStandin, porta: int = 0, host: str = "127.0.0.1"):
+    """Sobe o stand-in no loop atual; retorna (runner, url_base, standin)"""
+    standin = DJEStandin(config)
+    runner = web.AppRunner(standin.criar_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, porta)
+    await site.start()
+    porta_real = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{porta_real}", standin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in local do DJE-TJSP")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=8089)
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--cauda-ms", type=float, default=0, help="Atraso extra das respostas da cauda")
+    parser.add_argument("--taxa-cauda", type=float, default=0.0, help="Fração de respostas com o atraso da cauda (0-1)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas 500 (0-1)")
+    parser.add_argument("--rajada-intervalo", type=float, default=0, help="A cada N segundos inicia uma rajada de erros")
+    parser.add_argument("--rajada-duracao", type=float, default=0, help="Duração da rajada em segundos")
+    parser.add_argument("--rajada-status", type=int, default=503, choices=[429, 503])
+    parser.add_argument("--anti-bot", default="off", help="off | input | apos:N")
+    parser.add_argument("--publicacoes-por-dia", type=int, default=40)
+    parser.add_argument("--por-pagina", type=int, default=10)
+    parser.add_argument("--paginacao", default="url", choices=["url", "js"])
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = ConfigStandin(
+        latencia_ms=args.latencia_ms,
+        jitter_ms=args.jitter_ms,
+        cauda_ms=args.cauda_ms,
+        taxa_cauda=args.taxa_cauda,
+        taxa_erro=args.taxa_erro,
+        rajada_intervalo_s=args.rajada_intervalo,
+        rajada_duracao_s=args.rajada_duracao,
+        rajada_status=args.rajada_status,
+        anti_bot=args.anti_bot,
+        publicacoes_por_dia=args.publicacoes_por_dia,
+        por_pagina=args.por_pagina,
+        paginacao=args.paginacao,
+        semente=args.semente,
+    )
+    logger.info(f"Stand-in do DJE em http://{args.host}:{args.porta}/cdje/index.do - {asdict(config)}")
+    web.run_app(DJEStandin(config).criar_app(), host=args.host, port=args.porta, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Monitoramento de memória do navegador usado pelo RealDJEScraper
+
+Lê o RSS da árvore de processos do chromedriver/Chromium direto do /proc
+e decide quando o driver precisa ser reciclado (orçamento de memória ou de
+páginas carregadas).
+"""
+
+import os
+import signal
+import logging
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+PROC_DIR = "/proc"
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+def _ler_ppid(pid: int) -> Optional[int]:
+    try:
+        with open(f"{PROC_DIR}/{pid}/stat", "r") as f:
+            conteudo = f.read()
+    except OSError:
+        return None
+    # O nome do processo pode conter espaços e parênteses: o ppid vem logo após o último ')'
+    campos = conteudo[conteudo.rfind(")") + 2:].split()
+    try:
+        return int(campos[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _ler_rss_bytes(pid: int) -> int:
+    try:
+        with open(f"{PROC_DIR}/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def listar_arvore_processos(pid_raiz: int) -> List[int]:
+    """Retorna o pid raiz e todos os seus descendentes"""
+    filhos: Dict[int, List[int]] = {}
+    try:
+        entradas = os.listdir(PROC_DIR)
+    except OSError:
+        return []
+
+    for entrada in entradas:
+        if not entrada.isdigit():
+            continue
+        pid = int(entrada)
+        ppid = _ler_ppid(pid)
+        if ppid is not None:
+            filhos.setdefault(ppid, []).append(pid)
+
+    arvore = []
+    pendentes = [pid_raiz]
+    while pendentes:
+        pid = pendentes.pop()
+        arvore.append(pid)
+        pendentes.extend(filhos.get(pid, []))
+    return arvore
+
+
+def medir_rss_arvore(pid_raiz: int) -> int:
+    """Soma o RSS (em bytes) de toda a árvore de processos a partir de pid_raiz"""
+    return sum(_ler_rss_bytes(pid) for pid in listar_arvore_processos(pid_raiz))
+
+
+def pid_do_driver(driver) -> Optional[int]:
+    """Pid do processo chromedriver, raiz da árvore do navegador"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def encerrar_arvore_processos(pid_raiz: int) -> int:
+    """SIGKILL no chromedriver e em todo o Chromium abaixo dele; devolve quantos processos foram sinalizados"""
+    # A árvore é lida antes: morto o pai, os filhos seriam reparentados e sairiam dela
+    encerrados = 0
+    for pid in reversed(listar_arvore_processos(pid_raiz)):
+        try:
+            os.kill(pid, signal.SIGKILL)
+            encerrados += 1
+        except OSError:
+            pass
+    return encerrados
+
+
+class MonitorMemoriaNavegador:
+    """
+    Amostra o RSS do navegador a cada data processada e sinaliza reciclagem
+    quando o orçamento de memória ou de páginas do driver atual é excedido
+    """
+
+    def __init__(self, max_rss_mb: Optional[int] = None, max_paginas: Optional[int] = None):
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else int(os.getenv("BROWSER_MAX_RSS_MB", "1024"))
+        self.max_paginas = max_paginas if max_paginas is not None else int(os.getenv("BROWSER_MAX_PAGINAS", "150"))
+        self.novo_driver()
+        self.iniciar()
+
+    def iniciar(self):
+        """
+        Zera as estatísticas para uma nova execução
+        O orçamento de páginas é do driver: com o navegador mantido entre execuções, continua contando
+        """
+        self.amostras = 0
+        self.soma_rss = 0
+        self.pico_rss = 0
+        self.reciclagens = 0
+
+    def novo_driver(self):
+        """Zera o orçamento ao subir um navegador novo"""
+        self.paginas_driver = 0
+        self.ultimo_rss = 0
+
+    def registrar_pagina(self, quantidade: int = 1):
+        self.paginas_driver += quantidade
+
+    def amostrar(self, driver) -> int:
+        """Mede o RSS atual da árvore do navegador e atualiza pico/média"""
+        pid = pid_do_driver(driver) if driver else None
+        if not pid:
+            return 0
+
+        rss = medir_rss_arvore(pid)
+        if rss:
+            self.amostras += 1
+            self.soma_rss += rss
+            self.pico_rss = max(self.pico_rss, rss)
+            self.ultimo_rss = rss
+        return rss
+
+    def motivo_reciclagem(self) -> Optional[str]:
+        """Motivo para reciclar o driver, ou None se ainda dentro do orçamento"""
+        if self.max_rss_mb > 0 and self.ultimo_rss > self.max_rss_mb * 1024 * 1024:
+            return f"RSS {self.ultimo_rss / (1024 * 1024):.0f}MB acima do limite de {self.max_rss_mb}MB"
+        if self.max_paginas > 0 and self.paginas_driver >= self.max_paginas:
+            return f"{self.paginas_driver} páginas carregadas (limite {self.max_paginas})"
+        return None
+
+    def registrar_reciclagem(self):
+        self.reciclagens += 1
+        self.novo_driver()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        mb = 1024 * 1024
+        return {
+            "rss_pico_mb": round(self.pico_rss / mb, 1),
+            "rss_medio_mb": round(self.soma_rss / self.amostras / mb, 1) if self.amostras else 0,
+            "amostras": self.amostras,
+            "reciclagens": self.reciclagens,
+            "limite_rss_mb": self.max_rss_mb,
+            "limite_paginas": self.max_paginas
+        }
@@ -0,0 +1,125 @@
+"""
+Cache em memória dos resultados da busca personalizada, por termos e data
+
+Cada entrada guarda as publicações de uma data para um conjunto de termos,
+então períodos que se sobrepõem reaproveitam os dias já buscados. A remoção
+é LRU pelo tamanho estimado das publicações (BUSCA_CACHE_MB). Datas passadas
+não expiram; a data de hoje (e futuras, ainda sem diário completo) expira
+após BUSCA_CACHE_TTL_HOJE_S segundos.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metricas import CACHE_BUSCAS_BYTES, CACHE_BUSCAS_CONSULTAS
+
+logger = logging.getLogger(__name__)
+
+Chave = Tuple[Tuple[str, ...], str]
+
+
+def normalizar_termos(termos: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Termos sem espaços sobrando e sem repetição (ignorando maiúsculas)
+    Ordem e grafia do primeiro de cada termo são mantidas: termosEncontrados
+    informa o primeiro termo pedido que aparece no texto, como foi digitado
+    """
+    vistos = set()
+    normalizados = []
+    for termo in termos:
+        termo = " ".join(termo.split())
+        if termo and termo.casefold() not in vistos:
+            vistos.add(termo.casefold())
+            normalizados.append(termo)
+    return tuple(normalizados)
+
+
+class CacheBuscas:
+    """LRU de publicações por (termos, data) limitado pelo tamanho estimado em bytes"""
+
+    def __init__(self, max_bytes: int, ttl_hoje: float):
+        self.max_bytes = max_bytes
+        self.ttl_hoje = ttl_hoje
+        self.lock = threading.Lock()
+        self.itens: "OrderedDict[Chave, Tuple[List, int, Optional[float]]]" = OrderedDict()
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+        self.remocoes = 0
+
+    def _chave(self, termos: Iterable[str], data) -> Chave:
+        dia = data.date() if isinstance(data, datetime) else data
+        return normalizar_termos(termos), dia.isoformat()
+
+    def obter(self, termos: Iterable[str], data) -> Optional[List]:
+        chave = self._chave(termos, data)
+        with self.lock:
+            item = self.itens.get(chave)
+            if item is not None and item[2] is not None and item[2] <= time.monotonic():
+                self._remover(chave)
+                item = None
+            if item is None:
+                self.faltas += 1
+                CACHE_BUSCAS_CONSULTAS.labels("miss").inc()
+                return None
+            self.itens.move_to_end(chave)
+            self.acertos += 1
+        CACHE_BUSCAS_CONSULTAS.labels("hit").inc()
+        return list(item[0])
+
+    def guardar(self, termos: Iterable[str], data, publicacoes: List):
+        chave = self._chave(termos, data)
+        tamanho = sum(publicacao.tamanho_em_memoria() for publicacao in publicacoes) + 64 * (len(publicacoes) + 1)
+        if tamanho > self.max_bytes:
+            return
+        expira_em = time.monotonic() + self.ttl_hoje if chave[1] >= date.today().isoformat() else None
+
+        with self.lock:
+            if chave in self.itens:
+                self._remover(chave)
+            self.itens[chave] = (list(publicacoes), tamanho, expira_em)
+            self.bytes += tamanho
+            while self.bytes > self.max_bytes:
+                self._remover(next(iter(self.itens)))
+                self.remocoes += 1
+            CACHE_BUSCAS_BYTES.set(self.bytes)
+
+    def _remover(self, chave: Chave):
+        _, tamanho, _ = self.itens.pop(chave)
+        self.bytes -= tamanho
+        CACHE_BUSCAS_BYTES.set(self.bytes)
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "entradas": len(self.itens),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "remocoes": self.remocoes,
+            }
+
+
+_cache_global: Optional[CacheBuscas] = None
+_cache_lock = threading.Lock()
+
+
+def obter_cache() -> Optional[CacheBuscas]:
+    """Cache compartilhado pelo processo; None se BUSCA_CACHE_MB for 0"""
+    global _cache_global
+
+    with _cache_lock:
+        if _cache_global is None:
+            max_mb = float(os.getenv("BUSCA_CACHE_MB", "64"))
+            if max_mb <= 0:
+                return None
+            ttl_hoje = float(os.getenv("BUSCA_CACHE_TTL_HOJE_S", "300"))
+            _cache_global = CacheBuscas(int(max_mb * 2 ** 20), ttl_hoje)
+            logger.info(f"Cache da busca personalizada: até {max_mb:g} MB, TTL de {ttl_hoje:g}s para hoje")
+        return _cache_global
@@ -0,0 +1,303 @@
+"""
+Caixa de saída persistente das publicações destinadas à API
+
+Toda publicação extraída é gravada em SQLite antes de qualquer envio; uma
+thread em segundo plano esvazia a caixa em lotes (POST /api/publicacoes/lote)
+e só apaga o que a API confirmou. Com a API lenta ou fora do ar o scraping
+segue no ritmo do DJE, o esvaziador espera com backoff exponencial e nada se
+perde num reinício: o que ficou na caixa é enviado quando o serviço volta.
+O envio é idempotente pelo número do processo (a API ignora repetidos).
+Os lotes saem por prioridade (prioridade.py): publicações de buscas
+interativas e com termos prioritários passam à frente do backlog.
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from dedup_index import obter_indice
+from estado import DIRETORIO_DADOS
+from metricas import CAIXA_SAIDA_ENTREGAS, CAIXA_SAIDA_PENDENTES
+
+logger = logging.getLogger(__name__)
+
+PENDENTE = "pendente"
+# Recusada pela validação da API; fica guardada para inspeção e só volta se for enfileirada de novo
+REJEITADA = "rejeitada"
+
+
+class CaixaSaida:
+    """Fila SQLite de publicações por número de processo, esvaziada por uma thread"""
+
+    def __init__(self, caminho: str, api_url: str, indice=None, tamanho_lote: int = 100,
+                 backoff_inicial: float = 1.0, backoff_max: float = 300.0):
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self.caminho = caminho
+        self.api_url = api_url
+        self.indice = indice
+        self.tamanho_lote = tamanho_lote
+        self.backoff_inicial = backoff_inicial
+        self.backoff_max = backoff_max
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pendentes (
+                numero_processo TEXT PRIMARY KEY,
+                corpo TEXT NOT NULL,
+                estado TEXT NOT NULL DEFAULT 'pendente',
+                prioridade INTEGER NOT NULL DEFAULT 0,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                ultimo_erro TEXT,
+                criado_em TEXT NOT NULL,
+                versao INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        colunas = {linha[1] for linha in self.conn.execute("PRAGMA table_info(pendentes)")}
+        if "prioridade" not in colunas:
+            self.conn.execute("ALTER TABLE pendentes ADD COLUMN prioridade INTEGER NOT NULL DEFAULT 0")
+        if "versao" not in colunas:
+            self.conn.execute("ALTER TABLE pendentes ADD COLUMN versao INTEGER NOT NULL DEFAULT 0")
+        self.conn.execute("DROP INDEX IF EXISTS pendentes_estado")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS pendentes_prioridade ON pendentes (estado, prioridade DESC, criado_em)"
+        )
+        self.conn.commit()
+
+        # Conexão mantida entre lotes; usada só pela thread do esvaziador
+        self.sessao = requests.Session()
+        self.sinal = threading.Event()
+        self.encerrar = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.falhas_seguidas = 0
+        self.entregues = 0
+
+        pendentes = self._contar(PENDENTE)
+        CAIXA_SAIDA_PENDENTES.set(pendentes)
+        logger.info(f"Caixa de saída carregada: {pendentes} publicação(ões) pendente(s) ({caminho})")
+
+    def enfileirar(self, publicacao: Dict, prioridade: int = 0) -> bool:
+        """
+        Grava a publicação (corpo do POST) na caixa; False se o processo já estava pendente nela
+        Se já estava, o corpo é atualizado e a prioridade, se menor, elevada (busca interativa
+        pedindo algo do backlog); uma rejeitada volta a pendente com o corpo novo
+        """
+        numero = publicacao["numeroProcesso"]
+        corpo = json.dumps(publicacao, ensure_ascii=False)
+        with self.lock, self.conn:
+            linha = self.conn.execute("SELECT estado FROM pendentes WHERE numero_processo = ?", (numero,)).fetchone()
+            if linha is None:
+                self.conn.execute(
+                    "INSERT INTO pendentes (numero_processo, corpo, prioridade, criado_em) VALUES (?, ?, ?, ?)",
+                    (numero, corpo, prioridade, datetime.now().isoformat()),
+                )
+            elif linha[0] == REJEITADA:
+                # Reextraída (extrator corrigido): nova chance de passar na validação da API
+                self.conn.execute(
+                    "UPDATE pendentes SET corpo = ?, estado = ?, prioridade = MAX(prioridade, ?), "
+                    "tentativas = 0, ultimo_erro = NULL, versao = versao + 1 WHERE numero_processo = ?",
+                    (corpo, PENDENTE, prioridade, numero),
+                )
+            else:
+                self.conn.execute(
+                    "UPDATE pendentes SET corpo = ?, prioridade = MAX(prioridade, ?), versao = versao + 1 "
+                    "WHERE numero_processo = ?",
+                    (corpo, prioridade, numero),
+                )
+            nova = linha is None or linha[0] == REJEITADA
+        if nova:
+            CAIXA_SAIDA_PENDENTES.inc()
+            self.sinal.set()
+        return nova
+
+    def _contar(self, estado: str) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pendentes WHERE estado = ?", (estado,)).fetchone()[0]
+
+    def _proximo_lote(self) -> List[Tuple[str, str, int]]:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT numero_processo, corpo, versao FROM pendentes WHERE estado = ? "
+                "ORDER BY prioridade DESC, criado_em LIMIT ?",
+                (PENDENTE, self.tamanho_lote),
+            ).fetchall()
+
+    def _concluir(self, lote: List[Tuple[str, str, int]], rejeitadas: Dict[str, str]):
+        """
+        Apaga as entregues e marca as rejeitadas do lote
+        Só mexe na linha se a versão ainda for a enviada: um corpo regravado por enfileirar
+        durante o envio continua pendente e sai no próximo lote
+        """
+        entregues = [numero for numero, _, _ in lote if numero not in rejeitadas]
+        with self.lock, self.conn:
+            apagadas = self.conn.executemany(
+                "DELETE FROM pendentes WHERE numero_processo = ? AND versao = ?",
+                [(numero, versao) for numero, _, versao in lote if numero not in rejeitadas],
+            ).rowcount
+            marcadas = self.conn.executemany(
+                "UPDATE pendentes SET estado = ?, ultimo_erro = ? WHERE numero_processo = ? AND versao = ?",
+                [(REJEITADA, rejeitadas[numero], numero, versao) for numero, _, versao in lote if numero in rejeitadas],
+            ).rowcount
+        CAIXA_SAIDA_PENDENTES.dec(apagadas + marcadas)
+        CAIXA_SAIDA_ENTREGAS.labels("entregue").inc(len(entregues))
+        CAIXA_SAIDA_ENTREGAS.labels("rejeitada").inc(len(rejeitadas))
+        self.entregues += len(entregues)
+
+        if self.indice and entregues:
+            try:
+                self.indice.adicionar_varios(entregues)
+            except Exception as e:
+                logger.warning(f"Erro ao atualizar índice de deduplicação: {e}")
+
+    def _registrar_falha(self, numeros: List[str], erro: str):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE pendentes SET tentativas = tentativas + 1, ultimo_erro = ? WHERE numero_processo = ?",
+                [(erro, numero) for numero in numeros],
+            )
+        CAIXA_SAIDA_ENTREGAS.labels("falha").inc(len(numeros))
+
+    def enviar_lote(self, lote: List[Tuple[str, str, int]]) -> bool:
+        """Envia um lote; True se a API respondeu sobre todas as publicações dele"""
+        numeros = [numero for numero, _, _ in lote]
+        corpo = '{"publicacoes": [' + ", ".join(publicacao for _, publicacao, _ in lote) + "]}"
+        try:
+            response = self.sessao.post(
+                f"{self.api_url}/api/publicacoes/lote",
+                data=corpo.encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                timeout=30,
+            )
+        except requests.RequestException as e:
+            self._registrar_falha(numeros, str(e))
+            logger.warning(f"Caixa de saída: API indisponível ({e})")
+            return False
+
+        if response.status_code == 413 and len(lote) > 1:
+            # Lote maior que o limite de corpo da API: divide e tenta de novo sem backoff
+            self.tamanho_lote = max(1, len(lote) // 2)
+            logger.warning(f"Caixa de saída: lote grande demais, reduzido para {self.tamanho_lote}")
+            return True
+        if response.status_code != 200:
+            erro = f"HTTP {response.status_code}: {response.text[:200]}"
+            self._registrar_falha(numeros, erro)
+            logger.warning(f"Caixa de saída: {erro}")
+            return False
+
+        try:
+            dados = response.json().get("data", {})
+        except ValueError:
+            erro = f"resposta inválida: {response.text[:200]}"
+            self._registrar_falha(numeros, erro)
+            logger.warning(f"Caixa de saída: {erro}")
+            return False
+        rejeitadas = {
+            item["numeroProcesso"]: item.get("erro", "")
+            for item in dados.get("rejeitadas", []) if item.get("numeroProcesso") in numeros
+        }
+        for numero, erro in rejeitadas.items():
+            logger.error(f"Publicação recusada pela API: {numero} ({erro})")
+        self._concluir(lote, rejeitadas)
+        logger.info(f"Caixa de saída: {len(lote) - len(rejeitadas)} entregue(s), {dados.get('criadas', 0)} nova(s)")
+        return True
+
+    def _esvaziar(self):
+        while not self.encerrar.is_set():
+            try:
+                lote = self._proximo_lote()
+                if not lote:
+                    self.sinal.wait(30)
+                    self.sinal.clear()
+                    continue
+                entregue = self.enviar_lote(lote)
+            except Exception as e:
+                # SQLite ocupado ou resposta inesperada: a thread não pode morrer, tenta de novo com backoff
+                logger.error(f"Caixa de saída: erro ao esvaziar ({e})", exc_info=True)
+                entregue = False
+
+            if entregue:
+                self.falhas_seguidas = 0
+                continue
+
+            self.falhas_seguidas += 1
+            atraso = min(self.backoff_max, self.backoff_inicial * 2 ** (self.falhas_seguidas - 1))
+            self.encerrar.wait(random.uniform(atraso / 2, atraso))
+
+    def iniciar(self):
+        """Inicia o esvaziador (uma vez por processo)"""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.encerrar.clear()
+                self.thread = threading.Thread(target=self._esvaziar, name="caixa-saida", daemon=True)
+                self.thread.start()
+
+    def parar(self, timeout: float = 5.0):
+        self.encerrar.set()
+        self.sinal.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def aguardar_vazia(self, timeout: float) -> bool:
+        """Espera o esvaziador entregar tudo (execuções avulsas antes de sair); False se esgotar o tempo"""
+        limite = time.monotonic() + timeout
+        while self._contar(PENDENTE):
+            if time.monotonic() >= limite:
+                return False
+            self.sinal.set()
+            self.encerrar.wait(0.5)
+        return True
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {
+            "pendentes": self._contar(PENDENTE),
+            "rejeitadas": self._contar(REJEITADA),
+            "entregues": self.entregues,
+            "falhas_seguidas": self.falhas_seguidas,
+        }
+
+
+_caixa_global: Optional[CaixaSaida] = None
+_caixa_lock = threading.Lock()
+
+
+def obter_caixa_saida(api_url: str) -> Optional[CaixaSaida]:
+    """
+    Caixa compartilhada pelo processo, aberta e com o esvaziador iniciado na primeira chamada
+    Retorna None se desabilitada (CAIXA_SAIDA_PATH vazio) ou se o disco falhar
+    """
+    global _caixa_global
+
+    with _caixa_lock:
+        if _caixa_global is not None:
+            return _caixa_global
+
+        caminho = os.getenv("CAIXA_SAIDA_PATH", os.path.join(DIRETORIO_DADOS, "caixa_saida.db"))
+        if not caminho:
+            return None
+
+        try:
+            _caixa_global = CaixaSaida(
+                caminho,
+                api_url,
+                indice=obter_indice(api_url),
+                tamanho_lote=int(os.getenv("CAIXA_SAIDA_LOTE", "100")),
+                backoff_max=float(os.getenv("CAIXA_SAIDA_BACKOFF_MAX_S", "300")),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao abrir caixa de saída: {e}")
+            return None
+
+        _caixa_global.iniciar()
+        return _caixa_global
@@ -0,0 +1,177 @@
+"""
+Prazo e cancelamento dos jobs de scraping
+
+Cada job HTTP (/run-real, /run-since-march, /busca-personalizada) roda com um
+TokenCancelamento, registrado enquanto o job existe. POST /jobs/cancelar ou o
+prazo esgotado marcam o token; o job para no próximo ponto seguro (início de
+cada data, esperas do WebDriver, pausas entre datas, envio à API) e devolve o
+que já coletou. Ao cancelar, o navegador do job é derrubado (ao_cancelar),
+para que uma chamada presa no WebDriver volte na hora em vez de esperar o
+timeout de carregamento.
+
+Prazo padrão por endpoint: PRAZO_RUN_REAL_S (300), PRAZO_RUN_SINCE_MARCH_S
+(1800) e PRAZO_BUSCA_PERSONALIZADA_S (0 = sem prazo); "prazo_s" no corpo da
+requisição tem precedência.
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from metricas import JOBS_CANCELADOS
+
+logger = logging.getLogger(__name__)
+
+PRAZO_ESGOTADO = "prazo esgotado"
+
+PRAZOS_PADRAO = {
+    "run-real": float(os.getenv("PRAZO_RUN_REAL_S", "300")),
+    "run-since-march": float(os.getenv("PRAZO_RUN_SINCE_MARCH_S", "1800")),
+    "busca-personalizada": float(os.getenv("PRAZO_BUSCA_PERSONALIZADA_S", "0")),
+}
+
+
+class JobCancelado(BaseException):
+    """
+    Levantada nos pontos seguros de um job cancelado. Como asyncio.CancelledError,
+    não herda de Exception: atravessa os `except Exception` que tratam a falha de
+    uma data e chega ao laço de datas, que devolve o resultado parcial
+    """
+
+
+class TokenCancelamento:
+    """Sinal de cancelamento de um job, com prazo opcional (segundos a partir da criação)"""
+
+    def __init__(self, prazo_s: Optional[float] = None):
+        self.evento = threading.Event()
+        self.motivo: Optional[str] = None
+        self.prazo = time.monotonic() + prazo_s if prazo_s else None
+        self.callbacks: List[Callable[[], None]] = []
+        self.lock = threading.Lock()
+        # O prazo dispara os callbacks mesmo com o job parado numa chamada bloqueante
+        self.temporizador = None
+        if prazo_s:
+            self.temporizador = threading.Timer(prazo_s, self.cancelar, args=(PRAZO_ESGOTADO,))
+            self.temporizador.daemon = True
+            self.temporizador.start()
+
+    def cancelar(self, motivo: str = "cancelado") -> bool:
+        """Marca o token e chama os callbacks; False se já estava cancelado"""
+        with self.lock:
+            if self.evento.is_set():
+                return False
+            self.motivo = motivo
+            self.evento.set()
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Erro em callback de cancelamento: {e}")
+        return True
+
+    @property
+    def cancelado(self) -> bool:
+        if not self.evento.is_set() and self.prazo is not None and time.monotonic() >= self.prazo:
+            self.cancelar(PRAZO_ESGOTADO)
+        return self.evento.is_set()
+
+    def restante(self) -> Optional[float]:
+        """Segundos até o prazo; None sem prazo"""
+        if self.prazo is None:
+            return None
+        return max(0.0, self.prazo - time.monotonic())
+
+    def limitar(self, timeout: float) -> float:
+        """O timeout da operação, sem passar do prazo do job"""
+        restante = self.restante()
+        if restante is None:
+            return timeout
+        # Timeout zero significa "sem timeout" em várias bibliotecas
+        return max(0.1, min(timeout, restante))
+
+    def verificar(self):
+        """Ponto seguro: levanta JobCancelado se o job foi cancelado ou o prazo passou"""
+        if self.cancelado:
+            raise JobCancelado(self.motivo)
+
+    def esperar(self, segundos: float) -> bool:
+        """time.sleep que volta assim que o job for cancelado; True se cancelado"""
+        self.evento.wait(self.limitar(segundos))
+        return self.cancelado
+
+    def ao_cancelar(self, callback: Callable[[], None]):
+        """Registra um callback para o cancelamento (chamado na hora se já cancelado)"""
+        with self.lock:
+            if not self.evento.is_set():
+                self.callbacks.append(callback)
+                return
+        callback()
+
+    def encerrar(self):
+        """Fim do job: desarma o prazo e descarta os callbacks"""
+        if self.temporizador:
+            self.temporizador.cancel()
+        with self.lock:
+            self.callbacks = []
+
+
+_jobs: Dict[str, Dict] = {}
+_jobs_lock = threading.Lock()
+
+
+@contextmanager
+def job_cancelavel(endpoint: str, prazo_s: Optional[float] = None, job_id: Optional[str] = None) -> Iterator[TokenCancelamento]:
+    """Token do job com o prazo informado (ou o padrão do endpoint), registrado até o fim do bloco"""
+    if prazo_s is None:
+        prazo_s = PRAZOS_PADRAO.get(endpoint, 0)
+    token = TokenCancelamento(float(prazo_s) or None)
+    job_id = str(job_id or uuid.uuid4().hex[:12])
+    with _jobs_lock:
+        _jobs[job_id] = {"endpoint": endpoint, "token": token, "inicio": time.time()}
+    try:
+        yield token
+    finally:
+        with _jobs_lock:
+            _jobs.pop(job_id, None)
+        token.encerrar()
+        if token.motivo:
+            motivo = "deadline" if token.motivo == PRAZO_ESGOTADO else "requested"
+            JOBS_CANCELADOS.labels(endpoint, motivo).inc()
+            logger.warning(f"Job {job_id} ({endpoint}) interrompido: {token.motivo}")
+
+
+def _descrever(job_id: str, job: Dict) -> Dict:
+    token = job["token"]
+    restante = token.restante()
+    return {
+        "job_id": job_id,
+        "endpoint": job["endpoint"],
+        "inicio": job["inicio"],
+        "prazo_restante_s": round(restante, 1) if restante is not None else None,
+        "cancelado": token.evento.is_set(),
+        "motivo": token.motivo,
+    }
+
+
+def jobs_ativos() -> List[Dict]:
+    with _jobs_lock:
+        jobs = list(_jobs.items())
+    return [_descrever(job_id, job) for job_id, job in jobs]
+
+
+def cancelar_jobs(job_id: Optional[str] = None, endpoint: Optional[str] = None,
+                  motivo: str = "cancelado pelo usuário") -> List[Dict]:
+    """Cancela os jobs ativos que casam com job_id/endpoint (todos, sem filtro); devolve os afetados"""
+    with _jobs_lock:
+        alvos = [(id_, job) for id_, job in _jobs.items()
+                 if (job_id is None or id_ == job_id) and (endpoint is None or job["endpoint"] == endpoint)]
+    cancelados = []
+    for id_, job in alvos:
+        if job["token"].cancelar(motivo):
+            cancelados.append(_descrever(id_, job))
+    return cancelados
@@ -0,0 +1,190 @@
+"""
+Índice local de processos já enviados para a API
+
+Filtro de Bloom em memória na frente de uma tabela SQLite exata em disco.
+O Bloom responde "com certeza novo" sem tocar no disco; um "talvez já visto"
+é confirmado na tabela, então nunca há falso positivo no resultado final.
+A semeadura a partir da API roda em segundo plano; até ela terminar, quem
+envia deixa a deduplicação para a própria API (índice ainda incompleto).
+"""
+
+import os
+import math
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Iterable, Optional
+
+import requests
+
+from estado import DIRETORIO_DADOS, cabecalhos_servico
+
+logger = logging.getLogger(__name__)
+
+
+class FiltroBloom:
+    """Filtro de Bloom simples sobre bytearray com double hashing (blake2b)"""
+
+    def __init__(self, capacidade: int = 1_000_000, taxa_falso_positivo: float = 0.001):
+        capacidade = max(1, capacidade)
+        self.num_bits = max(8, int(-capacidade * math.log(taxa_falso_positivo) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacidade * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _posicoes(self, chave: str):
+        digest = hashlib.blake2b(chave.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def adicionar(self, chave: str):
+        for pos in self._posicoes(chave):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, chave: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._posicoes(chave))
+
+
+class IndiceProcessosVistos:
+    """Conjunto persistente de números de processo já aceitos pela API (201/409)"""
+
+    def __init__(self, caminho: str, capacidade: int = 1_000_000):
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self.caminho = caminho
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS processos (numero TEXT PRIMARY KEY)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)")
+        self.conn.commit()
+
+        total = self.conn.execute("SELECT COUNT(*) FROM processos").fetchone()[0]
+        self.bloom = FiltroBloom(capacidade=max(capacidade, total * 2))
+        for (numero,) in self.conn.execute("SELECT numero FROM processos"):
+            self.bloom.adicionar(numero)
+
+        self.consultas_disco = 0
+        # Marcado quando a semeadura termina (com sucesso ou não)
+        self.semeado = threading.Event()
+        logger.info(f"Índice de deduplicação carregado: {total} processos ({caminho})")
+
+    def contem(self, numero_processo: str) -> bool:
+        if numero_processo not in self.bloom:
+            return False
+
+        with self.lock:
+            self.consultas_disco += 1
+            linha = self.conn.execute(
+                "SELECT 1 FROM processos WHERE numero = ?", (numero_processo,)
+            ).fetchone()
+        return linha is not None
+
+    def adicionar(self, numero_processo: str):
+        self.adicionar_varios([numero_processo])
+
+    def adicionar_varios(self, numeros: Iterable[str]) -> int:
+        novos = [numero for numero in numeros if numero]
+        if not novos:
+            return 0
+
+        with self.lock:
+            self.conn.executemany("INSERT OR IGNORE INTO processos (numero) VALUES (?)", [(n,) for n in novos])
+            self.conn.commit()
+        for numero in novos:
+            self.bloom.adicionar(numero)
+        return len(novos)
+
+    def total(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM processos").fetchone()[0]
+
+    def _ler_meta(self, chave: str) -> Optional[str]:
+        with self.lock:
+            linha = self.conn.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else None
+
+    def _gravar_meta(self, chave: str, valor: str):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)", (chave, valor))
+            self.conn.commit()
+
+    def semear_em_segundo_plano(self, api_url: str) -> threading.Thread:
+        def semear():
+            try:
+                self.semear_da_api(api_url)
+            except Exception as e:
+                logger.warning(f"Erro ao semear índice de deduplicação: {e}")
+            finally:
+                self.semeado.set()
+
+        thread = threading.Thread(target=semear, name="semear-dedup", daemon=True)
+        thread.start()
+        return thread
+
+    def semear_da_api(self, api_url: str, timeout: int = 15, limite: int = 5000) -> int:
+        """
+        Carrega os números de processo já cadastrados na API, página a página
+        Após a primeira carga completa, busca apenas o que foi criado desde a última
+        """
+        desde = self._ler_meta("ultima_semeadura")
+        inicio = datetime.utcnow().isoformat() + "Z"
+        params = {"limite": limite}
+        if desde:
+            params["desde"] = desde
+
+        adicionados = 0
+        while True:
+            try:
+                response = requests.get(f"{api_url}/api/publicacoes/numeros-processo", params=params,
+                                        headers=cabecalhos_servico(), timeout=timeout)
+                if response.status_code != 200:
+                    logger.warning(f"Não foi possível semear índice de deduplicação: HTTP {response.status_code}")
+                    return adicionados
+                corpo = response.json()
+            except Exception as e:
+                logger.warning(f"Não foi possível semear índice de deduplicação: {e}")
+                return adicionados
+
+            adicionados += self.adicionar_varios(corpo.get("data", []))
+            if not corpo.get("proximoCursor"):
+                break
+            params["cursor"] = corpo["proximoCursor"]
+
+        # Só uma carga completa avança o marco; uma parcial é refeita na próxima subida
+        self._gravar_meta("ultima_semeadura", inicio)
+        logger.info(f"Índice de deduplicação semeado com {adicionados} processos da API")
+        return adicionados
+
+
+_indice_global: Optional[IndiceProcessosVistos] = None
+_indice_lock = threading.Lock()
+
+
+def obter_indice(api_url: str) -> Optional[IndiceProcessosVistos]:
+    """
+    Índice compartilhado pelo processo, criado na primeira chamada e semeado em segundo plano
+    Retorna None se desabilitado (DEDUP_INDEX_PATH vazio) ou se o disco falhar
+    """
+    global _indice_global
+
+    with _indice_lock:
+        if _indice_global is not None:
+            return _indice_global
+
+        caminho = os.getenv("DEDUP_INDEX_PATH", os.path.join(DIRETORIO_DADOS, "processos_vistos.db"))
+        if not caminho:
+            return None
+
+        try:
+            _indice_global = IndiceProcessosVistos(caminho)
+        except Exception as e:
+            logger.error(f"Erro ao abrir índice de deduplicação: {e}")
+            return None
+
+        _indice_global.semear_em_segundo_plano(api_url)
+        return _indice_global
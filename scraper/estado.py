@@ -0,0 +1,36 @@
+"""
+Estado e configuração compartilhados entre a camada HTTP (servico.py) e o scraper
+
+Sem dependências pesadas: importado tanto na subida do Flask quanto pelo
+real_dje_scraper, de modo que ambos enxergam o mesmo dicionário de progresso.
+"""
+
+import os
+
+# Permite apontar para o stand-in local (benchmarks/dje_standin.py)
+DJE_BASE_URL = os.getenv("DJE_BASE_URL", "https://dje.tjsp.jus.br").rstrip("/")
+
+# Bancos e estado que sobrevivem a reinícios; no docker-compose, o volume scraper_dados
+DIRETORIO_DADOS = os.getenv("SCRAPER_DADOS_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados")
+
+# Credencial das rotas da API restritas ao scraper (reextração, números de processo)
+SCRAPER_SERVICE_TOKEN = os.getenv("SCRAPER_SERVICE_TOKEN", "")
+
+
+def cabecalhos_servico() -> dict:
+    """Cabeçalho X-Service-Token para chamadas do scraper à API (vazio se não configurado)"""
+    return {"X-Service-Token": SCRAPER_SERVICE_TOKEN} if SCRAPER_SERVICE_TOKEN else {}
+
+progresso_busca = {
+    'ativa': False,
+    'data_atual': '',
+    'total_dias': 0,
+    'dias_processados': 0,
+    'publicacoes_encontradas': 0,
+    'termos_buscados': '',
+    'periodo': '',
+    'inicio': '',
+    'dias_do_cache': 0,
+    'dias_do_indice': 0,
+    'erro': None
+}
@@ -0,0 +1,120 @@
+"""
+Exportação colunar (Parquet) das publicações coletadas
+
+Com EXPORTACAO_PARQUET_DIR definido, cada execução grava os registros em
+arquivos Parquet particionados no estilo Hive por fonte e data de
+disponibilização:
+
+    <dir>/fonte=DJE-TJSP-REAL/data=2025-06-13/parte-<execucao>-0.parquet
+
+Cada execução só acrescenta arquivos às partições, sem reescrever os
+anteriores. Os valores monetários são decimal(15, 2), como na tabela
+publicacoes. pyarrow é opcional e só é importado na primeira exportação.
+"""
+
+import os
+import uuid
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_TEXTO = ("numeroProcesso", "autores", "advogados", "conteudo", "reu", "termosEncontrados")
+CAMPOS_VALOR = ("valorPrincipalBruto", "valorPrincipalLiquido", "valorJurosMoratorios", "honorariosAdvocaticios")
+PRECISAO_VALOR, ESCALA_VALOR = 15, 2
+
+
+def diretorio_configurado() -> str:
+    return os.getenv("EXPORTACAO_PARQUET_DIR", "").strip()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError:
+        logger.warning("pyarrow não instalado; exportação Parquet desativada")
+        return None
+    return pyarrow
+
+
+def _esquemas(pa):
+    """Esquema das colunas gravadas e das colunas de partição"""
+    valor = pa.decimal128(PRECISAO_VALOR, ESCALA_VALOR)
+    colunas = pa.schema(
+        [(campo, pa.string()) for campo in CAMPOS_TEXTO]
+        + [(campo, valor) for campo in CAMPOS_VALOR]
+        + [("fonte", pa.string()), ("data", pa.date32())]
+    )
+    particoes = pa.schema([("fonte", pa.string()), ("data", pa.date32())])
+    return colunas, particoes
+
+
+def _decimal(valor: Any) -> Optional[Decimal]:
+    if valor is None:
+        return None
+    return Decimal(f"{valor:.{ESCALA_VALOR}f}")
+
+
+def _data(valor: Any) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def exportar(publicacoes: List, diretorio: Optional[str] = None, execucao: Optional[str] = None) -> Optional[Dict]:
+    """
+    Acrescenta as publicações (PublicacaoReal) ao dataset Parquet
+    Retorna None se a exportação estiver desativada
+    """
+    diretorio = diretorio or diretorio_configurado()
+    if not diretorio:
+        return None
+    pa = _pyarrow()
+    if pa is None:
+        return None
+
+    execucao = execucao or f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    esquema, particoes = _esquemas(pa)
+
+    colunas = {campo.name: [] for campo in esquema}
+    for publicacao in publicacoes:
+        for campo in CAMPOS_TEXTO:
+            colunas[campo].append(getattr(publicacao, campo))
+        for campo in CAMPOS_VALOR:
+            colunas[campo].append(_decimal(getattr(publicacao, campo)))
+        colunas["fonte"].append(publicacao.fonte)
+        colunas["data"].append(_data(publicacao.dataDisponibilizacao))
+
+    arquivos = []
+    if publicacoes:
+        pa.dataset.write_dataset(
+            pa.table(colunas, schema=esquema),
+            diretorio,
+            format="parquet",
+            partitioning=pa.dataset.partitioning(particoes, flavor="hive"),
+            basename_template=f"parte-{execucao}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=pa.dataset.ParquetFileFormat().make_write_options(compression="zstd"),
+            file_visitor=lambda arquivo: arquivos.append(arquivo.path),
+        )
+
+    logger.info(f"Exportação Parquet: {len(publicacoes)} registros em {len(arquivos)} arquivo(s) ({execucao})")
+    return {"diretorio": diretorio, "execucao": execucao, "registros": len(publicacoes), "arquivos": len(arquivos)}
+
+
+def abrir(diretorio: Optional[str] = None):
+    """Dataset pyarrow com fonte e data como colunas tipadas, para filtros e agregações"""
+    pa = _pyarrow()
+    if pa is None:
+        raise RuntimeError("pyarrow não instalado")
+    _, particoes = _esquemas(pa)
+    return pa.dataset.dataset(
+        diretorio or diretorio_configurado(),
+        format="parquet",
+        partitioning=pa.dataset.partitioning(particoes, flavor="hive"),
+    )
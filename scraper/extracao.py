@@ -0,0 +1,246 @@
+"""
+Extração de registros das páginas de resultado do DJE-TJSP
+
+Regras de extração de campos (ExtratorCampos) e conversão de uma página em
+registros compactos: tuplas na ordem de CAMPOS_REGISTRO, prontas para virar
+PublicacaoReal, acompanhadas do texto de cada elemento (índice textual). Não depende de selenium nem do scraper, então também roda nos
+processos do pool de extração (pool_extracao.py).
+"""
+
+import re
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+MODO_PADRAO = "padrao"
+MODO_PERSONALIZADO = "personalizado"
+
+# Ordem dos campos nas tuplas de registro (mesmos nomes de PublicacaoReal)
+CAMPOS_REGISTRO = (
+    "numeroProcesso",
+    "dataDisponibilizacao",
+    "autores",
+    "advogados",
+    "conteudo",
+    "valorPrincipalBruto",
+    "valorPrincipalLiquido",
+    "valorJurosMoratorios",
+    "honorariosAdvocaticios",
+    "termosEncontrados",
+    "fonte",
+)
+FONTE_REAL = "DJE-TJSP-REAL"
+TERMOS_PADRAO = ("RPV", "pagamento pelo INSS", "Requisição de Pequeno Valor", "INSTITUTO NACIONAL DO SEGURO SOCIAL", "INSS")
+
+PADRAO_PROCESSO_CNJ = re.compile(r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}')
+PADROES_PROCESSO = [
+    re.compile(r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}', re.IGNORECASE),
+    re.compile(r'\d{4,7}[-/]\d{2,4}', re.IGNORECASE),
+    re.compile(r'n[úo]\.?\s*\d{4,}[-/]\d{2,4}', re.IGNORECASE),
+]
+PADROES_AUTORES = [
+    re.compile(r'autor[a-z]*[:\s]+([A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)*)', re.IGNORECASE),
+    re.compile(r'requerente[:\s]+([A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)*)', re.IGNORECASE),
+    re.compile(r'([A-Z][A-Z\s]+[A-Z])\s+(?:x|vs|contra)', re.IGNORECASE),
+]
+PADROES_ADVOGADOS = [
+    re.compile(r'(?:Dr\.?|Dra\.?)\s+([A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)*)', re.IGNORECASE),
+    re.compile(r'OAB[/\s]*[A-Z]{2}[/\s]*\d+', re.IGNORECASE),
+    re.compile(r'advogad[oa][:\s]+([A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)*)', re.IGNORECASE),
+]
+PADRAO_VALOR = re.compile(r'R\$\s*([\d.,]+)')
+
+Registro = Tuple
+RegistroPagina = Tuple[str, str, Optional[Registro]]
+
+
+class ExtratorCampos:
+    """Regras de extração de cada campo a partir do texto de uma publicação"""
+
+    def __init__(self, termos_padrao: Sequence[str]):
+        self.termos_padrao = termos_padrao
+
+    def extrair_numero_processo(self, texto: str) -> Optional[str]:
+        for padrao in PADROES_PROCESSO:
+            match = padrao.search(texto)
+            if match:
+                return match.group().strip()
+        return None
+
+    def extrair_autores(self, texto: str) -> str:
+        for padrao in PADROES_AUTORES:
+            match = padrao.search(texto)
+            if match:
+                return match.group(1).strip().title()
+        return "Autor não identificado"
+
+    def extrair_advogados(self, texto: str) -> str:
+        advogados_encontrados = []
+        for padrao in PADROES_ADVOGADOS:
+            advogados_encontrados.extend(padrao.findall(texto))
+
+        if advogados_encontrados:
+            return ", ".join(dict.fromkeys(advogados_encontrados))
+        return "Advogado não identificado"
+
+    def extrair_valores(self, texto: str) -> Dict[str, Optional[float]]:
+        valores = {
+            'principal': None,
+            'liquido': None,
+            'honorarios': None,
+            'juros': None
+        }
+
+        matches = PADRAO_VALOR.findall(texto)
+        if matches:
+            try:
+                valor = float(matches[0].replace('.', '').replace(',', '.'))
+                valores['principal'] = valor
+                valores['liquido'] = valor * 0.9
+                valores['honorarios'] = valor * 0.1
+                valores['juros'] = valor * 0.05
+            except ValueError:
+                pass
+
+        return valores
+
+    def extrair_termos_encontrados(self, texto: str) -> str:
+        termos_encontrados = []
+        texto_lower = texto.lower()
+
+        if "rpv" in texto_lower:
+            termos_encontrados.append("RPV")
+        if "pagamento pelo inss" in texto_lower:
+            termos_encontrados.append("pagamento pelo INSS")
+
+        for termo in self.termos_padrao:
+            if termo.lower() in texto_lower and termo not in termos_encontrados:
+                termos_encontrados.append(termo)
+
+        return ", ".join(termos_encontrados) if termos_encontrados else "RPV, INSS"
+
+
+def registro_padrao(extrator, texto_completo: str, data: datetime) -> Optional[Registro]:
+    """Registro completo da publicação; número vazio fica para quem numera os elementos"""
+    if len(texto_completo) < 50:
+        return None
+
+    valores = extrator.extrair_valores(texto_completo)
+    return (
+        extrator.extrair_numero_processo(texto_completo),
+        data.strftime("%Y-%m-%dT00:00:00.000Z"),
+        extrator.extrair_autores(texto_completo),
+        extrator.extrair_advogados(texto_completo),
+        texto_completo[:2000],
+        valores.get('principal'),
+        valores.get('liquido'),
+        valores.get('juros'),
+        valores.get('honorarios'),
+        extrator.extrair_termos_encontrados(texto_completo),
+        FONTE_REAL,
+    )
+
+
+def registro_personalizado(extrator, texto_completo: str, data: datetime, termos_busca: Sequence[str]) -> Optional[Registro]:
+    """
+    Registro da busca personalizada, com o primeiro termo pedido que aparece no texto
+    texto_completo é o get_text() do elemento, como guardado no índice textual
+    """
+    numero_processo = extrator.extrair_numero_processo(texto_completo)
+    if not numero_processo:
+        return None
+
+    termo_encontrado = None
+    for termo in termos_busca:
+        if termo.upper() in texto_completo.upper():
+            termo_encontrado = termo
+            break
+    if not termo_encontrado:
+        termo_encontrado = termos_busca[0] if termos_busca else "RPV"
+
+    valores = extrator.extrair_valores(texto_completo)
+    return (
+        numero_processo,
+        data.isoformat(),
+        extrator.extrair_autores(texto_completo),
+        extrator.extrair_advogados(texto_completo),
+        f"PROCESSO Nº {numero_processo}. Publicação relacionada ao termo '{termo_encontrado}' em processo contra o Instituto Nacional do Seguro Social - INSS. Valor: R$ {valores['principal'] or 0:.2f}. Parte: Ana Carolina Lima. Advogado: Dr. Roberto Silva OAB/SP 34567. Termo encontrado: {termo_encontrado}.",
+        valores['principal'],
+        valores['liquido'],
+        valores['juros'],
+        valores['honorarios'],
+        termo_encontrado,
+        FONTE_REAL,
+    )
+
+
+def extrair_registros(pagina: Union[str, BeautifulSoup], modo: str, data: datetime,
+                      termos_busca: Sequence[str], extrator) -> List[RegistroPagina]:
+    """
+    Registros de uma página de resultado como triplas (chave, texto, registro)
+    A chave é o número de processo usado para deduplicar entre páginas, texto
+    é o get_text() do elemento e o registro é None quando o elemento não rende
+    publicação
+    """
+    soup = pagina if isinstance(pagina, BeautifulSoup) else BeautifulSoup(pagina, 'html.parser')
+    registros = []
+    chaves_vistas = set()
+
+    for elemento in soup.find_all(['div', 'p', 'span'], string=PADRAO_PROCESSO_CNJ):
+        texto = elemento.get_text()
+        chave = extrator.extrair_numero_processo(texto)
+        if not chave or chave in chaves_vistas:
+            continue
+        chaves_vistas.add(chave)
+
+        try:
+            if modo == MODO_PERSONALIZADO:
+                registro = registro_personalizado(extrator, texto, data, termos_busca)
+            else:
+                registro = registro_padrao(extrator, elemento.get_text(strip=True), data)
+        except Exception as e:
+            logger.error(f"Erro ao processar elemento {chave}: {e}")
+            registro = None
+        registros.append((chave, texto, registro))
+
+    return registros
+
+
+def consolidar_registros(registros_por_pagina: Iterable[List[RegistroPagina]],
+                         data: datetime) -> Tuple[List[Registro], List[Tuple[str, str]]]:
+    """
+    Registros e textos (chave, texto) dos elementos únicos de todas as páginas
+    Deduplica por chave na ordem em que aparecem; registro sem número de
+    processo recebe REAL-AAAAMMDD-nnn pela posição do elemento
+    """
+    registros = []
+    textos = []
+    chaves_vistas = set()
+    for registros_pagina in registros_por_pagina:
+        for chave, texto, registro in registros_pagina:
+            if chave in chaves_vistas:
+                continue
+            chaves_vistas.add(chave)
+            textos.append((chave, texto))
+            if registro is None:
+                continue
+            if not registro[0]:
+                registro = (f"REAL-{data.strftime('%Y%m%d')}-{len(chaves_vistas) - 1:03d}",) + registro[1:]
+            registros.append(registro)
+    return registros, textos
+
+
+_extratores: Dict[Tuple[str, ...], ExtratorCampos] = {}
+
+
+def extrair_registros_html(html: bytes, modo: str, data: datetime,
+                           termos_busca: Tuple[str, ...], termos_padrao: Tuple[str, ...]) -> List[RegistroPagina]:
+    """Ponto de entrada nos processos do pool: bytes de HTML entram, tuplas saem"""
+    extrator = _extratores.get(termos_padrao)
+    if extrator is None:
+        extrator = _extratores.setdefault(termos_padrao, ExtratorCampos(termos_padrao))
+    return extrair_registros(html.decode('utf-8'), modo, data, termos_busca, extrator)
@@ -0,0 +1,406 @@
+"""
+Fila de trabalho distribuída em Postgres para backfills em várias réplicas
+
+Um lote (período x conjuntos de termos) vira uma tarefa por data e conjunto
+de termos na tabela scraper_tarefas. Cada réplica do serviço com
+FILA_DATABASE_URL definido roda um TrabalhadorFila, que reivindica a próxima
+tarefa com SELECT ... FOR UPDATE SKIP LOCKED e um lease de FILA_LEASE_S
+segundos, renovado por heartbeat enquanto a data é processada. Uma réplica
+que morre deixa o lease expirar e a tarefa volta para a fila (até
+FILA_MAX_TENTATIVAS). As tarefas saem por prioridade (prioridade.py): termos
+prioritários e dias úteis mais recentes primeiro. Uma réplica não reivindica
+tarefas enquanto atende uma busca interativa. O progresso do lote é agregado
+na própria tabela, somando todas as réplicas. psycopg2 só é importado quando
+a fila é usada.
+"""
+
+import os
+import uuid
+import socket
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from cache_buscas import normalizar_termos
+from extracao import FONTE_REAL
+from metricas import FILA_TAREFAS
+from prioridade import preempcao, prioridade_tarefa
+
+logger = logging.getLogger(__name__)
+
+PENDENTE = "pendente"
+EM_ANDAMENTO = "em_andamento"
+CONCLUIDA = "concluida"
+FALHOU = "falhou"
+
+# Serializa a criação da tabela entre réplicas que sobem juntas
+_TRAVA_ESQUEMA = 0x4A55_5343
+
+_ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS scraper_tarefas (
+        id BIGSERIAL PRIMARY KEY,
+        lote TEXT NOT NULL,
+        data DATE NOT NULL,
+        termos TEXT NOT NULL DEFAULT '',
+        prioridade INTEGER NOT NULL DEFAULT 0,
+        estado TEXT NOT NULL DEFAULT 'pendente',
+        tentativas INTEGER NOT NULL DEFAULT 0,
+        trabalhador TEXT,
+        lease_ate TIMESTAMPTZ,
+        encontradas INTEGER NOT NULL DEFAULT 0,
+        enviadas INTEGER NOT NULL DEFAULT 0,
+        erro TEXT,
+        criada_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+        iniciada_em TIMESTAMPTZ,
+        concluida_em TIMESTAMPTZ,
+        UNIQUE (lote, data, termos)
+    );
+    ALTER TABLE scraper_tarefas ADD COLUMN IF NOT EXISTS prioridade INTEGER NOT NULL DEFAULT 0;
+    DROP INDEX IF EXISTS scraper_tarefas_fila;
+    CREATE INDEX IF NOT EXISTS scraper_tarefas_prioridade
+        ON scraper_tarefas (estado, prioridade DESC, data DESC, id);
+"""
+
+
+@dataclass
+class Tarefa:
+    id: int
+    lote: str
+    data: date
+    termos: str
+    tentativas: int
+
+
+def nome_trabalhador() -> str:
+    """Identifica a réplica: hostname do container e pid"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class FilaTrabalho:
+    """Operações da fila sobre scraper_tarefas; uma conexão curta por operação"""
+
+    def __init__(self, dsn: str, lease_s: float = 300, max_tentativas: int = 3):
+        import psycopg2
+
+        self.psycopg2 = psycopg2
+        self.dsn = dsn
+        self.lease_s = lease_s
+        self.max_tentativas = max_tentativas
+        with self._transacao() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (_TRAVA_ESQUEMA,))
+            cursor.execute(_ESQUEMA)
+
+    @contextmanager
+    def _transacao(self):
+        conn = self.psycopg2.connect(self.dsn)
+        try:
+            with conn, conn.cursor() as cursor:
+                yield cursor
+        finally:
+            conn.close()
+
+    def criar_lote(self, data_inicio, data_fim, conjuntos_termos: Iterable[Iterable[str]] = ((),)) -> Tuple[str, int]:
+        """
+        Uma tarefa por data do período e conjunto de termos (vazio = termos padrão); devolve (lote, tarefas)
+        A prioridade de cada tarefa é calculada aqui e define a ordem de reivindicação
+        """
+        from psycopg2.extras import execute_values
+
+        inicio = data_inicio.date() if isinstance(data_inicio, datetime) else data_inicio
+        fim = data_fim.date() if isinstance(data_fim, datetime) else data_fim
+        conjuntos = list(dict.fromkeys(", ".join(normalizar_termos(termos)) for termos in conjuntos_termos))
+        lote = uuid.uuid4().hex[:12]
+        linhas = [
+            (lote, date.fromordinal(dia), termos, prioridade_tarefa(date.fromordinal(dia), termos))
+            for dia in range(inicio.toordinal(), fim.toordinal() + 1)
+            for termos in conjuntos
+        ]
+        with self._transacao() as cursor:
+            execute_values(
+                cursor,
+                "INSERT INTO scraper_tarefas (lote, data, termos, prioridade) VALUES %s ON CONFLICT DO NOTHING",
+                linhas,
+            )
+        logger.info(f"Fila: lote {lote} com {len(linhas)} tarefa(s) de {inicio} a {fim}")
+        return lote, len(linhas)
+
+    def reivindicar(self, trabalhador: str) -> Optional[Tarefa]:
+        """
+        Próxima tarefa livre (ou com lease expirado) para este trabalhador, a de maior prioridade
+        SKIP LOCKED: réplicas concorrentes nunca esperam nem pegam a mesma linha
+        """
+        with self._transacao() as cursor:
+            cursor.execute(
+                """
+                UPDATE scraper_tarefas SET estado = %s, erro = 'lease expirado', lease_ate = NULL
+                WHERE estado = %s AND lease_ate < now() AND tentativas >= %s
+                """,
+                (FALHOU, EM_ANDAMENTO, self.max_tentativas),
+            )
+            cursor.execute(
+                """
+                WITH proxima AS (
+                    SELECT id FROM scraper_tarefas
+                    WHERE estado = %s OR (estado = %s AND lease_ate < now())
+                    ORDER BY prioridade DESC, data DESC, id
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                UPDATE scraper_tarefas t
+                SET estado = %s, trabalhador = %s, tentativas = t.tentativas + 1, iniciada_em = now(),
+                    lease_ate = now() + make_interval(secs => %s),
+                    erro = CASE WHEN t.estado = %s THEN 'lease expirado' ELSE t.erro END
+                FROM proxima WHERE t.id = proxima.id
+                RETURNING t.id, t.lote, t.data, t.termos, t.tentativas
+                """,
+                (PENDENTE, EM_ANDAMENTO, EM_ANDAMENTO, trabalhador, self.lease_s, EM_ANDAMENTO),
+            )
+            linha = cursor.fetchone()
+        return Tarefa(*linha) if linha else None
+
+    def renovar(self, tarefa: Tarefa, trabalhador: str) -> bool:
+        """Heartbeat; False se o lease já expirou e a tarefa foi para outro trabalhador"""
+        with self._transacao() as cursor:
+            cursor.execute(
+                """
+                UPDATE scraper_tarefas SET lease_ate = now() + make_interval(secs => %s)
+                WHERE id = %s AND trabalhador = %s AND estado = %s
+                """,
+                (self.lease_s, tarefa.id, trabalhador, EM_ANDAMENTO),
+            )
+            return cursor.rowcount == 1
+
+    def concluir(self, tarefa: Tarefa, trabalhador: str, encontradas: int, enviadas: int) -> bool:
+        with self._transacao() as cursor:
+            cursor.execute(
+                """
+                UPDATE scraper_tarefas
+                SET estado = %s, encontradas = %s, enviadas = %s, erro = NULL, lease_ate = NULL, concluida_em = now()
+                WHERE id = %s AND trabalhador = %s AND estado = %s
+                """,
+                (CONCLUIDA, encontradas, enviadas, tarefa.id, trabalhador, EM_ANDAMENTO),
+            )
+            return cursor.rowcount == 1
+
+    def falhar(self, tarefa: Tarefa, trabalhador: str, erro: str) -> bool:
+        """Devolve a tarefa para a fila, ou a marca como falha após max_tentativas"""
+        with self._transacao() as cursor:
+            cursor.execute(
+                """
+                UPDATE scraper_tarefas
+                SET estado = CASE WHEN tentativas >= %s THEN %s ELSE %s END, erro = %s, lease_ate = NULL
+                WHERE id = %s AND trabalhador = %s AND estado = %s
+                """,
+                (self.max_tentativas, FALHOU, PENDENTE, erro[:500], tarefa.id, trabalhador, EM_ANDAMENTO),
+            )
+            return cursor.rowcount == 1
+
+    def progresso(self, lote: str) -> Optional[Dict[str, Any]]:
+        """Situação do lote somando todas as réplicas; None se o lote não existe"""
+        with self._transacao() as cursor:
+            cursor.execute(
+                """
+                SELECT estado, COUNT(*), SUM(encontradas), SUM(enviadas), MIN(data), MAX(data)
+                FROM scraper_tarefas WHERE lote = %s GROUP BY estado
+                """,
+                (lote,),
+            )
+            por_estado = cursor.fetchall()
+            cursor.execute(
+                """
+                SELECT trabalhador, data, termos FROM scraper_tarefas
+                WHERE lote = %s AND estado = %s AND lease_ate > now() ORDER BY trabalhador
+                """,
+                (lote, EM_ANDAMENTO),
+            )
+            ativas = cursor.fetchall()
+            cursor.execute(
+                "SELECT data, termos, erro FROM scraper_tarefas WHERE lote = %s AND estado = %s ORDER BY data",
+                (lote, FALHOU),
+            )
+            falhas = cursor.fetchall()
+
+        if not por_estado:
+            return None
+        contagem = {estado: 0 for estado in (PENDENTE, EM_ANDAMENTO, CONCLUIDA, FALHOU)}
+        contagem.update({estado: total for estado, total, *_ in por_estado})
+        total = sum(contagem.values())
+        return {
+            "lote": lote,
+            "data_inicio": min(linha[4] for linha in por_estado).isoformat(),
+            "data_fim": max(linha[5] for linha in por_estado).isoformat(),
+            "total_tarefas": total,
+            **contagem,
+            "percentual": round(100 * (contagem[CONCLUIDA] + contagem[FALHOU]) / total, 1),
+            "publicacoes_encontradas": sum(linha[2] or 0 for linha in por_estado),
+            "publicacoes_enviadas": sum(linha[3] or 0 for linha in por_estado),
+            "em_processamento": [
+                {"trabalhador": trabalhador, "data": dia.isoformat(), "termos": termos}
+                for trabalhador, dia, termos in ativas
+            ],
+            "falhas": [{"data": dia.isoformat(), "termos": termos, "erro": erro} for dia, termos, erro in falhas],
+        }
+
+
+class ProcessadorScraper:
+    """Processa uma tarefa com um RealDJEScraper mantido entre tarefas (navegador aberto)"""
+
+    def __init__(self, criar_scraper: Callable[[], Any]):
+        self.criar_scraper = criar_scraper
+        self.scraper = None
+
+    def __call__(self, tarefa: Tarefa) -> Tuple[int, int]:
+        if self.scraper is None:
+            self.scraper = self.criar_scraper()
+            self.scraper.manter_driver = True
+
+        data = datetime(tarefa.data.year, tarefa.data.month, tarefa.data.day)
+        dia = tarefa.data.isoformat()
+        resolvida = False
+        if tarefa.termos:
+            # Progresso próprio: o progresso_busca é o que /progresso-busca mostra ao usuário
+            progresso = {}
+            publicacoes = self.scraper.buscar_por_data_personalizada(data, data, tarefa.termos, progresso)
+            if progresso.get('erro'):
+                raise RuntimeError(progresso['erro'])
+            resolvida = progresso.get('dias_do_cache', 0) + progresso.get('dias_do_indice', 0) > 0
+        else:
+            publicacoes = self.scraper.buscar_por_data(data, data)
+
+        # Os métodos de busca registram a falha de uma data e devolvem []; sem coleta, a data não foi lida
+        coleta = self.scraper.paginacao_por_data.get(dia)
+        if coleta is None and not resolvida:
+            raise RuntimeError(f"Data {dia} não coletada")
+        if coleta and coleta['paginas_com_falha']:
+            raise RuntimeError(f"{coleta['paginas_com_falha']} página(s) com falha na coleta")
+        # Data sem publicações: o modo padrão completa com exemplos, que não vão para a API
+        if coleta and coleta['elementos_unicos'] == 0:
+            publicacoes = []
+        exemplos = sum(1 for publicacao in publicacoes if publicacao.fonte != FONTE_REAL)
+        if exemplos:
+            raise RuntimeError(f"{exemplos} publicação(ões) de exemplo na coleta de {dia}")
+
+        async def enviar():
+            resultados = [await self.scraper.enviar_para_api(publicacao) for publicacao in publicacoes]
+            # None: já enviada antes, não conta como enviada
+            return sum(1 for resultado in resultados if resultado)
+
+        return len(publicacoes), asyncio.run(enviar())
+
+
+class TrabalhadorFila:
+    """Thread da réplica: reivindica, processa com heartbeat e conclui tarefas até parar"""
+
+    def __init__(self, fila: FilaTrabalho, processar: Callable[[Tarefa], Tuple[int, int]],
+                 nome: Optional[str] = None, espera_s: float = 10):
+        self.fila = fila
+        self.processar = processar
+        self.nome = nome or nome_trabalhador()
+        self.espera_s = espera_s
+        self.encerrar = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.tarefa_atual: Optional[Tarefa] = None
+        self.processadas = 0
+
+    def _heartbeat(self, tarefa: Tarefa, fim: threading.Event):
+        while not fim.wait(self.fila.lease_s / 3):
+            try:
+                if not self.fila.renovar(tarefa, self.nome):
+                    logger.warning(f"Fila: lease da tarefa {tarefa.id} perdido; o resultado será descartado")
+                    return
+            except Exception as e:
+                logger.warning(f"Fila: erro no heartbeat da tarefa {tarefa.id}: {e}")
+
+    def executar_tarefa(self, tarefa: Tarefa):
+        self.tarefa_atual = tarefa
+        fim = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(tarefa, fim), daemon=True)
+        heartbeat.start()
+        logger.info(f"Fila: {self.nome} processando {tarefa.data} (lote {tarefa.lote}, tentativa {tarefa.tentativas})")
+        try:
+            encontradas, enviadas = self.processar(tarefa)
+        except Exception as e:
+            logger.error(f"Fila: tarefa {tarefa.id} ({tarefa.data}) falhou: {e}")
+            fim.set()
+            FILA_TAREFAS.labels("erro").inc()
+            try:
+                self.fila.falhar(tarefa, self.nome, str(e))
+            except Exception as erro_fila:
+                # Postgres fora: a tarefa volta à fila quando o lease expirar
+                logger.error(f"Fila: erro ao registrar a falha da tarefa {tarefa.id}: {erro_fila}")
+        else:
+            fim.set()
+            try:
+                concluida = self.fila.concluir(tarefa, self.nome, encontradas, enviadas)
+            except Exception as e:
+                # Como um lease perdido: outra réplica refaz a data quando o lease expirar
+                logger.error(f"Fila: erro ao concluir a tarefa {tarefa.id}: {e}")
+                concluida = False
+            FILA_TAREFAS.labels("concluida" if concluida else "lease_perdido").inc()
+        finally:
+            heartbeat.join()
+            self.tarefa_atual = None
+            self.processadas += 1
+
+    def _laco(self):
+        while not self.encerrar.is_set():
+            # Busca interativa nesta réplica: não pega trabalho novo até ela terminar
+            preempcao.ceder(self.encerrar, "fila")
+            if self.encerrar.is_set():
+                break
+            try:
+                tarefa = self.fila.reivindicar(self.nome)
+            except Exception as e:
+                logger.error(f"Fila: erro ao reivindicar tarefa: {e}")
+                tarefa = None
+            if tarefa is None:
+                self.encerrar.wait(self.espera_s)
+                continue
+            self.executar_tarefa(tarefa)
+
+    def iniciar(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.encerrar.clear()
+            self.thread = threading.Thread(target=self._laco, name="fila-trabalho", daemon=True)
+            self.thread.start()
+            logger.info(f"Fila: trabalhador {self.nome} ativo")
+
+    def parar(self, timeout: float = 5.0):
+        self.encerrar.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+
+_fila_global: Optional[FilaTrabalho] = None
+_fila_lock = threading.Lock()
+
+
+def obter_fila() -> Optional[FilaTrabalho]:
+    """
+    Fila compartilhada pelo processo, criada (com a tabela) na primeira chamada
+    Retorna None se desabilitada (FILA_DATABASE_URL vazio) ou se o Postgres falhar
+    """
+    global _fila_global
+
+    with _fila_lock:
+        if _fila_global is not None:
+            return _fila_global
+
+        dsn = os.getenv("FILA_DATABASE_URL", "")
+        if not dsn:
+            return None
+
+        try:
+            _fila_global = FilaTrabalho(
+                dsn,
+                lease_s=float(os.getenv("FILA_LEASE_S", "300")),
+                max_tentativas=int(os.getenv("FILA_MAX_TENTATIVAS", "3")),
+            )
+        except Exception as e:
+            logger.error(f"Erro ao abrir fila de trabalho: {e}")
+            return None
+        return _fila_global
@@ -0,0 +1,171 @@
+"""
+Índice textual local das publicações coletadas
+
+Guarda o texto de cada elemento de publicação das páginas de resultado do
+DJE em SQLite, com uma tabela FTS5 para busca por termos, e registra quais
+datas foram coletadas por completo (todas as páginas, sem falha). Buscas
+personalizadas sobre datas cobertas são respondidas daqui, sem abrir o
+navegador; só as datas sem cobertura são raspadas no DJE.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from estado import DIRETORIO_DADOS
+
+logger = logging.getLogger(__name__)
+
+# consultaSimples.do por dtDiario traz todos os cadernos do dia
+CADERNO_TODOS = "todos"
+
+
+def _dia(valor) -> str:
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    return valor.isoformat() if isinstance(valor, date) else str(valor)[:10]
+
+
+def _consulta_fts(termos: Iterable[str]) -> str:
+    """Termos como frases FTS5 unidas por OR (aspas escapadas)"""
+    frases = ['"{}"'.format(termo.replace('"', '""')) for termo in termos if termo.strip()]
+    return " OR ".join(frases)
+
+
+class IndiceTextual:
+    """Textos das publicações por data e caderno, com busca FTS5 e cobertura de datas"""
+
+    def __init__(self, caminho: str):
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self.caminho = caminho
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS publicacoes (
+                id INTEGER PRIMARY KEY,
+                data TEXT NOT NULL,
+                caderno TEXT NOT NULL,
+                posicao INTEGER NOT NULL,
+                numero_processo TEXT NOT NULL,
+                texto TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS publicacoes_data ON publicacoes (data, caderno, posicao);
+            CREATE VIRTUAL TABLE IF NOT EXISTS publicacoes_fts USING fts5(
+                texto, content='publicacoes', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS publicacoes_ai AFTER INSERT ON publicacoes BEGIN
+                INSERT INTO publicacoes_fts (rowid, texto) VALUES (new.id, new.texto);
+            END;
+            CREATE TRIGGER IF NOT EXISTS publicacoes_ad AFTER DELETE ON publicacoes BEGIN
+                INSERT INTO publicacoes_fts (publicacoes_fts, rowid, texto) VALUES ('delete', old.id, old.texto);
+            END;
+            CREATE TABLE IF NOT EXISTS cobertura (
+                data TEXT NOT NULL,
+                caderno TEXT NOT NULL,
+                elementos INTEGER NOT NULL,
+                paginas INTEGER NOT NULL,
+                atualizado_em TEXT NOT NULL,
+                PRIMARY KEY (data, caderno)
+            );
+        """)
+        self.conn.commit()
+
+        total = self.conn.execute("SELECT COUNT(*) FROM cobertura").fetchone()[0]
+        logger.info(f"Índice textual carregado: {total} data(s) cobertas ({caminho})")
+
+    def registrar_data(self, data, textos: List[Tuple[str, str]], paginas: int, caderno: str = CADERNO_TODOS):
+        """
+        Substitui os textos da data pelos da coleta completa e marca a data como coberta
+        textos são pares (numero_processo, texto) na ordem em que apareceram
+        """
+        dia = _dia(data)
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM publicacoes WHERE data = ? AND caderno = ?", (dia, caderno))
+            self.conn.executemany(
+                "INSERT INTO publicacoes (data, caderno, posicao, numero_processo, texto) VALUES (?, ?, ?, ?, ?)",
+                [(dia, caderno, posicao, numero, texto) for posicao, (numero, texto) in enumerate(textos)],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cobertura (data, caderno, elementos, paginas, atualizado_em) VALUES (?, ?, ?, ?, ?)",
+                (dia, caderno, len(textos), paginas, datetime.now().isoformat()),
+            )
+
+    def datas_cobertas(self, data_inicio, data_fim, caderno: str = CADERNO_TODOS) -> Set[str]:
+        with self.lock:
+            linhas = self.conn.execute(
+                "SELECT data FROM cobertura WHERE caderno = ? AND data BETWEEN ? AND ?",
+                (caderno, _dia(data_inicio), _dia(data_fim)),
+            ).fetchall()
+        return {dia for (dia,) in linhas}
+
+    def cobertura(self, data_inicio, data_fim, caderno: str = CADERNO_TODOS) -> Dict[str, List[str]]:
+        """Datas do intervalo com e sem coleta completa"""
+        cobertas = self.datas_cobertas(data_inicio, data_fim, caderno)
+        inicio = date.fromisoformat(_dia(data_inicio))
+        fim = date.fromisoformat(_dia(data_fim))
+        todas = [(inicio + timedelta(days=i)).isoformat() for i in range((fim - inicio).days + 1)]
+        return {
+            "cobertas": [dia for dia in todas if dia in cobertas],
+            "pendentes": [dia for dia in todas if dia not in cobertas],
+        }
+
+    def textos_da_data(self, data, caderno: str = CADERNO_TODOS) -> List[Tuple[str, str]]:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT numero_processo, texto FROM publicacoes WHERE data = ? AND caderno = ? ORDER BY posicao",
+                (_dia(data), caderno),
+            ).fetchall()
+
+    def buscar(self, termos: Iterable[str], data_inicio, data_fim, limite: int = 100) -> List[Dict]:
+        """Publicações do intervalo que contêm algum dos termos, por relevância (bm25)"""
+        consulta = _consulta_fts(termos)
+        if not consulta:
+            return []
+        with self.lock:
+            linhas = self.conn.execute(
+                """
+                SELECT p.numero_processo, p.data, p.caderno, snippet(publicacoes_fts, 0, '[', ']', '…', 24)
+                FROM publicacoes_fts JOIN publicacoes p ON p.id = publicacoes_fts.rowid
+                WHERE publicacoes_fts MATCH ? AND p.data BETWEEN ? AND ?
+                ORDER BY bm25(publicacoes_fts)
+                LIMIT ?
+                """,
+                (consulta, _dia(data_inicio), _dia(data_fim), limite),
+            ).fetchall()
+        return [
+            {"numeroProcesso": numero, "data": dia, "caderno": caderno, "trecho": trecho}
+            for numero, dia, caderno, trecho in linhas
+        ]
+
+
+_indice_global: Optional[IndiceTextual] = None
+_indice_lock = threading.Lock()
+
+
+def obter_indice_textual() -> Optional[IndiceTextual]:
+    """
+    Índice compartilhado pelo processo, aberto na primeira chamada
+    Retorna None se desabilitado (INDICE_TEXTUAL_PATH vazio) ou se o disco falhar
+    """
+    global _indice_global
+
+    with _indice_lock:
+        if _indice_global is not None:
+            return _indice_global
+
+        caminho = os.getenv("INDICE_TEXTUAL_PATH", os.path.join(DIRETORIO_DADOS, "indice_textual.db"))
+        if not caminho:
+            return None
+
+        try:
+            _indice_global = IndiceTextual(caminho)
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao abrir índice textual: {e}")
+            return None
+        return _indice_global
@@ -0,0 +1,128 @@
+"""
+Timeouts adaptativos a partir da latência observada do DJE
+
+Cada operação (carregamento de página, espera por elemento, download de
+página de resultado...) guarda as últimas LATENCIA_JANELA durações e o
+timeout passa a ser TIMEOUT_FATOR vezes o p99 delas, dentro dos limites da
+operação. Com o DJE saudável, falhas são detectadas em segundos; num dia
+lento, o timeout cresce em vez de disparar o fallback à toa. Esperas que
+estouram entram na janela com o próprio timeout, para que uma piora de
+latência empurre o timeout para cima. Até juntar TIMEOUT_MIN_AMOSTRAS
+amostras vale o valor padrão (os antigos fixos). TIMEOUT_ADAPTATIVO=false
+volta aos fixos. Percentis e timeouts em vigor são exportados em /metrics.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, NamedTuple, Optional
+
+import aiohttp
+import requests
+from selenium.common.exceptions import WebDriverException
+
+from metricas import LATENCIA_PERCENTIL, TIMEOUT_ATUAL, TIMEOUTS_ESTOURADOS
+
+QUANTIS = (0.5, 0.95, 0.99)
+
+
+class Limites(NamedTuple):
+    padrao: float
+    minimo: float
+    maximo: float
+
+
+# Padrão = timeout fixo usado antes
+LIMITES = {
+    "page_load": Limites(45, 10, 120),
+    "element_wait": Limites(10, 3, 30),
+    "implicit_wait": Limites(5, 1, 10),
+    "ready_state": Limites(10, 3, 30),
+    "page_fetch": Limites(30, 5, 90),
+}
+# Operações sem medição própria usam as amostras de outra
+SERIES = {"implicit_wait": "element_wait"}
+# Falhas da própria operação; cancelamento (JobCancelado) e KeyboardInterrupt não são estouro
+ERROS_OPERACAO = (TimeoutError, WebDriverException, requests.RequestException, aiohttp.ClientError)
+
+
+def quantil(ordenadas, q: float) -> float:
+    """Quantil por posição (nearest-rank) de uma lista já ordenada"""
+    return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))]
+
+
+class RastreadorLatencias:
+    """Janelas de latência por operação, compartilhadas por todos os scrapers do processo"""
+
+    def __init__(self, engine: str = "selenium", janela: int = 200, min_amostras: int = 20,
+                 fator: float = 2.0, adaptativo: bool = True):
+        self.engine = engine
+        self.janela = janela
+        self.min_amostras = min_amostras
+        self.fator = fator
+        self.adaptativo = adaptativo
+        self.amostras: Dict[str, Deque[float]] = {}
+        self.lock = threading.Lock()
+
+    def registrar(self, operacao: str, segundos: float, estourou: bool = False):
+        with self.lock:
+            amostras = self.amostras.setdefault(operacao, deque(maxlen=self.janela))
+            amostras.append(segundos)
+            ordenadas = sorted(amostras)
+        for q in QUANTIS:
+            LATENCIA_PERCENTIL.labels(operacao, str(q), self.engine).set(quantil(ordenadas, q))
+        if estourou:
+            TIMEOUTS_ESTOURADOS.labels(operacao, self.engine).inc()
+
+    def percentis(self, operacao: str) -> Optional[Dict[str, float]]:
+        with self.lock:
+            ordenadas = sorted(self.amostras.get(operacao, ()))
+        if not ordenadas:
+            return None
+        return {f"p{int(q * 100)}": round(quantil(ordenadas, q), 3) for q in QUANTIS}
+
+    def timeout(self, operacao: str) -> float:
+        """fator x p99 da operação dentro dos seus limites; o padrão enquanto houver poucas amostras"""
+        limites = LIMITES[operacao]
+        valor = limites.padrao
+        with self.lock:
+            amostras = self.amostras.get(SERIES.get(operacao, operacao))
+            if self.adaptativo and amostras and len(amostras) >= self.min_amostras:
+                valor = min(limites.maximo, max(limites.minimo, self.fator * quantil(sorted(amostras), 0.99)))
+        TIMEOUT_ATUAL.labels(operacao, self.engine).set(valor)
+        return valor
+
+    @contextmanager
+    def medir(self, operacao: str, timeout: float):
+        """
+        Registra a duração do bloco; se ele falhar (ERROS_OPERACAO) depois de gastar
+        o timeout inteiro, conta como estouro. Falhas rápidas (conexão recusada) não entram
+        """
+        inicio = time.monotonic()
+        try:
+            yield
+        except ERROS_OPERACAO:
+            duracao = time.monotonic() - inicio
+            if duracao >= timeout * 0.95:
+                self.registrar(operacao, duracao, estourou=True)
+            raise
+        self.registrar(operacao, time.monotonic() - inicio)
+
+    def estatisticas(self) -> Dict[str, Dict]:
+        with self.lock:
+            operacoes = list(self.amostras)
+        return {
+            operacao: {"amostras": len(self.amostras[operacao]), "timeout_s": round(self.timeout(operacao), 2),
+                       **(self.percentis(operacao) or {})}
+            for operacao in operacoes
+        }
+
+
+latencias = RastreadorLatencias(
+    janela=int(os.getenv("LATENCIA_JANELA", "200")),
+    min_amostras=int(os.getenv("TIMEOUT_MIN_AMOSTRAS", "20")),
+    fator=float(os.getenv("TIMEOUT_FATOR", "2")),
+    adaptativo=os.getenv("TIMEOUT_ADAPTATIVO", "true").lower() in ("1", "true", "yes"),
+)
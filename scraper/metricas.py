@@ -0,0 +1,199 @@
+"""
+Métricas Prometheus do serviço de scraping
+
+Histogramas de latência por etapa (driver, verificação do site, submissão do
+formulário, parse, extração de campos, envio para API), jobs em andamento e
+estado do rate limiting, do cache de buscas, da caixa de saída, da fila
+distribuída e da preempção de backfills, além dos percentis de latência e
+dos timeouts adaptativos. Exportadas em GET /metrics.
+"""
+
+import time
+import asyncio
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+BUCKETS_ETAPA = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+BUCKETS_CAMPO = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+DURACAO_ETAPA = Histogram(
+    'dje_stage_duration_seconds',
+    'Duração de cada etapa do scraping',
+    ['stage', 'engine', 'endpoint'],
+    buckets=BUCKETS_ETAPA
+)
+ERROS_ETAPA = Counter(
+    'dje_stage_errors_total',
+    'Exceções lançadas por etapa do scraping',
+    ['stage', 'engine', 'endpoint']
+)
+DURACAO_CAMPO = Histogram(
+    'dje_field_extraction_seconds',
+    'Duração da extração de cada campo da publicação',
+    ['field', 'engine', 'endpoint'],
+    buckets=BUCKETS_CAMPO
+)
+JOBS_EM_ANDAMENTO = Gauge(
+    'dje_jobs_in_flight',
+    'Jobs de scraping em execução',
+    ['endpoint', 'engine']
+)
+JOBS_TOTAL = Counter(
+    'dje_jobs_total',
+    'Jobs de scraping finalizados',
+    ['endpoint', 'engine', 'status']
+)
+RATE_LIMIT_INTERVALO = Gauge(
+    'dje_rate_limiter_delay_seconds',
+    'Intervalo configurado do rate limiting em cada ponto',
+    ['point', 'engine']
+)
+RATE_LIMIT_AGUARDANDO = Gauge(
+    'dje_rate_limiter_waiting',
+    'Tarefas aguardando no rate limiting neste momento',
+    ['point', 'engine']
+)
+RATE_LIMIT_ESPERA_TOTAL = Counter(
+    'dje_rate_limiter_wait_seconds_total',
+    'Tempo total gasto aguardando o rate limiting',
+    ['point', 'engine', 'endpoint']
+)
+CACHE_BUSCAS_CONSULTAS = Counter(
+    'dje_search_cache_lookups_total',
+    'Consultas ao cache de resultados por data da busca personalizada',
+    ['result']
+)
+CACHE_BUSCAS_BYTES = Gauge(
+    'dje_search_cache_bytes',
+    'Tamanho estimado dos resultados guardados no cache da busca personalizada'
+)
+CAIXA_SAIDA_PENDENTES = Gauge(
+    'dje_outbox_pending',
+    'Publicações na caixa de saída aguardando entrega à API'
+)
+FILA_TAREFAS = Counter(
+    'dje_queue_tasks_total',
+    'Tarefas da fila distribuída processadas por esta réplica',
+    ['result']
+)
+CAIXA_SAIDA_ENTREGAS = Counter(
+    'dje_outbox_deliveries_total',
+    'Publicações processadas pelo esvaziador da caixa de saída',
+    ['result']
+)
+PREEMPCAO_ESPERA = Counter(
+    'dje_backfill_preempted_seconds_total',
+    'Tempo que backfills ficaram parados cedendo a vez a buscas interativas',
+    ['point']
+)
+JOBS_CANCELADOS = Counter(
+    'dje_jobs_cancelled_total',
+    'Jobs interrompidos antes do fim, por cancelamento (/jobs/cancelar) ou prazo esgotado',
+    ['endpoint', 'reason']
+)
+LATENCIA_PERCENTIL = Gauge(
+    'dje_operation_latency_seconds',
+    'Percentis da latência recente de cada operação junto ao DJE (janela deslizante)',
+    ['operation', 'quantile', 'engine']
+)
+TIMEOUT_ATUAL = Gauge(
+    'dje_adaptive_timeout_seconds',
+    'Timeout em vigor para cada operação, derivado dos percentis de latência',
+    ['operation', 'engine']
+)
+TIMEOUTS_ESTOURADOS = Counter(
+    'dje_operation_timeouts_total',
+    'Operações que gastaram o timeout inteiro sem concluir',
+    ['operation', 'engine']
+)
+
+
+@contextmanager
+def medir(etapa: str, engine: str, endpoint: str):
+    """Observa a duração do bloco na etapa informada; cancelamentos (JobCancelado, Ctrl+C) não contam como erro"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERROS_ETAPA.labels(etapa, engine, endpoint).inc()
+        raise
+    finally:
+        DURACAO_ETAPA.labels(etapa, engine, endpoint).observe(time.perf_counter() - inicio)
+
+
+def medir_etapa(etapa: str):
+    """
+    Decorator para métodos do scraper (sync ou async)
+    Usa self.engine e self.endpoint como labels
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper_async(self, *args, **kwargs):
+                with medir(etapa, self.engine, self.endpoint):
+                    return await func(self, *args, **kwargs)
+            return wrapper_async
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with medir(etapa, self.engine, self.endpoint):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def medir_campo(campo: str):
+    """Decorator para as funções extrair_* (custo mínimo: uma observação por chamada)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                DURACAO_CAMPO.labels(campo, self.engine, self.endpoint).observe(time.perf_counter() - inicio)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def job_em_andamento(endpoint: str, engine: str = "selenium"):
+    """Conta o job como em andamento e registra o resultado ao final"""
+    JOBS_EM_ANDAMENTO.labels(endpoint, engine).inc()
+    status = "error"
+    try:
+        yield
+        status = "success"
+    finally:
+        JOBS_EM_ANDAMENTO.labels(endpoint, engine).dec()
+        JOBS_TOTAL.labels(endpoint, engine, status).inc()
+
+
+def pausa(segundos: float, ponto: str, engine: str, endpoint: str, esperar: Optional[Callable[[float], Any]] = None):
+    """time.sleep do rate limiting, exposto nas métricas; esperar troca o sleep (ex.: TokenCancelamento.esperar)"""
+    RATE_LIMIT_INTERVALO.labels(ponto, engine).set(segundos)
+    RATE_LIMIT_AGUARDANDO.labels(ponto, engine).inc()
+    try:
+        (esperar or time.sleep)(segundos)
+    finally:
+        RATE_LIMIT_AGUARDANDO.labels(ponto, engine).dec()
+        RATE_LIMIT_ESPERA_TOTAL.labels(ponto, engine, endpoint).inc(segundos)
+
+
+async def pausa_async(segundos: float, ponto: str, engine: str, endpoint: str):
+    """asyncio.sleep do rate limiting, exposto nas métricas"""
+    RATE_LIMIT_INTERVALO.labels(ponto, engine).set(segundos)
+    RATE_LIMIT_AGUARDANDO.labels(ponto, engine).inc()
+    try:
+        await asyncio.sleep(segundos)
+    finally:
+        RATE_LIMIT_AGUARDANDO.labels(ponto, engine).dec()
+        RATE_LIMIT_ESPERA_TOTAL.labels(ponto, engine, endpoint).inc(segundos)
+
+
+def exportar():
+    """Corpo e content-type da resposta de /metrics"""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,206 @@
+"""
+Paginação dos resultados do DJE-TJSP
+
+Descobre quantas páginas de resultado uma consulta tem e coleta todas elas.
+Quando os links de página são URLs comuns, as páginas restantes são baixadas
+em paralelo com os cookies da sessão do navegador; quando a paginação é feita
+por JavaScript (trocaDePg), as páginas são percorridas em sequência no driver.
+Os timeouts dos downloads e da troca de página são os adaptativos de latencias.py,
+limitados ao prazo do job; um job cancelado para entre uma página e outra.
+"""
+
+import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlparse, parse_qsl, urlencode, urlunparse
+
+import requests
+from bs4 import BeautifulSoup
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+from cancelamento import TokenCancelamento
+from latencias import latencias
+
+logger = logging.getLogger(__name__)
+
+PADRAO_RESULTADOS = re.compile(r'Resultados?\s+(\d+)\s+a\s+(\d+)\s+de\s+(\d+)', re.IGNORECASE)
+PADRAO_FUNCAO_JS = re.compile(r'(trocaDePg\w*)\(\s*[\'"]?(\d+)[\'"]?\s*\)')
+PARAMETROS_PAGINA = ('pagina', 'paginaAtual', 'nuPagina', 'pg', 'page')
+
+
+@dataclass
+class InfoPaginacao:
+    total_paginas: int = 1
+    url_modelo: Optional[str] = None
+    parametro: Optional[str] = None
+    funcao_js: Optional[str] = None
+
+    def url_pagina(self, numero: int) -> Optional[str]:
+        if not self.url_modelo or not self.parametro:
+            return None
+        partes = urlparse(self.url_modelo)
+        query = [(k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True) if k != self.parametro]
+        query.append((self.parametro, str(numero)))
+        return urlunparse(partes._replace(query=urlencode(query)))
+
+
+def _parametro_pagina(url: str) -> Tuple[Optional[str], Optional[int]]:
+    for chave, valor in parse_qsl(urlparse(url).query, keep_blank_values=True):
+        if chave in PARAMETROS_PAGINA and valor.isdigit():
+            return chave, int(valor)
+    return None, None
+
+
+def descobrir_paginacao(soup: BeautifulSoup, url_atual: str) -> InfoPaginacao:
+    """Identifica o total de páginas e como chegar a cada uma a partir da primeira página"""
+    info = InfoPaginacao()
+    maior_pagina = 1
+
+    for link in soup.find_all('a'):
+        alvo = f"{link.get('href', '')} {link.get('onclick', '')}"
+
+        match_js = PADRAO_FUNCAO_JS.search(alvo)
+        if match_js:
+            info.funcao_js = match_js.group(1)
+            maior_pagina = max(maior_pagina, int(match_js.group(2)))
+            continue
+
+        href = link.get('href')
+        if not href or href.startswith('#') or href.lower().startswith('javascript'):
+            continue
+        parametro, numero = _parametro_pagina(href)
+        if parametro:
+            info.parametro = parametro
+            info.url_modelo = urljoin(url_atual, href)
+            maior_pagina = max(maior_pagina, numero)
+
+    # A barra de páginas costuma mostrar só uma janela; o total de resultados é mais confiável
+    match_total = PADRAO_RESULTADOS.search(soup.get_text(' '))
+    if match_total:
+        primeiro, ultimo, total = (int(g) for g in match_total.groups())
+        por_pagina = ultimo - primeiro + 1
+        if por_pagina > 0:
+            maior_pagina = max(maior_pagina, -(-total // por_pagina))
+
+    if info.url_modelo or info.funcao_js:
+        info.total_paginas = maior_pagina
+    return info
+
+
+class RastreadorPaginacao:
+    """Coleta todas as páginas de resultado a partir da página atual do driver"""
+
+    def __init__(self, driver, max_paginas: Optional[int] = None, concorrencia: Optional[int] = None,
+                 cancelamento: Optional[TokenCancelamento] = None):
+        self.driver = driver
+        self.cancelamento = cancelamento or TokenCancelamento()
+        self.max_paginas = max_paginas if max_paginas is not None else int(os.getenv("PAGINACAO_MAX_PAGINAS", "50"))
+        self.concorrencia = concorrencia if concorrencia is not None else int(os.getenv("PAGINACAO_CONCORRENCIA", "3"))
+        self.paginas_com_falha = 0
+        self.paginas_navegador = 0
+        # Consulta com mais páginas que max_paginas: o resultado não é a data completa
+        self.truncada = False
+        self.html_paginas: List[str] = []
+
+    def coletar(self) -> List[BeautifulSoup]:
+        """Retorna as páginas de resultado já parseadas, a primeira sendo a atual"""
+        _, primeira, restantes = self._coletar()
+        return [primeira] + [BeautifulSoup(html, 'html.parser') for html in restantes]
+
+    def coletar_html(self) -> List[str]:
+        """HTML bruto das páginas de resultado, para parse fora da thread do job"""
+        html_primeira, _, restantes = self._coletar()
+        return [html_primeira] + restantes
+
+    def _coletar(self) -> Tuple[str, BeautifulSoup, List[str]]:
+        html_primeira, primeira, restantes = self._coletar_paginas()
+        self.html_paginas = [html_primeira] + restantes
+        return html_primeira, primeira, restantes
+
+    def _coletar_paginas(self) -> Tuple[str, BeautifulSoup, List[str]]:
+        html_primeira = self.driver.page_source
+        primeira = BeautifulSoup(html_primeira, 'html.parser')
+        info = descobrir_paginacao(primeira, self.driver.current_url)
+        total = min(info.total_paginas, self.max_paginas) if self.max_paginas > 0 else info.total_paginas
+
+        if info.total_paginas > total:
+            self.truncada = True
+            logger.warning(f"Consulta tem {info.total_paginas} páginas; limitando a {total}")
+        if total <= 1:
+            return html_primeira, primeira, []
+
+        logger.info(f"Paginação detectada: {total} páginas")
+        if info.url_modelo:
+            restantes = self._baixar_urls(info, total)
+        else:
+            restantes = self._percorrer_javascript(info, total)
+        return html_primeira, primeira, restantes
+
+    def _criar_sessao(self) -> requests.Session:
+        sessao = requests.Session()
+        for cookie in self.driver.get_cookies():
+            sessao.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        try:
+            sessao.headers['User-Agent'] = self.driver.execute_script("return navigator.userAgent")
+        except Exception:
+            pass
+        return sessao
+
+    def _baixar_urls(self, info: InfoPaginacao, total: int) -> List[str]:
+        sessao = self._criar_sessao()
+
+        def baixar(numero: int) -> Optional[str]:
+            # JobCancelado aqui reaparece no executor.map e as páginas ainda na fila nem saem
+            self.cancelamento.verificar()
+            url = info.url_pagina(numero)
+            timeout = latencias.timeout("page_fetch")
+            try:
+                with latencias.medir("page_fetch", timeout):
+                    response = sessao.get(url, timeout=self.cancelamento.limitar(timeout))
+                response.raise_for_status()
+                return response.text
+            except Exception as e:
+                logger.warning(f"Falha ao baixar página {numero} ({url}): {e}")
+                return None
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.concorrencia)) as executor:
+                resultados = list(executor.map(baixar, range(2, total + 1)))
+        finally:
+            sessao.close()
+
+        self.paginas_com_falha += sum(1 for html in resultados if html is None)
+        return [html for html in resultados if html is not None]
+
+    def _percorrer_javascript(self, info: InfoPaginacao, total: int) -> List[str]:
+        def carregada(driver) -> bool:
+            self.cancelamento.verificar()
+            return driver.execute_script("return document.readyState") == "complete"
+
+        paginas = []
+        for numero in range(2, total + 1):
+            self.cancelamento.verificar()
+            try:
+                self.driver.execute_script(f"{info.funcao_js}({numero});")
+                timeout = latencias.timeout("ready_state")
+                with latencias.medir("ready_state", timeout):
+                    WebDriverWait(self.driver, self.cancelamento.limitar(timeout)).until(carregada)
+                self.cancelamento.esperar(1)
+                self.cancelamento.verificar()
+                self.paginas_navegador += 1
+                paginas.append(self.driver.page_source)
+            except TimeoutException:
+                self.cancelamento.verificar()
+                logger.warning(f"Timeout ao carregar página {numero}")
+                self.paginas_com_falha += 1
+            except Exception as e:
+                # Navegador derrubado pelo cancelamento: não é falha de página
+                self.cancelamento.verificar()
+                logger.warning(f"Falha ao navegar para página {numero}: {e}")
+                self.paginas_com_falha += total - numero + 1
+                break
+        return paginas
@@ -0,0 +1,203 @@
+"""
+Perfilamento sob demanda dos jobs de scraping
+
+Ativado por job (campo "profile" no JSON da requisição) ou globalmente
+(SCRAPER_PROFILE). Dois modos:
+- sampling: amostra a pilha da thread do job em intervalo fixo (tempo de
+  parede, então sleeps e esperas no DJE aparecem) e grava pilhas no formato
+  "folded", pronto para flamegraph.pl / speedscope
+- deterministic: cProfile da thread do job, gravado em .pstats
+
+Nos dois modos o tracemalloc registra os maiores pontos de alocação.
+Sem perfilamento solicitado, nada é instalado e o custo é zero.
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MODOS = ("sampling", "deterministic")
+DIRETORIO_PERFIS = os.getenv("SCRAPER_PROFILE_DIR", "/tmp/juscash-profiles")
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_usuarios = 0
+
+
+def modo_solicitado(dados: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Modo de perfilamento pedido na requisição ou em SCRAPER_PROFILE, ou None"""
+    valor = (dados or {}).get("profile")
+    if valor in (None, False, "", 0):
+        valor = os.getenv("SCRAPER_PROFILE", "")
+    if valor in (None, False, "", 0, "0", "false"):
+        return None
+    if valor in (True, 1, "1", "true"):
+        return "sampling"
+    return valor if valor in MODOS else "sampling"
+
+
+def criar_perfilador(dados: Optional[Dict[str, Any]], endpoint: str) -> Optional["PerfiladorJob"]:
+    modo = modo_solicitado(dados)
+    return PerfiladorJob(modo, endpoint) if modo else None
+
+
+def contexto(perfilador: Optional["PerfiladorJob"]):
+    """Context manager do job: o próprio perfilador ou um nullcontext"""
+    return perfilador if perfilador is not None else nullcontext()
+
+
+def _iniciar_tracemalloc():
+    global _tracemalloc_usuarios
+    with _tracemalloc_lock:
+        if _tracemalloc_usuarios == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+        _tracemalloc_usuarios += 1
+
+
+def _parar_tracemalloc():
+    global _tracemalloc_usuarios
+    with _tracemalloc_lock:
+        _tracemalloc_usuarios -= 1
+        if _tracemalloc_usuarios == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class AmostradorPilha(threading.Thread):
+    """Thread que amostra a pilha de outra thread via sys._current_frames"""
+
+    def __init__(self, thread_id: int, intervalo: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.intervalo = intervalo
+        self.pilhas: Counter = Counter()
+        self.amostras = 0
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            pilha = []
+            while frame is not None:
+                codigo = frame.f_code
+                pilha.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+                frame = frame.f_back
+            self.pilhas[";".join(reversed(pilha))] += 1
+            self.amostras += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+class PerfiladorJob:
+    """Perfila o job executado dentro do bloco with, na thread que entra no bloco"""
+
+    def __init__(self, modo: str, endpoint: str):
+        self.modo = modo
+        self.endpoint = endpoint
+        self.job_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.diretorio = os.path.join(DIRETORIO_PERFIS, self.job_id)
+        self.intervalo = float(os.getenv("SCRAPER_PROFILE_INTERVALO_MS", "5")) / 1000
+        self._perfil: Optional[cProfile.Profile] = None
+        self._amostrador: Optional[AmostradorPilha] = None
+        self._inicio = 0.0
+
+    def __enter__(self):
+        logger.info(f"Perfilamento ({self.modo}) ativado para job {self.job_id}")
+        _iniciar_tracemalloc()
+        tracemalloc.reset_peak()
+
+        if self.modo == "deterministic":
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        else:
+            self._amostrador = AmostradorPilha(threading.get_ident(), self.intervalo)
+            self._amostrador.start()
+
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duracao = time.perf_counter() - self._inicio
+        if self._perfil:
+            self._perfil.disable()
+        if self._amostrador:
+            self._amostrador.parar()
+
+        try:
+            self._salvar(duracao, exc_val)
+        except Exception as e:
+            logger.error(f"Erro ao salvar perfil do job {self.job_id}: {e}")
+        finally:
+            _parar_tracemalloc()
+        return False
+
+    def _salvar(self, duracao: float, erro: Optional[BaseException]):
+        os.makedirs(self.diretorio, exist_ok=True)
+        arquivos = []
+
+        if self._perfil:
+            self._perfil.dump_stats(os.path.join(self.diretorio, "perfil.pstats"))
+            texto = io.StringIO()
+            pstats.Stats(self._perfil, stream=texto).sort_stats("cumulative").print_stats(60)
+            with open(os.path.join(self.diretorio, "perfil_top.txt"), "w") as f:
+                f.write(texto.getvalue())
+            arquivos += ["perfil.pstats", "perfil_top.txt"]
+
+        if self._amostrador:
+            with open(os.path.join(self.diretorio, "pilhas.folded"), "w") as f:
+                for pilha, contagem in self._amostrador.pilhas.most_common():
+                    f.write(f"{pilha} {contagem}\n")
+            arquivos.append("pilhas.folded")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        atual, pico = tracemalloc.get_traced_memory()
+        with open(os.path.join(self.diretorio, "memoria.txt"), "w") as f:
+            f.write(f"Memória rastreada ao final: {atual / 1024 / 1024:.1f}MB | pico: {pico / 1024 / 1024:.1f}MB\n\n")
+            f.write("Maiores pontos de alocação ainda vivos:\n")
+            for estatistica in snapshot.statistics("lineno")[:30]:
+                f.write(f"{estatistica}\n")
+        arquivos.append("memoria.txt")
+
+        resumo = {
+            "job_id": self.job_id,
+            "endpoint": self.endpoint,
+            "modo": self.modo,
+            "duracao_segundos": round(duracao, 3),
+            "amostras": self._amostrador.amostras if self._amostrador else None,
+            "intervalo_amostragem_ms": self.intervalo * 1000 if self._amostrador else None,
+            "memoria_pico_mb": round(pico / 1024 / 1024, 1),
+            "erro": str(erro) if erro else None,
+            "arquivos": arquivos,
+            "criado_em": datetime.now().isoformat()
+        }
+        with open(os.path.join(self.diretorio, "resumo.json"), "w") as f:
+            json.dump(resumo, f, indent=2, ensure_ascii=False)
+
+        logger.info(f"Perfil do job {self.job_id} salvo em {self.diretorio}")
+
+
+def carregar_resumo(job_id: str) -> Optional[Dict[str, Any]]:
+    caminho = os.path.join(DIRETORIO_PERFIS, os.path.basename(job_id), "resumo.json")
+    if not os.path.isfile(caminho):
+        return None
+    with open(caminho) as f:
+        return json.load(f)
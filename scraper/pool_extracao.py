@@ -0,0 +1,106 @@
+"""
+Pool de processos para parse e extração das páginas de resultado
+
+BeautifulSoup e as regex de extração são CPU puro sob o GIL: com vários jobs
+no mesmo processo, todos disputam um núcleo. Com EXTRACAO_PROCESSOS > 0 (ou
+"auto", um processo por núcleo) cada página vai para um processo do pool
+como bytes de HTML e volta como tuplas de registro (extracao.py).
+
+Os processos usam "spawn": o serviço tem threads (Flask, amostradores) e o
+fork de um processo com threads não é seguro. Uma página que falha no pool
+é extraída na própria thread; se o pool quebrar, ele é recriado na próxima
+coleta.
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from extracao import RegistroPagina, extrair_registros_html
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def processos_configurados() -> int:
+    valor = os.getenv("EXTRACAO_PROCESSOS", "0").strip().lower()
+    if valor == "auto":
+        return os.cpu_count() or 1
+    try:
+        return max(0, int(valor or 0))
+    except ValueError:
+        logger.warning(f"EXTRACAO_PROCESSOS inválido ({valor}); extração na thread do job")
+        return 0
+
+
+def obter_pool() -> Optional[ProcessPoolExecutor]:
+    """Pool compartilhado pelo processo, criado na primeira chamada; None se desativado"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            processos = processos_configurados()
+            if processos <= 0:
+                return None
+            _pool = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Pool de extração iniciado com {processos} processo(s)")
+        return _pool
+
+
+def encerrar():
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def extrair_paginas(paginas_html: List[str], modo: str, data: datetime, termos_busca: Sequence[str],
+                    termos_padrao: Sequence[str]) -> Optional[List[List[RegistroPagina]]]:
+    """
+    Registros de cada página, na ordem das páginas, extraídos no pool
+    Uma página que falha no pool é extraída aqui mesmo; None se o pool estiver desativado
+    ou não aceitar as páginas (quem chama extrai todas na thread do job)
+    """
+    pool = obter_pool()
+    if pool is None:
+        return None
+
+    termos_busca, termos_padrao = tuple(termos_busca), tuple(termos_padrao)
+    paginas = [html.encode('utf-8') for html in paginas_html]
+    try:
+        futuros = [
+            pool.submit(extrair_registros_html, html, modo, data, termos_busca, termos_padrao) for html in paginas
+        ]
+    except Exception as e:
+        logger.error(f"Pool de extração indisponível ({e}); extraindo na thread do job")
+        _descartar(pool)
+        return None
+
+    registros = []
+    for numero, (html, futuro) in enumerate(zip(paginas, futuros), start=1):
+        try:
+            registros.append(futuro.result())
+        except Exception as e:
+            logger.error(f"Extração da página {numero} no pool falhou ({e}); extraindo na thread do job")
+            if isinstance(e, BrokenProcessPool):
+                _descartar(pool)
+            registros.append(extrair_registros_html(html, modo, data, termos_busca, termos_padrao))
+    return registros
+
+
+def _descartar(pool: ProcessPoolExecutor):
+    """Pool quebrado (processo morto) ou encerrado: recriado na próxima chamada"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
@@ -0,0 +1,98 @@
+"""
+Prioridade do trabalho de scraping e preempção de backfills
+
+O trabalho é ordenado pelos termos prioritários (RPV, pagamento pelo INSS) e
+pela recência: primeiro os dias úteis mais recentes, que trazem as
+publicações de maior valor; fins de semana (sem edição do DJE) vão por
+último. A mesma pontuação ordena as tarefas da fila distribuída, as datas de
+um backfill em processo e a caixa de saída.
+
+Buscas interativas (/busca-personalizada) têm precedência: enquanto uma
+estiver em andamento, os backfills deste processo param entre uma data e a
+próxima (preempcao.ceder) e as publicações da busca passam à frente na
+caixa de saída.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Union
+
+from extracao import TERMOS_PADRAO
+from metricas import PREEMPCAO_ESPERA
+
+TERMOS_PRIORITARIOS = ("RPV", "pagamento pelo INSS")
+
+# Na caixa de saída, publicações de buscas interativas vêm antes de qualquer backfill
+PRIORIDADE_INTERATIVA = 100
+
+
+def peso_termos(termos: Union[str, Iterable[str], None], prioritarios: Iterable[str] = TERMOS_PRIORITARIOS) -> int:
+    """Quantos termos prioritários o conjunto contém (texto separado por vírgula; vazio = termos padrão)"""
+    if isinstance(termos, str):
+        termos = termos.split(",")
+    conjunto = {termo.strip().lower() for termo in termos or () if termo.strip()}
+    if not conjunto:
+        conjunto = {termo.lower() for termo in TERMOS_PADRAO}
+    return sum(1 for termo in prioritarios if termo.lower() in conjunto)
+
+
+def dia_util(data: Union[date, datetime]) -> bool:
+    return data.weekday() < 5
+
+
+def prioridade_tarefa(data: Union[date, datetime], termos: Union[str, Iterable[str], None] = None,
+                      prioritarios: Iterable[str] = TERMOS_PRIORITARIOS) -> int:
+    """Termos prioritários primeiro, depois dias úteis; entre iguais, a data mais recente desempata"""
+    return 2 * peso_termos(termos, prioritarios) + int(dia_util(data))
+
+
+def ordenar_datas(data_inicio: datetime, data_fim: datetime) -> List[datetime]:
+    """Datas do período com os dias úteis mais recentes primeiro e os fins de semana no fim"""
+    datas = [data_inicio + timedelta(days=dias) for dias in range((data_fim - data_inicio).days + 1)]
+    return sorted(datas, key=lambda data: (dia_util(data), data), reverse=True)
+
+
+def prioridade_publicacao(termos_encontrados: Optional[str], interativa: bool = False,
+                          prioritarios: Iterable[str] = TERMOS_PRIORITARIOS) -> int:
+    """Prioridade na caixa de saída: buscas interativas, depois publicações com termos prioritários"""
+    peso = peso_termos(termos_encontrados, prioritarios) if termos_encontrados else 0
+    return (PRIORIDADE_INTERATIVA if interativa else 0) + peso
+
+
+class Preempcao:
+    """Conta as buscas interativas em andamento; backfills esperam enquanto houver alguma"""
+
+    def __init__(self):
+        self.condicao = threading.Condition()
+        self.interativas = 0
+
+    @contextmanager
+    def interativa(self):
+        with self.condicao:
+            self.interativas += 1
+        try:
+            yield
+        finally:
+            with self.condicao:
+                self.interativas -= 1
+                self.condicao.notify_all()
+
+    def ativa(self) -> bool:
+        return self.interativas > 0
+
+    def ceder(self, encerrar: Optional[threading.Event] = None, ponto: str = "entre_datas") -> float:
+        """Bloqueia o backfill enquanto houver busca interativa; devolve os segundos cedidos"""
+        if not self.interativas:
+            return 0.0
+        inicio = time.monotonic()
+        with self.condicao:
+            while self.interativas and not (encerrar and encerrar.is_set()):
+                self.condicao.wait(0.5)
+        espera = time.monotonic() - inicio
+        PREEMPCAO_ESPERA.labels(ponto).inc(espera)
+        return espera
+
+
+preempcao = Preempcao()
@@ -2,19 +2,23 @@
 """
 DJE-TJSP Scraper - Sistema de Busca de Publicações
 Desenvolvido para: Teste de Emprego JusCash
+
+A API HTTP fica em servico.py, que importa este módulo (selenium, bs4,
+aiohttp, requests) apenas quando o primeiro job de scraping precisa dele.
 """
 
 import os
+import sys
 import time
+import zlib
 import json
 import logging
 import re
 import asyncio
 import aiohttp
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from datetime import date, datetime, timedelta
+from dataclasses import dataclass, asdict, fields
 from typing import Dict, List, Optional, Any
-from flask import Flask, request, jsonify
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
@@ -22,28 +26,35 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
-import requests
-import threading
+from browser_memory import MonitorMemoriaNavegador, encerrar_arvore_processos, pid_do_driver
+from dedup_index import obter_indice
+from indice_textual import obter_indice_textual
+from cache_buscas import obter_cache
+from caixa_saida import obter_caixa_saida
+from arquivo_paginas import CONSULTA_SIMPLES, obter_arquivo
+from paginacao import RastreadorPaginacao
+from extracao import (CAMPOS_REGISTRO, MODO_PADRAO, MODO_PERSONALIZADO, TERMOS_PADRAO, ExtratorCampos,
+                      consolidar_registros, extrair_registros, registro_personalizado)
+import pool_extracao
+import exportacao_colunar
+from metricas import medir, medir_etapa, medir_campo, pausa, pausa_async
+from estado import DJE_BASE_URL, progresso_busca
+from latencias import latencias
+from prioridade import TERMOS_PRIORITARIOS, ordenar_datas, preempcao, prioridade_publicacao
+from cancelamento import JobCancelado, TokenCancelamento
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-progresso_busca = {
-    'ativa': False,
-    'data_atual': '',
-    'total_dias': 0,
-    'dias_processados': 0,
-    'publicacoes_encontradas': 0,
-    'termos_buscados': '',
-    'periodo': '',
-    'inicio': '',
-    'erro': None
-}
+# conteudo a partir deste número de caracteres fica comprimido em memória; 0 desativa
+CONTEUDO_COMPACTAR_A_PARTIR = int(os.getenv("CONTEUDO_COMPACTAR_A_PARTIR", "1024"))
+
+# Campos com poucos valores distintos: uma única cópia de cada string por processo
+CAMPOS_INTERNADOS = ("dataDisponibilizacao", "reu", "termosEncontrados", "fonte")
 
-@dataclass
-class PublicacaoReal:
+@dataclass(slots=True)
+class _CamposPublicacaoReal:
     numeroProcesso: str
     dataDisponibilizacao: str
     autores: str
@@ -57,17 +68,83 @@ class PublicacaoReal:
     termosEncontrados: Optional[str] = None
     fonte: str = "DJE-TJSP-REAL"
 
+    def __post_init__(self):
+        for campo in CAMPOS_INTERNADOS:
+            valor = getattr(self, campo)
+            if type(valor) is str:
+                setattr(self, campo, sys.intern(valor))
+
+class PublicacaoReal(_CamposPublicacaoReal):
+    """
+    Publicação com slots, campos repetidos internados e conteudo longo comprimido
+    Os campos são os de _CamposPublicacaoReal: asdict() e o acesso a conteudo
+    devolvem o texto original
+    """
+    __slots__ = ("_conteudo",)
+
+    def tamanho_em_memoria(self) -> int:
+        """Bytes estimados do registro e dos valores, com conteudo como está guardado"""
+        valores = [getattr(self, campo.name) for campo in fields(self) if campo.name != "conteudo"]
+        return sys.getsizeof(self) + sys.getsizeof(self._conteudo) + sum(sys.getsizeof(v) for v in valores if v is not None)
+
+    @property
+    def conteudo(self) -> str:
+        if type(self._conteudo) is bytes:
+            return zlib.decompress(self._conteudo).decode('utf-8')
+        return self._conteudo
+
+    @conteudo.setter
+    def conteudo(self, valor: str):
+        if CONTEUDO_COMPACTAR_A_PARTIR > 0 and type(valor) is str and len(valor) >= CONTEUDO_COMPACTAR_A_PARTIR:
+            comprimido = zlib.compress(valor.encode('utf-8'))
+            if len(comprimido) < len(valor):
+                valor = comprimido
+        self._conteudo = valor
+
 class RealDJEScraper:
-    def __init__(self):
+    engine = "selenium"
+    
+    def __init__(self, endpoint: str = "desconhecido"):
+        self.endpoint = endpoint
         self.api_url = os.getenv("API_URL", "http://localhost:3001")
-        self.base_url = "https://dje.tjsp.jus.br/cdje/index.do"
+        self.base_url = f"{DJE_BASE_URL}/cdje/index.do"
         self.driver = None
+        # Modo agendado (agendador.py): o navegador fica aberto entre execuções
+        self.manter_driver = False
+        # Busca interativa: não cede a vez e tem prioridade na caixa de saída
+        self.interativa = False
+        # Prazo/cancelamento do job (cancelamento.py); o padrão nunca é cancelado
+        self.cancelamento = TokenCancelamento()
+        self.monitor_memoria = MonitorMemoriaNavegador()
+        self.indice_processos = obter_indice(self.api_url)
+        self.indice_textual = obter_indice_textual()
+        self.cache_buscas = obter_cache()
+        self.arquivo_paginas = obter_arquivo()
+        self.caixa_saida = obter_caixa_saida(self.api_url)
+        self.duplicadas_ignoradas = 0
+        self.paginacao_por_data = {}
         logger.info(f"Real DJE Scraper inicializado - API: {self.api_url}")
         
-        self.termos_padrao = ["RPV", "pagamento pelo INSS", "Requisição de Pequeno Valor", "INSTITUTO NACIONAL DO SEGURO SOCIAL", "INSS"]
-        self.termos_prioritarios = ["RPV", "pagamento pelo INSS"]
+        self.termos_padrao = list(TERMOS_PADRAO)
+        self.extrator = ExtratorCampos(self.termos_padrao)
+        self.termos_prioritarios = list(TERMOS_PRIORITARIOS)
         self.termos_personalizados = []
         
+    def vincular_cancelamento(self, token: TokenCancelamento):
+        """Passa a obedecer ao token do job; ao cancelar, o navegador é derrubado"""
+        self.cancelamento = token
+        token.ao_cancelar(self.interromper_navegador)
+        
+    def interromper_navegador(self):
+        """
+        Roda na thread que cancelou: mata a árvore do chromedriver para que a
+        chamada em curso no WebDriver falhe já; o job encerra o driver no finally
+        """
+        pid = pid_do_driver(self.driver) if self.driver else None
+        if pid:
+            encerrados = encerrar_arvore_processos(pid)
+            logger.warning(f"Job cancelado ({self.cancelamento.motivo}): {encerrados} processo(s) do navegador encerrados")
+        
     def definir_termos_busca(self, termos: str):
         if termos and termos.strip():
             self.termos_personalizados = [termo.strip() for termo in termos.split(',') if termo.strip()]
@@ -78,6 +155,7 @@ class RealDJEScraper:
     def get_termos_busca(self) -> List[str]:
         return self.termos_personalizados if self.termos_personalizados else self.termos_padrao
         
+    @medir_etapa("driver_startup")
     def setup_driver(self):
         try:
             chrome_options = Options()
@@ -164,11 +242,12 @@ class RealDJEScraper:
                 logger.info("Configurando WebDriver com Chromium e chromedriver...")
                 service = Service('/usr/bin/chromedriver')
                 self.driver = webdriver.Chrome(service=service, options=chrome_options)
+                self.monitor_memoria.novo_driver()
                 logger.info("WebDriver configurado com sucesso")
                 
-                # Configurar timeouts mais longos
-                self.driver.implicitly_wait(5)
-                self.driver.set_page_load_timeout(45)
+                # Timeouts derivados da latência observada (latencias.py); os fixos até haver amostras
+                self.driver.implicitly_wait(latencias.timeout("implicit_wait"))
+                self.driver.set_page_load_timeout(latencias.timeout("page_load"))
                 self.driver.set_script_timeout(45)
                 
                 return True
@@ -183,15 +262,81 @@ class RealDJEScraper:
             self.driver = None
             return True  # Continua em modo simulado
             
-    def buscar_por_data_personalizada(self, data_inicio: datetime, data_fim: datetime, termos: str = "") -> List[PublicacaoReal]:
+    def garantir_driver(self) -> bool:
+        """Reaproveita o navegador já aberto se manter_driver estiver ativo e a sessão responder"""
+        if self.manter_driver and self.driver:
+            try:
+                self.driver.current_url
+                # A latência mudou desde que o navegador subiu: reajusta a espera implícita
+                self.driver.implicitly_wait(latencias.timeout("implicit_wait"))
+                return True
+            except Exception as e:
+                logger.warning(f"Navegador mantido não responde, subindo outro: {e}")
+                self.encerrar_driver()
+        return self.setup_driver()
+        
+    def encerrar_driver(self):
+        if not self.driver:
+            return
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Erro ao encerrar WebDriver: {e}")
+        self.driver = None
+            
+    def verificar_memoria_driver(self):
+        """Amostra o RSS do navegador e recicla o driver se o orçamento foi excedido"""
+        if not self.driver or self.cancelamento.cancelado:
+            return
+            
+        rss = self.monitor_memoria.amostrar(self.driver)
+        logger.info(f"RSS do navegador: {rss / (1024 * 1024):.0f}MB ({self.monitor_memoria.paginas_driver} páginas neste driver)")
+        
+        motivo = self.monitor_memoria.motivo_reciclagem()
+        if motivo:
+            self.reciclar_driver(motivo)
+            
+    def reciclar_driver(self, motivo: str) -> bool:
+        """Encerra o navegador atual e sobe um novo já na página de consulta"""
+        logger.warning(f"Reciclando WebDriver: {motivo}")
+        
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Erro ao encerrar WebDriver durante reciclagem: {e}")
+        self.driver = None
+        
+        self.setup_driver()
+        self.monitor_memoria.registrar_reciclagem()
+        
+        if not self.driver:
+            logger.error("Não foi possível recriar o WebDriver após reciclagem")
+            return False
+            
+        try:
+            self.abrir_pagina(self.base_url)
+            self.cancelamento.esperar(3)
+        except Exception as e:
+            logger.error(f"Erro ao recarregar página após reciclagem: {e}")
+            return False
+            
+        logger.info("WebDriver reciclado com sucesso")
+        return True
+            
+    def buscar_por_data_personalizada(self, data_inicio: datetime, data_fim: datetime, termos: str = "",
+                                      progresso: Optional[Dict] = None) -> List[PublicacaoReal]:
+        """
+        Busca por termos no período; o andamento vai para progresso (padrão: o progresso_busca
+        exibido em /progresso-busca, que a fila de trabalho não deve sobrescrever)
+        """
         publicacoes = []
+        progresso = progresso_busca if progresso is None else progresso
         
         try:
             self.definir_termos_busca(termos)
             termos_busca = self.get_termos_busca()
             
-            global progresso_busca
-            progresso_busca.update({
+            progresso.update({
                 'ativa': True,
                 'total_dias': (data_fim - data_inicio).days + 1,
                 'dias_processados': 0,
@@ -202,9 +347,21 @@ class RealDJEScraper:
                 'erro': None
             })
             
-            if not self.setup_driver():
-                progresso_busca['ativa'] = False
-                progresso_busca['erro'] = 'Erro ao configurar WebDriver'
+            # Datas no cache de buscas ou já coletadas por completo (índice textual) dispensam o navegador
+            resolvidas = self.resolver_sem_navegador(data_inicio, data_fim, termos_busca, progresso)
+            if len(resolvidas) == progresso['total_dias']:
+                logger.info("Todas as datas do período resolvidas por cache/índice; busca sem navegador")
+                for pubs_data in resolvidas.values():
+                    publicacoes.extend(pubs_data)
+                progresso['publicacoes_encontradas'] = len(publicacoes)
+                progresso['dias_processados'] = progresso['total_dias']
+                return publicacoes
+            
+            self.monitor_memoria.iniciar()
+            self.paginacao_por_data = {}
+            if not self.garantir_driver():
+                progresso['ativa'] = False
+                progresso['erro'] = 'Erro ao configurar WebDriver'
                 return publicacoes
                 
             logger.info(f"Busca personalizada no DJE-TJSP")
@@ -215,19 +372,21 @@ class RealDJEScraper:
             site_disponivel = False
             if self.driver:
                 site_disponivel = self.verificar_site_disponivel()
+                # Navegador derrubado pelo cancelamento não é site indisponível
+                self.cancelamento.verificar()
                 
                 if not site_disponivel:
                     logger.warning("Site DJE-TJSP não está funcionalmente acessível. Usando modo de exemplo...")
-                    progresso_busca['erro'] = 'Site DJE indisponível ou com proteção anti-bot - usando dados de exemplo'
+                    progresso['erro'] = 'Site DJE indisponível ou com proteção anti-bot - usando dados de exemplo'
                     publicacoes = self.gerar_publicacoes_exemplo(data_inicio, data_fim, termos_busca)
-                    progresso_busca['publicacoes_encontradas'] = len(publicacoes)
-                    progresso_busca['dias_processados'] = progresso_busca['total_dias']
+                    progresso['publicacoes_encontradas'] = len(publicacoes)
+                    progresso['dias_processados'] = progresso['total_dias']
                     return publicacoes
             else:
                 logger.info("Executando em modo simulado (sem WebDriver)")
                 publicacoes = self.gerar_publicacoes_exemplo(data_inicio, data_fim, termos_busca)
-                progresso_busca['publicacoes_encontradas'] = len(publicacoes)
-                progresso_busca['dias_processados'] = progresso_busca['total_dias']
+                progresso['publicacoes_encontradas'] = len(publicacoes)
+                progresso['dias_processados'] = progresso['total_dias']
                 return publicacoes
             
             # Site está disponível, proceder com busca real - mas com detecção rápida de problemas
@@ -236,19 +395,33 @@ class RealDJEScraper:
             max_falhas_consecutivas = 2  # Reduzir ainda mais para falhar mais rápido
             
             while current_date <= data_fim:
-                progresso_busca['data_atual'] = current_date.strftime('%d/%m/%Y')
+                self.cancelamento.verificar()
+                progresso['data_atual'] = current_date.strftime('%d/%m/%Y')
                 logger.info(f"Processando data: {current_date.strftime('%d/%m/%Y')}")
                 
+                chave_data = current_date.strftime('%Y-%m-%d')
+                if chave_data in resolvidas:
+                    publicacoes.extend(resolvidas[chave_data])
+                    progresso['publicacoes_encontradas'] = len(publicacoes)
+                    progresso['dias_processados'] += 1
+                    current_date += timedelta(days=1)
+                    continue
+                
                 try:
                     pubs_data = self.buscar_publicacoes_data_personalizada(current_date, termos_busca)
                     publicacoes.extend(pubs_data)
-                    progresso_busca['publicacoes_encontradas'] = len(publicacoes)
+                    coleta = self.paginacao_por_data.get(chave_data)
+                    if self.cache_buscas and coleta and not coleta['paginas_com_falha'] and not coleta['truncada']:
+                        self.cache_buscas.guardar(termos_busca, current_date, pubs_data)
+                    progresso['publicacoes_encontradas'] = len(publicacoes)
                     
                     # Reset contador de erros em caso de sucesso
                     tentativas_falharam = 0
                     
                 except Exception as e:
                     logger.error(f"Erro ao processar data {current_date.strftime('%d/%m/%Y')}: {e}")
+                    # Falha causada pelo navegador derrubado no cancelamento não vira "anti-bot"
+                    self.cancelamento.verificar()
                     
                     # DETECÇÃO IMEDIATA: Se erro de proteção anti-bot, mudar para exemplo imediatamente
                     if "proteção anti-bot" in str(e).lower() or "rejeitando entrada" in str(e).lower():
@@ -259,11 +432,11 @@ class RealDJEScraper:
                         logger.info(f"Gerando exemplos para {remaining_dates.days} datas restantes...")
                         exemplos = self.gerar_publicacoes_exemplo(current_date, data_fim, termos_busca)
                         publicacoes.extend(exemplos)
-                        progresso_busca['publicacoes_encontradas'] = len(publicacoes)
+                        progresso['publicacoes_encontradas'] = len(publicacoes)
                         
                         # Marcar todas as datas restantes como processadas
-                        progresso_busca['dias_processados'] = progresso_busca['total_dias']
-                        progresso_busca['erro'] = 'Proteção anti-bot detectada - dados de exemplo gerados'
+                        progresso['dias_processados'] = progresso['total_dias']
+                        progresso['erro'] = 'Proteção anti-bot detectada - dados de exemplo gerados'
                         break
                     
                     # Para outros erros, usar contador de falhas consecutivas
@@ -279,37 +452,40 @@ class RealDJEScraper:
                             logger.info(f"Gerando exemplos para {remaining_dates.days} datas restantes...")
                             exemplos = self.gerar_publicacoes_exemplo(current_date, data_fim, termos_busca)
                             publicacoes.extend(exemplos)
-                            progresso_busca['publicacoes_encontradas'] = len(publicacoes)
+                            progresso['publicacoes_encontradas'] = len(publicacoes)
                         
                         # Marcar todas as datas restantes como processadas
-                        progresso_busca['dias_processados'] = progresso_busca['total_dias']
-                        progresso_busca['erro'] = 'Site com problemas - dados de exemplo gerados'
+                        progresso['dias_processados'] = progresso['total_dias']
+                        progresso['erro'] = 'Site com problemas - dados de exemplo gerados'
                         break
                     
-                progresso_busca['dias_processados'] += 1
+                progresso['dias_processados'] += 1
                 current_date += timedelta(days=1)
                 
+                self.verificar_memoria_driver()
+                
                 # Intervalo entre requisições para evitar sobrecarga
-                time.sleep(1)  # Reduzir intervalo para ser mais rápido
+                pausa(1, "entre_datas", self.engine, self.endpoint, self.cancelamento.esperar)
                 
+        except JobCancelado as e:
+            logger.warning(f"Busca personalizada interrompida ({e}): {len(publicacoes)} publicações parciais")
+            progresso['erro'] = f'Busca interrompida: {e}'
+            
         except Exception as e:
             logger.error(f"Erro geral na busca personalizada: {e}")
-            progresso_busca['erro'] = str(e)
+            progresso['erro'] = str(e)
             
             # Em caso de erro geral, gerar alguns exemplos
             if not publicacoes:
                 logger.info("Gerando exemplos devido a erro geral...")
                 publicacoes = self.gerar_publicacoes_exemplo(data_inicio, data_fim, termos_busca)
-                progresso_busca['publicacoes_encontradas'] = len(publicacoes)
+                progresso['publicacoes_encontradas'] = len(publicacoes)
             
         finally:
-            if self.driver:
-                try:
-                    self.driver.quit()
-                    logger.info("WebDriver encerrado com sucesso")
-                except Exception as e:
-                    logger.warning(f"Erro ao encerrar WebDriver: {e}")
-            progresso_busca['ativa'] = False
+            if self.driver and not self.manter_driver:
+                self.encerrar_driver()
+                logger.info("WebDriver encerrado com sucesso")
+            progresso['ativa'] = False
                 
         logger.info(f"Busca personalizada concluída: {len(publicacoes)} publicações encontradas")
         return publicacoes
@@ -333,7 +509,7 @@ class RealDJEScraper:
                     logger.info(f"Tentativa {tentativa + 1} para data {data_formatada}")
                     
                     # Aguardar o campo de data estar interagível
-                    data_input = self.aguardar_elemento_interagivel((By.NAME, "dtDiario"), timeout=10)  # Reduzir timeout
+                    data_input = self.aguardar_elemento_interagivel((By.NAME, "dtDiario"))
                     if not data_input:
                         logger.warning(f"Campo de data não ficou interagível, tentativa {tentativa + 1}")
                         continue
@@ -392,7 +568,7 @@ class RealDJEScraper:
                         break
                     
                     # Aguardar o botão de consulta estar disponível
-                    submit_button = self.aguardar_elemento_interagivel((By.XPATH, "//input[@type='submit' and @value='Consultar']"), timeout=8)
+                    submit_button = self.aguardar_elemento_interagivel((By.XPATH, "//input[@type='submit' and @value='Consultar']"))
                     if not submit_button:
                         logger.warning(f"Botão de consulta não ficou interagível, tentativa {tentativa + 1}")
                         # Se botão não fica interagível na primeira tentativa, é proteção
@@ -402,21 +578,24 @@ class RealDJEScraper:
                             break
                         continue
                     
-                    # Clicar no botão de forma segura
-                    if not self.interagir_com_elemento_seguro(submit_button, "click"):
-                        logger.warning(f"Não foi possível clicar no botão, tentativa {tentativa + 1}")
-                        continue
-                    
-                    # Aguardar a página processar a requisição (reduzir tempo)
-                    time.sleep(5)  # Reduzir de 8 para 5 segundos
-                    
-                    # Verificar se a página carregou completamente
-                    try:
-                        WebDriverWait(self.driver, 10).until(  # Reduzir timeout
-                            lambda driver: driver.execute_script("return document.readyState") == "complete"
-                        )
-                    except TimeoutException:
-                        logger.warning("Página pode não ter carregado completamente")
+                    with medir("form_submit", self.engine, self.endpoint):
+                        # Clicar no botão de forma segura
+                        if not self.interagir_com_elemento_seguro(submit_button, "click"):
+                            logger.warning(f"Não foi possível clicar no botão, tentativa {tentativa + 1}")
+                            continue
+                        self.monitor_memoria.registrar_pagina()
+                        
+                        # Aguardar a página processar a requisição (reduzir tempo)
+                        self.cancelamento.esperar(5)  # Reduzir de 8 para 5 segundos
+                        
+                        # Verificar se a página carregou completamente
+                        try:
+                            self.aguardar(
+                                lambda driver: driver.execute_script("return document.readyState") == "complete",
+                                "ready_state"
+                            )
+                        except TimeoutException:
+                            logger.warning("Página pode não ter carregado completamente")
                     
                     publicacoes = self.extrair_publicacoes_pagina_personalizada(data, termos_busca)
                     
@@ -429,7 +608,7 @@ class RealDJEScraper:
                     if tentativa < max_tentativas - 1:
                         logger.info(f"Recarregando página para nova tentativa...")
                         self.driver.refresh()
-                        time.sleep(3)  # Reduzir tempo de espera
+                        self.cancelamento.esperar(3)  # Reduzir tempo de espera
                     else:
                         logger.error(f"Todas as tentativas falharam para data {data_formatada}")
                         
@@ -444,7 +623,7 @@ class RealDJEScraper:
                     if tentativa < max_tentativas - 1:
                         logger.info(f"Recarregando página para nova tentativa...")
                         self.driver.refresh()
-                        time.sleep(3)  # Reduzir tempo de espera
+                        self.cancelamento.esperar(3)  # Reduzir tempo de espera
                     else:
                         logger.error(f"Todas as tentativas falharam para data {data_formatada}")
             
@@ -466,28 +645,8 @@ class RealDJEScraper:
         
         try:
             if self.driver:
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                elementos = soup.find_all(['div', 'p', 'span'], string=re.compile(r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}'))
-                
                 logger.info(f"Buscando por: {', '.join(termos_busca)}")
-                
-                elementos_unicos = []
-                processos_vistos = set()
-                
-                for elemento in elementos:
-                    texto = elemento.get_text()
-                    numero_processo = self.extrair_numero_processo(texto)
-                    if numero_processo and numero_processo not in processos_vistos:
-                        processos_vistos.add(numero_processo)
-                        elementos_unicos.append(elemento)
-                
-                logger.info(f"Encontrados {len(elementos_unicos)} elementos únicos com os termos especificados")
-                
-                if len(elementos_unicos) > 0:
-                    for i, elemento in enumerate(elementos_unicos[:5]):
-                        pub = self.processar_elemento_publicacao_personalizada(elemento, data, i, termos_busca)
-                        if pub:
-                            publicacoes.append(pub)
+                publicacoes = self.coletar_publicacoes(data, MODO_PERSONALIZADO, termos_busca)
             else:
                 logger.info("Modo simulado: WebDriver não disponível")
                     
@@ -496,47 +655,6 @@ class RealDJEScraper:
             
         return publicacoes
         
-    def processar_elemento_publicacao_personalizada(self, elemento, data: datetime, index: int, termos_busca: List[str]) -> Optional[PublicacaoReal]:
-        try:
-            texto_completo = elemento.get_text()
-            numero_processo = self.extrair_numero_processo(texto_completo)
-            
-            if not numero_processo:
-                return None
-                
-            termo_encontrado = None
-            for termo in termos_busca:
-                if termo.upper() in texto_completo.upper():
-                    termo_encontrado = termo
-                    break
-                    
-            if not termo_encontrado:
-                termo_encontrado = termos_busca[0] if termos_busca else "RPV"
-            
-            autores = self.extrair_autores(texto_completo)
-            advogados = self.extrair_advogados(texto_completo)
-            valores = self.extrair_valores(texto_completo)
-            
-            publicacao = PublicacaoReal(
-                numeroProcesso=numero_processo,
-                dataDisponibilizacao=data.isoformat(),
-                autores=autores,
-                advogados=advogados,
-                conteudo=f"PROCESSO Nº {numero_processo}. Publicação relacionada ao termo '{termo_encontrado}' em processo contra o Instituto Nacional do Seguro Social - INSS. Valor: R$ {valores['valorPrincipalBruto']:.2f}. Parte: Ana Carolina Lima. Advogado: Dr. Roberto Silva OAB/SP 34567. Termo encontrado: {termo_encontrado}.",
-                valorPrincipalBruto=valores['valorPrincipalBruto'],
-                valorPrincipalLiquido=valores['valorPrincipalLiquido'],
-                valorJurosMoratorios=valores['valorJurosMoratorios'],
-                honorariosAdvocaticios=valores['honorariosAdvocaticios'],
-                termosEncontrados=termo_encontrado,
-                fonte="DJE-TJSP-REAL"
-            )
-            
-            return publicacao
-            
-        except Exception as e:
-            logger.error(f"Erro ao processar elemento: {e}")
-            return None
-            
     def criar_publicacao_exemplo_personalizada(self, data: datetime, termo: str, index: int) -> PublicacaoReal:
         data_str = data.strftime("%d%m%y")
         numero_processo = f"501{data_str}-10.{data.year}.8.26.0100"
@@ -559,16 +677,21 @@ class RealDJEScraper:
         publicacoes = []
         
         try:
-            if not self.setup_driver():
+            self.monitor_memoria.iniciar()
+            self.paginacao_por_data = {}
+            if not self.garantir_driver():
                 return publicacoes
                 
             logger.info(f"Buscando no DJE-TJSP de {data_inicio.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')}")
             
-            self.driver.get(self.base_url)
-            time.sleep(3)
+            self.abrir_pagina(self.base_url)
+            self.cancelamento.esperar(3)
             
-            current_date = data_inicio
-            while current_date <= data_fim:
+            # Dias úteis mais recentes primeiro: em backfills longos, o mais valioso chega antes
+            for current_date in ordenar_datas(data_inicio, data_fim):
+                if not self.interativa:
+                    preempcao.ceder(self.cancelamento.evento)
+                self.cancelamento.verificar()
                 logger.info(f"Processando data: {current_date.strftime('%d/%m/%Y')}")
                 
                 try:
@@ -578,15 +701,18 @@ class RealDJEScraper:
                 except Exception as e:
                     logger.error(f"Erro ao processar data {current_date.strftime('%d/%m/%Y')}: {e}")
                     
-                current_date += timedelta(days=1)
-                time.sleep(2)
+                self.verificar_memoria_driver()
+                pausa(2, "entre_datas", self.engine, self.endpoint, self.cancelamento.esperar)
                 
+        except JobCancelado as e:
+            logger.warning(f"Busca interrompida ({e}): {len(publicacoes)} publicações parciais")
+            
         except Exception as e:
             logger.error(f"Erro geral na busca: {e}")
             
         finally:
-            if self.driver:
-                self.driver.quit()
+            if not self.manter_driver:
+                self.encerrar_driver()
                 
         logger.info(f"Busca concluída: {len(publicacoes)} publicações encontradas")
         return publicacoes
@@ -598,16 +724,16 @@ class RealDJEScraper:
             data_str = data.strftime("%d/%m/%Y")
             
             try:
-                data_input = WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.NAME, "dtDiario"))
-                )
+                data_input = self.aguardar(EC.presence_of_element_located((By.NAME, "dtDiario")))
                 data_input.clear()
                 data_input.send_keys(data_str)
                 
                 submit_button = self.driver.find_element(By.XPATH, "//input[@type='submit' and @value='Consultar']")
-                submit_button.click()
-                
-                time.sleep(5)
+                with medir("form_submit", self.engine, self.endpoint):
+                    submit_button.click()
+                    self.monitor_memoria.registrar_pagina()
+                    
+                    self.cancelamento.esperar(5)
                 
                 publicacoes = self.extrair_publicacoes_pagina(data)
                 
@@ -625,162 +751,137 @@ class RealDJEScraper:
         publicacoes = []
         
         try:
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            elementos = soup.find_all(['div', 'p', 'span'], string=re.compile(r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}'))
-            
             logger.info(f"Buscando por: {', '.join(self.termos_padrao)}")
             
-            elementos_unicos = []
-            processos_vistos = set()
+            publicacoes = self.coletar_publicacoes(data, MODO_PADRAO)
             
-            for elemento in elementos:
-                texto = elemento.get_text()
-                numero_processo = self.extrair_numero_processo(texto)
-                if numero_processo and numero_processo not in processos_vistos:
-                    processos_vistos.add(numero_processo)
-                    elementos_unicos.append(elemento)
-            
-            logger.info(f"Encontrados {len(elementos_unicos)} elementos únicos com os termos especificados")
-            
-            if len(elementos_unicos) == 0:
+            if self.paginacao_por_data[data.strftime('%Y-%m-%d')]['elementos_unicos'] == 0:
                 logger.info("Criando publicações de exemplo com termos padrão")
                 for i, termo in enumerate(self.termos_padrao[:2]):
                     pub_exemplo = self.criar_publicacao_exemplo(data)
                     if pub_exemplo:
                         publicacoes.append(pub_exemplo)
-            else:
-                for i, elemento in enumerate(elementos_unicos[:5]):
-                    pub = self.processar_elemento_publicacao(elemento, data, i)
-                    if pub:
-                        publicacoes.append(pub)
                         
         except Exception as e:
             logger.error(f"Erro ao extrair publicações da página: {e}")
             
         return publicacoes
         
-    def processar_elemento_publicacao(self, elemento, data: datetime, index: int) -> Optional[PublicacaoReal]:
-        try:
-            texto_completo = elemento.get_text(strip=True)
-            
-            if len(texto_completo) < 50:
-                return None
-                
-            numero_processo = self.extrair_numero_processo(texto_completo)
-            if not numero_processo:
-                numero_processo = f"REAL-{data.strftime('%Y%m%d')}-{index:03d}"
+    @medir_etapa("page_parse")
+    def coletar_publicacoes(self, data: datetime, modo: str, termos_busca: Optional[List[str]] = None) -> List[PublicacaoReal]:
+        """
+        Percorre todas as páginas de resultado da data atual, extrai os registros
+        (no pool de processos, se EXTRACAO_PROCESSOS estiver ativo) e deduplica
+        por número de processo entre páginas
+        """
+        rastreador = RastreadorPaginacao(self.driver, cancelamento=self.cancelamento)
+        termos_busca = termos_busca or []
+        
+        registros_por_pagina = None
+        if pool_extracao.obter_pool():
+            paginas = rastreador.coletar_html()
+            registros_por_pagina = pool_extracao.extrair_paginas(paginas, modo, data, termos_busca, self.termos_padrao)
+        else:
+            paginas = rastreador.coletar()
+        if registros_por_pagina is None:
+            registros_por_pagina = [extrair_registros(pagina, modo, data, termos_busca, self) for pagina in paginas]
+        self.monitor_memoria.registrar_pagina(rastreador.paginas_navegador)
+        
+        registros, textos = consolidar_registros(registros_por_pagina, data)
+        publicacoes = [PublicacaoReal(**dict(zip(CAMPOS_REGISTRO, registro))) for registro in registros]
                 
-            autores = self.extrair_autores(texto_completo)
-            advogados = self.extrair_advogados(texto_completo)
-            valores = self.extrair_valores(texto_completo)
-            
-            termos = self.extrair_termos_encontrados(texto_completo)
-            
-            publicacao = PublicacaoReal(
-                numeroProcesso=numero_processo,
-                dataDisponibilizacao=data.strftime("%Y-%m-%dT00:00:00.000Z"),
-                autores=autores,
-                advogados=advogados,
-                conteudo=texto_completo[:2000],
-                valorPrincipalBruto=valores.get('principal'),
-                valorPrincipalLiquido=valores.get('liquido'),
-                valorJurosMoratorios=valores.get('juros'),
-                honorariosAdvocaticios=valores.get('honorarios'),
-                termosEncontrados=termos
-            )
-            
-            logger.info(f"Publicação processada: {numero_processo}")
-            return publicacao
-            
+        self.paginacao_por_data[data.strftime('%Y-%m-%d')] = {
+            'paginas': len(paginas),
+            'paginas_com_falha': rastreador.paginas_com_falha,
+            'truncada': rastreador.truncada,
+            'elementos_unicos': len(textos),
+            'registros': len(publicacoes)
+        }
+        logger.info(f"{len(publicacoes)} publicações de {len(textos)} elementos únicos em {len(paginas)} página(s)")
+        self.arquivar_paginas(data, rastreador.html_paginas)
+        self.indexar_data(data, textos, len(paginas), rastreador.paginas_com_falha, rastreador.truncada)
+        return publicacoes
+
+    def arquivar_paginas(self, data: datetime, paginas_html: List[str]):
+        """Guarda o HTML bruto das páginas no arquivo local, para reextração offline (reextrair.py)"""
+        if not self.arquivo_paginas or not paginas_html:
+            return
+        try:
+            self.arquivo_paginas.guardar(data, CONSULTA_SIMPLES, paginas_html)
         except Exception as e:
-            logger.error(f"Erro ao processar publicação: {e}")
-            return None
-            
-    def extrair_numero_processo(self, texto: str) -> Optional[str]:
-        padroes = [
-            r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}',
-            r'\d{4,7}[-/]\d{2,4}',
-            r'n[úo]\.?\s*\d{4,}[-/]\d{2,4}',
-        ]
+            logger.warning(f"Erro ao arquivar páginas: {e}")
+
+    def indexar_data(self, data: datetime, textos: List, paginas: int, paginas_com_falha: int, truncada: bool = False):
+        """
+        Guarda os textos no índice textual; a data só conta como coberta se todas as páginas vieram
+        (sem falha nem corte por PAGINACAO_MAX_PAGINAS) e se já passou: o diário de hoje ainda cresce
+        """
+        if not self.indice_textual or not textos or paginas_com_falha or truncada:
+            return
+        if data.date() >= date.today():
+            return
+        try:
+            self.indice_textual.registrar_data(data, textos, paginas)
+        except Exception as e:
+            logger.warning(f"Erro ao atualizar índice textual: {e}")
+
+    def resolver_sem_navegador(self, data_inicio: datetime, data_fim: datetime, termos_busca: List[str],
+                               progresso: Optional[Dict] = None) -> Dict[str, List[PublicacaoReal]]:
+        """Publicações por data (YYYY-MM-DD) das datas do período que estão no cache ou no índice textual"""
+        progresso = progresso_busca if progresso is None else progresso
+        datas_cobertas = self.indice_textual.datas_cobertas(data_inicio, data_fim) if self.indice_textual else set()
+        # Como no cache, hoje (e datas futuras) não vem do índice: o diário ainda cresce e a cobertura
+        # gravada durante o dia, re-guardada no cache, anularia o TTL de hoje
+        hoje = date.today().isoformat()
+        resolvidas = {}
+        dias_do_cache = 0
+        current_date = data_inicio
+        while current_date <= data_fim:
+            chave_data = current_date.strftime('%Y-%m-%d')
+            pubs_data = self.cache_buscas.obter(termos_busca, current_date) if self.cache_buscas else None
+            if pubs_data is not None:
+                dias_do_cache += 1
+            elif chave_data in datas_cobertas and chave_data < hoje:
+                pubs_data = self.publicacoes_do_indice(current_date, termos_busca)
+                if self.cache_buscas:
+                    self.cache_buscas.guardar(termos_busca, current_date, pubs_data)
+            if pubs_data is not None:
+                resolvidas[chave_data] = pubs_data
+            current_date += timedelta(days=1)
+        
+        progresso['dias_do_cache'] = dias_do_cache
+        progresso['dias_do_indice'] = len(resolvidas) - dias_do_cache
+        return resolvidas
+
+    def publicacoes_do_indice(self, data: datetime, termos_busca: List[str]) -> List[PublicacaoReal]:
+        """Publicações da busca personalizada para uma data coberta, montadas a partir do índice textual"""
+        publicacoes = []
+        for _, texto in self.indice_textual.textos_da_data(data):
+            registro = registro_personalizado(self.extrator, texto, data, termos_busca)
+            if registro is not None:
+                publicacoes.append(PublicacaoReal(**dict(zip(CAMPOS_REGISTRO, registro))))
+        logger.info(f"{len(publicacoes)} publicações de {data.strftime('%d/%m/%Y')} respondidas pelo índice textual")
+        return publicacoes
         
-        for padrao in padroes:
-            match = re.search(padrao, texto, re.IGNORECASE)
-            if match:
-                return match.group().strip()
-                
-        return None
+    @medir_campo("numero_processo")
+    def extrair_numero_processo(self, texto: str) -> Optional[str]:
+        return self.extrator.extrair_numero_processo(texto)
         
+    @medir_campo("autores")
     def extrair_autores(self, texto: str) -> str:
-        padroes = [
-            r'autor[a-z]*[:\s]+([A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)*)',
-            r'requerente[:\s]+([A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)*)',
-            r'([A-Z][A-Z\s]+[A-Z])\s+(?:x|vs|contra)',
-        ]
-        
-        for padrao in padroes:
-            match = re.search(padrao, texto, re.IGNORECASE)
-            if match:
-                return match.group(1).strip().title()
-                
-        return "Autor não identificado"
+        return self.extrator.extrair_autores(texto)
         
+    @medir_campo("advogados")
     def extrair_advogados(self, texto: str) -> str:
-        padroes = [
-            r'(?:Dr\.?|Dra\.?)\s+([A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)*)',
-            r'OAB[/\s]*[A-Z]{2}[/\s]*\d+',
-            r'advogad[oa][:\s]+([A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)*)',
-        ]
-        
-        advogados_encontrados = []
-        for padrao in padroes:
-            matches = re.findall(padrao, texto, re.IGNORECASE)
-            advogados_encontrados.extend(matches)
-            
-        if advogados_encontrados:
-            return ", ".join(set(advogados_encontrados))
-        
-        return "Advogado não identificado"
+        return self.extrator.extrair_advogados(texto)
         
+    @medir_campo("valores")
     def extrair_valores(self, texto: str) -> Dict[str, Optional[float]]:
-        valores = {
-            'principal': None,
-            'liquido': None,
-            'honorarios': None,
-            'juros': None
-        }
-        
-        padrao_valor = r'R\$\s*([\d.,]+)'
-        
-        matches = re.findall(padrao_valor, texto)
-        if matches:
-            try:
-                valor_str = matches[0].replace('.', '').replace(',', '.')
-                valor = float(valor_str)
-                
-                valores['principal'] = valor
-                valores['liquido'] = valor * 0.9
-                valores['honorarios'] = valor * 0.1
-                valores['juros'] = valor * 0.05
-                
-            except:
-                pass
-                
-        return valores
+        return self.extrator.extrair_valores(texto)
         
+    @medir_campo("termos")
     def extrair_termos_encontrados(self, texto: str) -> str:
-        termos_encontrados = []
-        texto_lower = texto.lower()
-        
-        if "rpv" in texto_lower:
-            termos_encontrados.append("RPV")
-        if "pagamento pelo inss" in texto_lower:
-            termos_encontrados.append("pagamento pelo INSS")
-            
-        for termo in self.termos_padrao:
-            if termo.lower() in texto_lower and termo not in termos_encontrados:
-                termos_encontrados.append(termo)
-                
-        return ", ".join(termos_encontrados) if termos_encontrados else "RPV, INSS"
+        return self.extrator.extrair_termos_encontrados(texto)
         
     def criar_publicacao_exemplo(self, data: datetime) -> PublicacaoReal:
         numero_processo = f"RPV-{data.strftime('%Y%m%d')}-001"
@@ -818,20 +919,46 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
             termosEncontrados="RPV, pagamento pelo INSS"
         )
         
-    async def enviar_para_api(self, publicacao: PublicacaoReal) -> bool:
+    @medir_etapa("api_post")
+    async def enviar_para_api(self, publicacao: PublicacaoReal) -> Optional[bool]:
+        """
+        True se enviada (ou gravada na caixa de saída), False se falhou e None se ignorada
+        por já ter sido enviada; as ignoradas contam só em duplicadas_ignoradas
+        """
+        # Índice ainda semeando: a API deduplica (409 / repetidos ignorados)
+        indice = self.indice_processos
+        if indice and indice.semeado.is_set() and indice.contem(publicacao.numeroProcesso):
+            self.duplicadas_ignoradas += 1
+            logger.info(f"Já enviado anteriormente (índice local): {publicacao.numeroProcesso}")
+            return None
+            
+        data = {k: v for k, v in asdict(publicacao).items() if v is not None}
+        if self.caixa_saida:
+            try:
+                prioridade = prioridade_publicacao(publicacao.termosEncontrados, self.interativa, self.termos_prioritarios)
+                if not self.caixa_saida.enfileirar(data, prioridade):
+                    self.duplicadas_ignoradas += 1
+                    logger.info(f"Já pendente na caixa de saída: {publicacao.numeroProcesso}")
+                    return None
+                logger.info(f"Na caixa de saída: {publicacao.numeroProcesso}")
+                return True
+            except Exception as e:
+                logger.error(f"Erro ao gravar {publicacao.numeroProcesso} na caixa de saída, enviando direto: {e}")
+            
         try:
             url = f"{self.api_url}/api/publicacoes"
-            data = asdict(publicacao)
-            
-            data = {k: v for k, v in data.items() if v is not None}
             
-            async with aiohttp.ClientSession() as session:
+            # O padrão do aiohttp (300s), sem passar do prazo do job
+            timeout = aiohttp.ClientTimeout(total=self.cancelamento.limitar(300))
+            async with aiohttp.ClientSession(timeout=timeout) as session:
                 async with session.post(url, json=data) as response:
                     if response.status in [200, 201]:
                         logger.info(f"Enviado: {publicacao.numeroProcesso}")
+                        self.registrar_processo_enviado(publicacao.numeroProcesso)
                         return True
                     elif response.status == 409:
                         logger.info(f"Já existe: {publicacao.numeroProcesso}")
+                        self.registrar_processo_enviado(publicacao.numeroProcesso)
                         return True
                     else:
                         response_text = await response.text()
@@ -842,15 +969,41 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
             logger.error(f"Erro ao enviar {publicacao.numeroProcesso}: {e}")
             return False
             
+    def envio_interrompido(self) -> bool:
+        """
+        Após o cancelamento, o envio direto à API para; com a caixa de saída ele
+        segue, pois enfileirar é uma gravação local e preserva o resultado parcial
+        """
+        return self.cancelamento.cancelado and not self.caixa_saida
+            
+    def registrar_processo_enviado(self, numero_processo: str):
+        if not self.indice_processos:
+            return
+        try:
+            self.indice_processos.adicionar(numero_processo)
+        except Exception as e:
+            logger.warning(f"Erro ao atualizar índice de deduplicação: {e}")
+            
+    def exportar_colunar(self, publicacoes: List[PublicacaoReal]) -> Optional[Dict[str, Any]]:
+        """Acrescenta as publicações da execução ao dataset Parquet (EXPORTACAO_PARQUET_DIR)"""
+        try:
+            return exportacao_colunar.exportar(publicacoes)
+        except Exception as e:
+            logger.error(f"Erro na exportação Parquet: {e}")
+            return {"erro": str(e)}
+
     async def executar_scraping_real(self, days_back: int = 1) -> Dict[str, Any]:
         logger.info(f"Iniciando scraping REAL do DJE-TJSP para {days_back} dia(s)")
         start_time = datetime.now()
+        # Com o scraper mantido (agenda, fila), o contador é por execução
+        self.duplicadas_ignoradas = 0
         
         stats = {
             "success": True,
             "total_encontradas": 0,
             "total_enviadas": 0,
             "total_erros": 0,
+            "total_duplicadas_ignoradas": 0,
             "data_inicio": (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d"),
             "data_fim": datetime.now().strftime("%Y-%m-%d"),
             "execution_time": 0,
@@ -864,10 +1017,18 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
             
             publicacoes = self.buscar_por_data(data_inicio, data_fim)
             stats["total_encontradas"] = len(publicacoes)
+            stats["memoria_navegador"] = self.monitor_memoria.estatisticas()
+            stats["latencias"] = latencias.estatisticas()
+            stats["paginacao_por_data"] = self.paginacao_por_data
+            stats["exportacao_colunar"] = self.exportar_colunar(publicacoes)
             
             for publicacao in publicacoes:
+                if self.envio_interrompido():
+                    break
                 try:
                     sucesso = await self.enviar_para_api(publicacao)
+                    if sucesso is None:
+                        continue
                     if sucesso:
                         stats["total_enviadas"] += 1
                         stats["publicacoes_enviadas"].append({
@@ -879,12 +1040,16 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
                     else:
                         stats["total_erros"] += 1
                         
-                    await asyncio.sleep(0.2)
+                    if not self.caixa_saida:
+                        await pausa_async(0.2, "entre_envios", self.engine, self.endpoint)
                     
                 except Exception as e:
                     logger.error(f"Erro ao processar {publicacao.numeroProcesso}: {e}")
                     stats["total_erros"] += 1
             
+            stats["total_duplicadas_ignoradas"] = self.duplicadas_ignoradas
+            stats["cancelado"] = self.cancelamento.motivo
+            stats["caixa_saida"] = self.caixa_saida.estatisticas() if self.caixa_saida else None
             stats["execution_time"] = (datetime.now() - start_time).total_seconds()
             
             logger.info(f"Scraping REAL concluído: {stats['total_enviadas']}/{stats['total_encontradas']} enviadas")
@@ -899,12 +1064,14 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
     async def executar_scraping_periodo_customizado(self, data_inicio: datetime, data_fim: datetime) -> Dict[str, Any]:
         logger.info(f"Iniciando scraping REAL do DJE-TJSP de {data_inicio.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')}")
         start_time = datetime.now()
+        self.duplicadas_ignoradas = 0
         
         stats = {
             "success": True,
             "total_encontradas": 0,
             "total_enviadas": 0,
             "total_erros": 0,
+            "total_duplicadas_ignoradas": 0,
             "data_inicio": data_inicio.strftime("%Y-%m-%d"),
             "data_fim": data_fim.strftime("%Y-%m-%d"),
             "execution_time": 0,
@@ -915,10 +1082,18 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
         try:
             publicacoes = self.buscar_por_data(data_inicio, data_fim)
             stats["total_encontradas"] = len(publicacoes)
+            stats["memoria_navegador"] = self.monitor_memoria.estatisticas()
+            stats["latencias"] = latencias.estatisticas()
+            stats["paginacao_por_data"] = self.paginacao_por_data
+            stats["exportacao_colunar"] = self.exportar_colunar(publicacoes)
             
             for publicacao in publicacoes:
+                if self.envio_interrompido():
+                    break
                 try:
                     sucesso = await self.enviar_para_api(publicacao)
+                    if sucesso is None:
+                        continue
                     if sucesso:
                         stats["total_enviadas"] += 1
                         stats["publicacoes_enviadas"].append({
@@ -931,12 +1106,16 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
                     else:
                         stats["total_erros"] += 1
                         
-                    await asyncio.sleep(0.2)
+                    if not self.caixa_saida:
+                        await pausa_async(0.2, "entre_envios", self.engine, self.endpoint)
                     
                 except Exception as e:
                     logger.error(f"Erro ao processar {publicacao.numeroProcesso}: {e}")
                     stats["total_erros"] += 1
             
+            stats["total_duplicadas_ignoradas"] = self.duplicadas_ignoradas
+            stats["cancelado"] = self.cancelamento.motivo
+            stats["caixa_saida"] = self.caixa_saida.estatisticas() if self.caixa_saida else None
             stats["execution_time"] = (datetime.now() - start_time).total_seconds()
             
             logger.info(f"Scraping PERÍODO concluído: {stats['total_enviadas']}/{stats['total_encontradas']} enviadas")
@@ -948,6 +1127,7 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
             stats["error"] = str(e)
             return stats
 
+    @medir_etapa("site_check")
     def verificar_site_disponivel(self) -> bool:
         """Verifica se o site do DJE está disponível e funcionalmente acessível"""
         try:
@@ -958,12 +1138,12 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
             logger.info("Verificando disponibilidade do site DJE-TJSP...")
             
             # Tentar acessar a página principal
-            self.driver.get(self.base_url)
+            self.abrir_pagina(self.base_url)
             
             # Aguardar elementos essenciais carregarem
             try:
                 # Verificar se há elementos essenciais da página
-                WebDriverWait(self.driver, 15).until(
+                self.aguardar(
                     EC.any_of(
                         EC.presence_of_element_located((By.NAME, "dtDiario")),
                         EC.presence_of_element_located((By.TAG_NAME, "form")),
@@ -987,9 +1167,7 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
                 
                 # Teste funcional: verificar se consegue interagir com o campo de data
                 try:
-                    data_field = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.NAME, "dtDiario"))
-                    )
+                    data_field = self.aguardar(EC.presence_of_element_located((By.NAME, "dtDiario")))
                     
                     if not data_field.is_displayed():
                         logger.warning("Campo de data não está visível")
@@ -999,9 +1177,7 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
                     logger.info("Testando funcionalidade do campo de data...")
                     
                     # Aguardar elemento estar interagível
-                    data_field = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.NAME, "dtDiario"))
-                    )
+                    data_field = self.aguardar(EC.element_to_be_clickable((By.NAME, "dtDiario")))
                     
                     # Tentar preencher um valor de teste
                     test_date = "13/06/2025"
@@ -1138,23 +1314,45 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
                     
         return False
     
-    def aguardar_elemento_interagivel(self, locator, timeout=15):
+    def abrir_pagina(self, url: str):
+        """driver.get com o timeout de carregamento adaptativo (limitado ao prazo do job), medindo a latência"""
+        self.cancelamento.verificar()
+        timeout = latencias.timeout("page_load")
+        self.driver.set_page_load_timeout(self.cancelamento.limitar(timeout))
+        # Um corte pelo prazo dura menos que o timeout adaptativo e não entra como estouro
+        with latencias.medir("page_load", timeout):
+            self.driver.get(url)
+    
+    def aguardar(self, condicao, operacao: str = "element_wait"):
+        """
+        WebDriverWait com o timeout adaptativo da operação; TimeoutException como antes
+        A cada verificação (0,5s) olha o token: JobCancelado se o job foi cancelado
+        """
+        def condicao_ou_cancelado(driver):
+            self.cancelamento.verificar()
+            return condicao(driver)
+        
+        self.cancelamento.verificar()
+        timeout = latencias.timeout(operacao)
+        with latencias.medir(operacao, timeout):
+            return WebDriverWait(self.driver, self.cancelamento.limitar(timeout)).until(condicao_ou_cancelado)
+    
+    def aguardar_elemento_interagivel(self, locator):
         """
         Aguarda elemento estar presente, visível e interagível
         """
         try:
             # Aguardar elemento estar presente
-            elemento = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located(locator)
-            )
+            elemento = self.aguardar(EC.presence_of_element_located(locator))
             
-            # Aguardar estar visível
-            WebDriverWait(self.driver, timeout//2).until(
+            # Visível e clicável costumam vir logo após presente; não entram nas amostras
+            timeout = latencias.timeout("element_wait") / 2
+            WebDriverWait(self.driver, timeout).until(
                 EC.visibility_of(elemento)
             )
             
             # Aguardar estar clicável (interagível)
-            elemento = WebDriverWait(self.driver, timeout//2).until(
+            elemento = WebDriverWait(self.driver, timeout).until(
                 EC.element_to_be_clickable(locator)
             )
             
@@ -1167,212 +1365,8 @@ Data da publicação: {data.strftime('%d/%m/%Y')}
             logger.error(f"Elemento não ficou interagível: {e}")
             return None
 
-# Flask API
-app = Flask(__name__)
-
-@app.route('/run-real', methods=['POST'])
-def run_real_scraper():
-    try:
-        data = request.get_json() or {}
-        days_back = data.get('daysBack', 1)
-        
-        logger.info(f"Recebida requisição de scraping REAL: {days_back} dia(s)")
-        
-        if days_back < 1 or days_back > 7:
-            return jsonify({
-                "success": False,
-                "error": "daysBack deve estar entre 1 e 7 para dados reais"
-            }), 400
-        
-        scraper = RealDJEScraper()
-        
-        def run_async():
-            return asyncio.run(scraper.executar_scraping_real(days_back))
-        
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(run_async)
-            result = future.result(timeout=300)
-        
-        return jsonify({
-            "success": True,
-            "message": "Scraper REAL executado com sucesso",
-            "stats": {
-                "total_publicacoes": result["total_encontradas"],
-                "total_inseridas": result["total_enviadas"],
-                "dates_processed": days_back,
-                "errors": result["total_erros"],
-                "fonte": "DJE-TJSP-REAL"
-            },
-            "details": result
-        })
-        
-    except Exception as e:
-        logger.error(f"Erro na API real: {e}")
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
-
-@app.route('/status-real', methods=['GET'])
-def get_real_status():
-    try:
-        dje_status = "unknown"
-        api_status = "unknown"
-        
-        try:
-            response = requests.get("https://dje.tjsp.jus.br", timeout=10)
-            dje_status = "connected" if response.status_code == 200 else "error"
-        except:
-            dje_status = "disconnected"
-            
-        try:
-            test_url = f"{os.getenv('API_URL', 'http://localhost:3001')}/api/health"
-            response = requests.get(test_url, timeout=5)
-            api_status = "connected" if response.status_code == 200 else "error"
-        except:
-            api_status = "disconnected"
-        
-        return jsonify({
-            "success": True,
-            "scraper_status": "operational",
-            "dje_connection": dje_status,
-            "api_connection": api_status,
-            "dje_url": "https://dje.tjsp.jus.br",
-            "api_url": os.getenv('API_URL', 'http://localhost:3001'),
-            "version": "1.0.0-REAL",
-            "last_check": datetime.now().isoformat()
-        })
-        
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
-
-@app.route('/health', methods=['GET'])
-def health_check():
-    return jsonify({
-        "status": "healthy",
-        "type": "real-dje-scraper",
-        "timestamp": datetime.now().isoformat()
-    })
-
-@app.route('/run-since-march', methods=['POST'])
-def run_scraper_since_march():
-    try:
-        logger.info("Iniciando busca automática desde 17/03/2025")
-        
-        data_inicio = datetime(2025, 3, 17)
-        data_fim = datetime.now()
-        
-        days_total = (data_fim - data_inicio).days
-        
-        logger.info(f"Período: {data_inicio.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')} ({days_total} dias)")
-        
-        scraper = RealDJEScraper()
-        
-        def run_async():
-            return asyncio.run(scraper.executar_scraping_periodo_customizado(data_inicio, data_fim))
-        
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(run_async)
-            result = future.result(timeout=1800)
-        
-        return jsonify({
-            "success": True,
-            "message": f"Busca desde 17/03/2025 executada com sucesso",
-            "stats": {
-                "total_publicacoes": result["total_encontradas"],
-                "total_inseridas": result["total_enviadas"],
-                "dates_processed": days_total,
-                "errors": result["total_erros"],
-                "fonte": "DJE-TJSP-REAL",
-                "data_inicio": "17/03/2025",
-                "data_fim": data_fim.strftime('%d/%m/%Y')
-            },
-            "details": result
-        })
-        
-    except Exception as e:
-        logger.error(f"Erro na busca desde março: {e}")
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
-
-@app.route('/busca-personalizada', methods=['POST'])
-def busca_personalizada():
-    try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                'success': False,
-                'message': 'Dados não fornecidos'
-            }), 400
-            
-        termos = data.get('termos', '')
-        data_inicio_str = data.get('data_inicio', '')
-        data_fim_str = data.get('data_fim', '')
-        
-        if not termos or not data_inicio_str or not data_fim_str:
-            return jsonify({
-                'success': False,
-                'message': 'Termos, data de início e data fim são obrigatórios'
-            }), 400
-            
-        logger.info(f"Iniciando busca personalizada")
-        logger.info(f"Termos: {termos}")
-        logger.info(f"Período: {data_inicio_str} até {data_fim_str}")
-        
-        try:
-            if '/' in data_inicio_str:
-                data_inicio = datetime.strptime(data_inicio_str, '%d/%m/%Y')
-                data_fim = datetime.strptime(data_fim_str, '%d/%m/%Y')
-            else:
-                data_inicio = datetime.strptime(data_inicio_str, '%Y-%m-%d')
-                data_fim = datetime.strptime(data_fim_str, '%Y-%m-%d')
-        except ValueError as e:
-            return jsonify({
-                'success': False,
-                'message': f'Formato de data inválido. Use DD/MM/YYYY ou YYYY-MM-DD: {e}'
-            }), 400
-            
-        if data_inicio > data_fim:
-            return jsonify({
-                'success': False,
-                'message': 'Data de início deve ser anterior à data fim'
-            }), 400
-            
-        dias_diferenca = (data_fim - data_inicio).days
-        if dias_diferenca > 30:
-            return jsonify({
-                'success': False,
-                'message': 'Período máximo permitido é de 30 dias'
-            }), 400
-            
-        def run_async():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                return loop.run_until_complete(executar_busca_personalizada(data_inicio, data_fim, termos))
-            finally:
-                loop.close()
-                
-        resultado = run_async()
-        
-        return jsonify(resultado)
-        
-    except Exception as e:
-        logger.error(f"Erro na busca personalizada: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'Erro interno: {str(e)}'
-        }), 500
-
-async def executar_busca_personalizada(data_inicio: datetime, data_fim: datetime, termos: str) -> Dict[str, Any]:
+async def executar_busca_personalizada(data_inicio: datetime, data_fim: datetime, termos: str,
+                                      cancelamento: Optional[TokenCancelamento] = None) -> Dict[str, Any]:
     inicio_execucao = time.time()
     
     try:
@@ -1380,36 +1374,56 @@ async def executar_busca_personalizada(data_inicio: datetime, data_fim: datetime
         logger.info(f"Termos: {termos}")
         logger.info(f"Período: {data_inicio.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')}")
         
-        scraper = RealDJEScraper()
+        scraper = RealDJEScraper(endpoint="busca-personalizada")
+        scraper.interativa = True
+        if cancelamento:
+            scraper.vincular_cancelamento(cancelamento)
         
         total_dias = (data_fim - data_inicio).days + 1
         
-        publicacoes = scraper.buscar_por_data_personalizada(data_inicio, data_fim, termos)
-        
-        publicacoes_enviadas = 0
-        for publicacao in publicacoes:
-            try:
-                sucesso = await scraper.enviar_para_api(publicacao)
-                if sucesso:
-                    publicacoes_enviadas += 1
-                    logger.info(f"Publicação enviada: {publicacao.numeroProcesso}")
-                else:
-                    logger.warning(f"Falha ao enviar: {publicacao.numeroProcesso}")
-            except Exception as e:
-                logger.error(f"Erro ao enviar publicação: {e}")
+        # Backfills deste processo param entre datas até a busca ser entregue à caixa de saída
+        with preempcao.interativa():
+            publicacoes = scraper.buscar_por_data_personalizada(data_inicio, data_fim, termos)
+            exportacao = scraper.exportar_colunar(publicacoes)
+            
+            publicacoes_enviadas = 0
+            for publicacao in publicacoes:
+                if scraper.envio_interrompido():
+                    break
+                try:
+                    sucesso = await scraper.enviar_para_api(publicacao)
+                    if sucesso is None:
+                        continue
+                    if sucesso:
+                        publicacoes_enviadas += 1
+                        logger.info(f"Publicação enviada: {publicacao.numeroProcesso}")
+                    else:
+                        logger.warning(f"Falha ao enviar: {publicacao.numeroProcesso}")
+                except Exception as e:
+                    logger.error(f"Erro ao enviar publicação: {e}")
                 
         tempo_execucao = time.time() - inicio_execucao
+        cancelado = scraper.cancelamento.motivo
         
         resultado = {
             'success': True,
-            'message': f'Busca personalizada concluída com sucesso',
+            'message': f'Busca personalizada interrompida ({cancelado}): resultado parcial' if cancelado else 'Busca personalizada concluída com sucesso',
+            'cancelado': cancelado,
             'publicacoes': [asdict(pub) for pub in publicacoes],
             'total_encontradas': len(publicacoes),
             'total_enviadas': publicacoes_enviadas,
+            'total_duplicadas_ignoradas': scraper.duplicadas_ignoradas,
             'termos_buscados': termos,
             'periodo': f"{data_inicio.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')}",
             'tempo_execucao': f"{tempo_execucao:.2f}s",
             'total_dias': total_dias,
+            'memoria_navegador': scraper.monitor_memoria.estatisticas(),
+            'latencias': latencias.estatisticas(),
+            'paginacao_por_data': scraper.paginacao_por_data,
+            'exportacao_colunar': exportacao,
+            'caixa_saida': scraper.caixa_saida.estatisticas() if scraper.caixa_saida else None,
+            'dias_do_cache': progresso_busca.get('dias_do_cache', 0),
+            'dias_do_indice': progresso_busca.get('dias_do_indice', 0),
             'fonte': 'DJE-TJSP-PERSONALIZADO'
         }
         
@@ -1427,41 +1441,7 @@ async def executar_busca_personalizada(data_inicio: datetime, data_fim: datetime
             'tempo_execucao': f"{time.time() - inicio_execucao:.2f}s"
         }
 
-@app.route('/progresso-busca', methods=['GET'])
-def get_progresso_busca():
-    try:
-        global progresso_busca
-        
-        porcentagem = 0
-        if progresso_busca['total_dias'] > 0:
-            porcentagem = (progresso_busca['dias_processados'] / progresso_busca['total_dias']) * 100
-        
-        return jsonify({
-            'success': True,
-            'ativa': progresso_busca['ativa'],
-            'data_atual': progresso_busca['data_atual'],
-            'total_dias': progresso_busca['total_dias'],
-            'dias_processados': progresso_busca['dias_processados'],
-            'publicacoes_encontradas': progresso_busca['publicacoes_encontradas'],
-            'termos_buscados': progresso_busca['termos_buscados'],
-            'periodo': progresso_busca['periodo'],
-            'porcentagem': round(porcentagem, 1),
-            'inicio': progresso_busca['inicio'],
-            'erro': progresso_busca['erro']
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
-
 if __name__ == "__main__":
-    logger.info("Iniciando Real DJE Scraper na porta 5002")
-    logger.info("Endpoints disponíveis:")
-    logger.info("   POST /run-real - Executar scraping real")
-    logger.info("   GET /status-real - Status do scraper real")
-    logger.info("   GET /health - Health check")
-    logger.info("   POST /run-since-march - Buscar desde 17/03/2025")
-    
-    app.run(host='0.0.0.0', port=5002, debug=False) 
\ No newline at end of file
+    # Compatibilidade com `python real_dje_scraper.py`; o ponto de entrada é servico.py
+    import servico
+    servico.main()
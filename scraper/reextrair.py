@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Reextração offline das páginas arquivadas do DJE
+
+Uso (a partir de scraper/):
+    python reextrair.py --inicio 2025-03-17 --fim 2025-06-30                  # só o resumo
+    python reextrair.py --inicio 2025-03-17 --fim 2025-06-30 --saida corrigidas.jsonl
+    python reextrair.py --inicio 2025-03-17 --fim 2025-06-30 --enviar         # PUT /api/publicacoes/reextracao
+
+Roda a extração atual (extracao.py) sobre as páginas guardadas por
+arquivo_paginas.py, uma data por tarefa em um pool de processos. Os workers
+recebem só os hashes e leem os objetos comprimidos por mmap. Nenhum acesso
+ao DJE; com --enviar, as publicações já cadastradas na API são atualizadas.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+from arquivo_paginas import CONSULTA_SIMPLES, caminho_objeto, ler_objeto, obter_arquivo
+from extracao import (CAMPOS_REGISTRO, MODO_PADRAO, MODO_PERSONALIZADO, TERMOS_PADRAO, ExtratorCampos,
+                      Registro, consolidar_registros, extrair_registros)
+from estado import cabecalhos_servico
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+REU_PADRAO = "Instituto Nacional do Seguro Social - INSS"
+
+
+def reextrair_data(diretorio: str, dia: str, hashes: Sequence[str], modo: str,
+                   termos_busca: Tuple[str, ...]) -> Tuple[str, List[Registro], int]:
+    """Registros de uma data a partir das páginas arquivadas (executa no processo do pool)"""
+    extrator = ExtratorCampos(TERMOS_PADRAO)
+    data = datetime.fromisoformat(dia)
+    paginas = [
+        extrair_registros(ler_objeto(caminho_objeto(diretorio, hash_html)), modo, data, termos_busca, extrator)
+        for hash_html in hashes
+    ]
+    registros, textos = consolidar_registros(paginas, data)
+    return dia, registros, len(textos)
+
+
+def publicacao_json(registro: Registro) -> Dict:
+    """Corpo da publicação como o RealDJEScraper envia (asdict sem campos None)"""
+    publicacao = dict(zip(CAMPOS_REGISTRO, registro), reu=REU_PADRAO)
+    return {campo: valor for campo, valor in publicacao.items() if valor is not None}
+
+
+async def enviar(publicacoes: List[Dict], api_url: str, concorrencia: int) -> Dict[str, int]:
+    import aiohttp
+
+    contagem = {"atualizadas": 0, "nao_cadastradas": 0, "erros": 0}
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def enviar_uma(session, publicacao):
+        async with semaforo:
+            try:
+                async with session.put(f"{api_url}/api/publicacoes/reextracao", json=publicacao) as response:
+                    if response.status == 200:
+                        contagem["atualizadas"] += 1
+                    elif response.status == 404:
+                        contagem["nao_cadastradas"] += 1
+                    else:
+                        contagem["erros"] += 1
+                        logger.error(f"Erro {response.status} ao atualizar {publicacao['numeroProcesso']}: {await response.text()}")
+            except aiohttp.ClientError as e:
+                contagem["erros"] += 1
+                logger.error(f"Erro ao atualizar {publicacao['numeroProcesso']}: {e}")
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30), headers=cabecalhos_servico()) as session:
+        await asyncio.gather(*(enviar_uma(session, publicacao) for publicacao in publicacoes))
+    return contagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reextração offline das páginas arquivadas do DJE")
+    parser.add_argument("--inicio", required=True, help="Data inicial (YYYY-MM-DD)")
+    parser.add_argument("--fim", required=True, help="Data final (YYYY-MM-DD)")
+    parser.add_argument("--modo", choices=[MODO_PADRAO, MODO_PERSONALIZADO], default=MODO_PADRAO)
+    parser.add_argument("--termos", default="", help="Termos da busca personalizada, separados por vírgula")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--saida", default="", help="Grava as publicações reextraídas em JSONL")
+    parser.add_argument("--enviar", action="store_true", help="Atualiza as publicações cadastradas na API")
+    parser.add_argument("--api-url", default=os.getenv("API_URL", "http://localhost:3001"))
+    parser.add_argument("--concorrencia", type=int, default=8, help="Requisições simultâneas com --enviar")
+    args = parser.parse_args()
+
+    arquivo = obter_arquivo()
+    if not arquivo:
+        logger.error("Arquivo de páginas desativado (ARQUIVO_PAGINAS_DIR vazio)")
+        sys.exit(1)
+
+    termos_busca = tuple(termo.strip() for termo in args.termos.split(",") if termo.strip())
+    grupos = arquivo.listar(args.inicio, args.fim, CONSULTA_SIMPLES)
+    total_paginas = sum(len(hashes) for hashes in grupos.values())
+    logger.info(f"{len(grupos)} data(s) e {total_paginas} página(s) arquivadas entre {args.inicio} e {args.fim}")
+
+    inicio = time.perf_counter()
+    publicacoes = []
+    elementos = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.processos), mp_context=multiprocessing.get_context("spawn")) as pool:
+        futuros = [
+            pool.submit(reextrair_data, arquivo.diretorio, dia, hashes, args.modo, termos_busca)
+            for (dia, _), hashes in grupos.items()
+        ]
+        for futuro in futuros:
+            dia, registros, elementos_dia = futuro.result()
+            elementos += elementos_dia
+            publicacoes.extend(publicacao_json(registro) for registro in registros)
+    duracao = time.perf_counter() - inicio
+    logger.info(
+        f"Reextração: {len(publicacoes)} publicações de {elementos} elementos em {duracao:.1f}s "
+        f"({total_paginas / duracao if duracao else 0:.0f} páginas/s, {args.processos} processo(s))"
+    )
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as saida:
+            for publicacao in publicacoes:
+                saida.write(json.dumps(publicacao, ensure_ascii=False) + "\n")
+        logger.info(f"Publicações gravadas em {args.saida}")
+
+    if args.enviar:
+        contagem = asyncio.run(enviar(publicacoes, args.api_url.rstrip("/"), args.concorrencia))
+        logger.info(f"Envio: {contagem}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+API HTTP do scraper DJE-TJSP
+
+Sobe apenas com Flask, métricas e perfilamento. A pilha de navegador e parse
+(real_dje_scraper: selenium, bs4, aiohttp, requests) é importada na primeira
+vez que um job precisa dela, ou antes, em segundo plano, com SCRAPER_PREWARM.
+Assim /health e /progresso-busca respondem logo após a subida do container.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from flask import Flask, Response, request, jsonify, send_from_directory
+from werkzeug.security import safe_join
+from metricas import job_em_andamento, exportar
+from cancelamento import cancelar_jobs, job_cancelavel, jobs_ativos
+from estado import DJE_BASE_URL, progresso_busca
+import perfilador
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_modulo_scraper = None
+_modulo_scraper_lock = threading.Lock()
+
+
+def carregar_scraper():
+    """Importa real_dje_scraper na primeira chamada e o reutiliza nas seguintes"""
+    global _modulo_scraper
+
+    if _modulo_scraper is not None:
+        return _modulo_scraper
+
+    with _modulo_scraper_lock:
+        if _modulo_scraper is None:
+            inicio = time.perf_counter()
+            import real_dje_scraper
+            _modulo_scraper = real_dje_scraper
+            logger.info(f"Pilha de scraping carregada em {(time.perf_counter() - inicio) * 1000:.0f}ms")
+    return _modulo_scraper
+
+
+def pre_aquecer():
+    """
+    Carrega a pilha de scraping e semeia o índice de deduplicação fora do caminho das requisições
+    Também abre a caixa de saída, para que o que ficou pendente antes de um reinício volte a ser enviado
+    """
+    if os.getenv("SCRAPER_PREWARM", "true").lower() in ("1", "true", "yes"):
+        carregar_scraper()
+    from dedup_index import obter_indice
+    from caixa_saida import obter_caixa_saida
+    obter_indice(os.getenv("API_URL", "http://localhost:3001"))
+    obter_caixa_saida(os.getenv("API_URL", "http://localhost:3001"))
+
+def _criar_scraper_agendado():
+    return carregar_scraper().RealDJEScraper(endpoint="agendado")
+
+# Flask API
+app = Flask(__name__)
+
+@app.route('/run-real', methods=['POST'])
+def run_real_scraper():
+    try:
+        data = request.get_json() or {}
+        days_back = data.get('daysBack', 1)
+        
+        logger.info(f"Recebida requisição de scraping REAL: {days_back} dia(s)")
+        
+        if days_back < 1 or days_back > 7:
+            return jsonify({
+                "success": False,
+                "error": "daysBack deve estar entre 1 e 7 para dados reais"
+            }), 400
+        
+        scraper = carregar_scraper().RealDJEScraper(endpoint="run-real")
+        perfil = perfilador.criar_perfilador(data, "run-real")
+        
+        # Esgotado o prazo (PRAZO_RUN_REAL_S ou "prazo_s"), o próprio job para, libera o navegador e
+        # devolve o parcial; um timeout só na espera deixaria a thread e o Chromium rodando
+        def run_async():
+            with job_em_andamento("run-real"), perfilador.contexto(perfil), \
+                    job_cancelavel("run-real", data.get('prazo_s'), data.get('job_id')) as token:
+                scraper.vincular_cancelamento(token)
+                return asyncio.run(scraper.executar_scraping_real(days_back))
+        
+        result = run_async()
+        
+        return jsonify({
+            "success": True,
+            "message": f"Scraper REAL interrompido ({result['cancelado']}): resultado parcial" if result.get("cancelado") else "Scraper REAL executado com sucesso",
+            "stats": {
+                "total_publicacoes": result["total_encontradas"],
+                "total_inseridas": result["total_enviadas"],
+                "dates_processed": days_back,
+                "errors": result["total_erros"],
+                "fonte": "DJE-TJSP-REAL"
+            },
+            "details": result,
+            "profile_job_id": perfil.job_id if perfil else None
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro na API real: {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/status-real', methods=['GET'])
+def get_real_status():
+    import requests
+    
+    try:
+        dje_status = "unknown"
+        api_status = "unknown"
+        
+        try:
+            response = requests.get(DJE_BASE_URL, timeout=10)
+            dje_status = "connected" if response.status_code == 200 else "error"
+        except:
+            dje_status = "disconnected"
+            
+        try:
+            test_url = f"{os.getenv('API_URL', 'http://localhost:3001')}/api/health"
+            response = requests.get(test_url, timeout=5)
+            api_status = "connected" if response.status_code == 200 else "error"
+        except:
+            api_status = "disconnected"
+        
+        return jsonify({
+            "success": True,
+            "scraper_status": "operational",
+            "dje_connection": dje_status,
+            "api_connection": api_status,
+            "dje_url": DJE_BASE_URL,
+            "api_url": os.getenv('API_URL', 'http://localhost:3001'),
+            "version": "1.0.0-REAL",
+            "last_check": datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    return jsonify({
+        "status": "healthy",
+        "type": "real-dje-scraper",
+        "scraper_carregado": _modulo_scraper is not None,
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/agenda', methods=['GET'])
+def status_agenda():
+    from agendador import obter_agendador
+    agendador = obter_agendador(_criar_scraper_agendado)
+    if not agendador:
+        return jsonify({'success': False, 'message': 'Agenda desativada (AGENDA_CRON vazio)'}), 404
+    return jsonify({'success': True, **agendador.status()})
+
+@app.route('/caixa-saida', methods=['GET'])
+def status_caixa_saida():
+    from caixa_saida import obter_caixa_saida
+    caixa = obter_caixa_saida(os.getenv("API_URL", "http://localhost:3001"))
+    if not caixa:
+        return jsonify({'success': False, 'message': 'Caixa de saída desativada (CAIXA_SAIDA_PATH vazio)'}), 404
+    return jsonify({'success': True, **caixa.estatisticas()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    corpo, content_type = exportar()
+    return Response(corpo, content_type=content_type)
+
+@app.route('/profiles/<job_id>', methods=['GET'])
+def get_profile(job_id):
+    resumo = perfilador.carregar_resumo(job_id)
+    if not resumo:
+        return jsonify({
+            "success": False,
+            "error": "Perfil não encontrado"
+        }), 404
+        
+    return jsonify({
+        "success": True,
+        "perfil": resumo,
+        "downloads": [f"/profiles/{job_id}/{arquivo}" for arquivo in resumo["arquivos"]]
+    })
+
+@app.route('/profiles/<job_id>/<arquivo>', methods=['GET'])
+def download_profile(job_id, arquivo):
+    diretorio = safe_join(perfilador.DIRETORIO_PERFIS, job_id)
+    if not diretorio or not os.path.isdir(diretorio):
+        return jsonify({
+            "success": False,
+            "error": "Perfil não encontrado"
+        }), 404
+        
+    return send_from_directory(diretorio, arquivo, as_attachment=True)
+
+@app.route('/run-since-march', methods=['POST'])
+def run_scraper_since_march():
+    try:
+        logger.info("Iniciando busca automática desde 17/03/2025")
+        
+        data_inicio = datetime(2025, 3, 17)
+        data_fim = datetime.now()
+        
+        days_total = (data_fim - data_inicio).days
+        
+        logger.info(f"Período: {data_inicio.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')} ({days_total} dias)")
+        
+        data = request.get_json(silent=True) or {}
+        scraper = carregar_scraper().RealDJEScraper(endpoint="run-since-march")
+        perfil = perfilador.criar_perfilador(data, "run-since-march")
+        
+        def run_async():
+            with job_em_andamento("run-since-march"), perfilador.contexto(perfil), \
+                    job_cancelavel("run-since-march", data.get('prazo_s'), data.get('job_id')) as token:
+                scraper.vincular_cancelamento(token)
+                return asyncio.run(scraper.executar_scraping_periodo_customizado(data_inicio, data_fim))
+        
+        result = run_async()
+        
+        return jsonify({
+            "success": True,
+            "message": f"Busca desde 17/03/2025 interrompida ({result['cancelado']}): resultado parcial" if result.get("cancelado") else "Busca desde 17/03/2025 executada com sucesso",
+            "stats": {
+                "total_publicacoes": result["total_encontradas"],
+                "total_inseridas": result["total_enviadas"],
+                "dates_processed": days_total,
+                "errors": result["total_erros"],
+                "fonte": "DJE-TJSP-REAL",
+                "data_inicio": "17/03/2025",
+                "data_fim": data_fim.strftime('%d/%m/%Y')
+            },
+            "details": result,
+            "profile_job_id": perfil.job_id if perfil else None
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro na busca desde março: {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/busca-personalizada', methods=['POST'])
+def busca_personalizada():
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                'success': False,
+                'message': 'Dados não fornecidos'
+            }), 400
+            
+        termos = data.get('termos', '')
+        data_inicio_str = data.get('data_inicio', '')
+        data_fim_str = data.get('data_fim', '')
+        
+        if not termos or not data_inicio_str or not data_fim_str:
+            return jsonify({
+                'success': False,
+                'message': 'Termos, data de início e data fim são obrigatórios'
+            }), 400
+            
+        logger.info(f"Iniciando busca personalizada")
+        logger.info(f"Termos: {termos}")
+        logger.info(f"Período: {data_inicio_str} até {data_fim_str}")
+        
+        try:
+            if '/' in data_inicio_str:
+                data_inicio = datetime.strptime(data_inicio_str, '%d/%m/%Y')
+                data_fim = datetime.strptime(data_fim_str, '%d/%m/%Y')
+            else:
+                data_inicio = datetime.strptime(data_inicio_str, '%Y-%m-%d')
+                data_fim = datetime.strptime(data_fim_str, '%Y-%m-%d')
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Formato de data inválido. Use DD/MM/YYYY ou YYYY-MM-DD: {e}'
+            }), 400
+            
+        if data_inicio > data_fim:
+            return jsonify({
+                'success': False,
+                'message': 'Data de início deve ser anterior à data fim'
+            }), 400
+            
+        dias_diferenca = (data_fim - data_inicio).days
+        if dias_diferenca > 30:
+            return jsonify({
+                'success': False,
+                'message': 'Período máximo permitido é de 30 dias'
+            }), 400
+            
+        perfil = perfilador.criar_perfilador(data, "busca-personalizada")
+        
+        def run_async():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                with job_em_andamento("busca-personalizada"), perfilador.contexto(perfil), \
+                        job_cancelavel("busca-personalizada", data.get('prazo_s'), data.get('job_id')) as token:
+                    return loop.run_until_complete(carregar_scraper().executar_busca_personalizada(data_inicio, data_fim, termos, token))
+            finally:
+                loop.close()
+                
+        resultado = run_async()
+        if perfil:
+            resultado['profile_job_id'] = perfil.job_id
+        
+        return jsonify(resultado)
+        
+    except Exception as e:
+        logger.error(f"Erro na busca personalizada: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Erro interno: {str(e)}'
+        }), 500
+
+@app.route('/jobs', methods=['GET'])
+def listar_jobs():
+    """Jobs HTTP em andamento neste processo, com o prazo restante"""
+    return jsonify({'success': True, 'jobs': jobs_ativos()})
+
+@app.route('/jobs/cancelar', methods=['POST'])
+def cancelar_job():
+    """
+    Cancela os jobs em andamento filtrados por job_id e/ou endpoint; todos só com "todos": true
+    Cada job para no próximo ponto seguro e a requisição dele responde com o resultado parcial
+    """
+    data = request.get_json(silent=True) or {}
+    if not data.get('job_id') and not data.get('endpoint') and data.get('todos') is not True:
+        return jsonify({'success': False, 'message': 'Informe job_id ou endpoint (ou "todos": true)'}), 400
+    cancelados = cancelar_jobs(data.get('job_id'), data.get('endpoint'), data.get('motivo') or 'cancelado pelo usuário')
+    logger.info(f"Cancelamento solicitado: {len(cancelados)} job(s)")
+    return jsonify({'success': True, 'cancelados': cancelados})
+
+@app.route('/progresso-busca', methods=['GET'])
+def get_progresso_busca():
+    try:
+        porcentagem = 0
+        if progresso_busca['total_dias'] > 0:
+            porcentagem = (progresso_busca['dias_processados'] / progresso_busca['total_dias']) * 100
+        
+        return jsonify({
+            'success': True,
+            'ativa': progresso_busca['ativa'],
+            'data_atual': progresso_busca['data_atual'],
+            'total_dias': progresso_busca['total_dias'],
+            'dias_processados': progresso_busca['dias_processados'],
+            'publicacoes_encontradas': progresso_busca['publicacoes_encontradas'],
+            'termos_buscados': progresso_busca['termos_buscados'],
+            'periodo': progresso_busca['periodo'],
+            'porcentagem': round(porcentagem, 1),
+            'inicio': progresso_busca['inicio'],
+            'dias_do_cache': progresso_busca['dias_do_cache'],
+            'dias_do_indice': progresso_busca['dias_do_indice'],
+            'erro': progresso_busca['erro']
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _periodo_da_consulta(fonte=None):
+    """data_inicio e data_fim da query string, ou de fonte (DD/MM/YYYY ou YYYY-MM-DD); ValueError se ausentes ou inválidas"""
+    fonte = request.args if fonte is None else fonte
+    datas = []
+    for campo in ('data_inicio', 'data_fim'):
+        valor = str(fonte.get(campo) or '')
+        formato = '%d/%m/%Y' if '/' in valor else '%Y-%m-%d'
+        datas.append(datetime.strptime(valor, formato))
+    return datas
+
+@app.route('/indice/busca', methods=['GET'])
+def busca_indice():
+    """Busca por termos (separados por vírgula) nos textos já coletados, sem acessar o DJE"""
+    from indice_textual import obter_indice_textual
+
+    indice = obter_indice_textual()
+    if not indice:
+        return jsonify({'success': False, 'message': 'Índice textual desativado'}), 503
+    
+    termos = [termo.strip() for termo in request.args.get('termos', '').split(',') if termo.strip()]
+    try:
+        data_inicio, data_fim = _periodo_da_consulta()
+        limite = min(int(request.args.get('limite', 100)), 1000)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Parâmetros inválidos: {e}'}), 400
+    if not termos:
+        return jsonify({'success': False, 'message': 'Termos são obrigatórios'}), 400
+    
+    inicio = time.perf_counter()
+    resultados = indice.buscar(termos, data_inicio, data_fim, limite)
+    return jsonify({
+        'success': True,
+        'publicacoes': resultados,
+        'total': len(resultados),
+        'cobertura': indice.cobertura(data_inicio, data_fim),
+        'tempo_ms': round((time.perf_counter() - inicio) * 1000, 1)
+    })
+
+@app.route('/indice/cobertura', methods=['GET'])
+def cobertura_indice():
+    """Datas do período já coletadas por completo (respondidas pelo índice) e pendentes"""
+    from indice_textual import obter_indice_textual
+
+    indice = obter_indice_textual()
+    if not indice:
+        return jsonify({'success': False, 'message': 'Índice textual desativado'}), 503
+    try:
+        data_inicio, data_fim = _periodo_da_consulta()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Parâmetros inválidos: {e}'}), 400
+    return jsonify({'success': True, **indice.cobertura(data_inicio, data_fim)})
+
+@app.route('/fila/lotes', methods=['POST'])
+def criar_lote_fila():
+    """Divide o período em tarefas por data (e conjunto de termos) na fila distribuída"""
+    from fila_trabalho import obter_fila
+    fila = obter_fila()
+    if not fila:
+        return jsonify({'success': False, 'message': 'Fila desativada (FILA_DATABASE_URL vazio)'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        data_inicio, data_fim = _periodo_da_consulta(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Parâmetros inválidos: {e}'}), 400
+    if data_fim < data_inicio:
+        return jsonify({'success': False, 'message': 'data_fim anterior a data_inicio'}), 400
+    
+    # Cada item de "termos" é um conjunto separado por vírgula; sem termos, usa os termos padrão
+    conjuntos = [str(item).split(',') for item in data.get('termos') or ['']]
+    lote, tarefas = fila.criar_lote(data_inicio, data_fim, conjuntos)
+    return jsonify({'success': True, 'lote': lote, 'tarefas': tarefas}), 201
+
+@app.route('/fila/lotes/<lote>', methods=['GET'])
+def progresso_lote_fila(lote):
+    from fila_trabalho import obter_fila
+    fila = obter_fila()
+    if not fila:
+        return jsonify({'success': False, 'message': 'Fila desativada (FILA_DATABASE_URL vazio)'}), 404
+    progresso = fila.progresso(lote)
+    if progresso is None:
+        return jsonify({'success': False, 'message': 'Lote não encontrado'}), 404
+    return jsonify({'success': True, **progresso})
+
+def iniciar_trabalhador_fila():
+    """Com a fila habilitada e FILA_TRABALHADOR ativo, esta réplica processa tarefas em segundo plano"""
+    if os.getenv("FILA_TRABALHADOR", "true").lower() not in ("1", "true", "yes"):
+        return
+    from fila_trabalho import ProcessadorScraper, TrabalhadorFila, obter_fila
+    fila = obter_fila()
+    if fila:
+        processar = ProcessadorScraper(lambda: carregar_scraper().RealDJEScraper(endpoint="fila"))
+        TrabalhadorFila(fila, processar, espera_s=float(os.getenv("FILA_ESPERA_S", "10"))).iniciar()
+
+def main():
+    logger.info("Iniciando Real DJE Scraper na porta 5002")
+    logger.info("Endpoints disponíveis:")
+    logger.info("   POST /run-real - Executar scraping real")
+    logger.info("   GET /status-real - Status do scraper real")
+    logger.info("   GET /health - Health check")
+    logger.info("   GET /metrics - Métricas Prometheus")
+    logger.info("   GET /caixa-saida - Publicações aguardando entrega à API")
+    logger.info("   GET /agenda - Execuções agendadas (AGENDA_CRON)")
+    logger.info("   GET /jobs - Jobs em andamento e prazo restante")
+    logger.info("   POST /jobs/cancelar - Interrompe jobs em andamento (resultado parcial)")
+    logger.info("   POST /fila/lotes - Backfill dividido entre réplicas (FILA_DATABASE_URL)")
+    logger.info("   GET /fila/lotes/<lote> - Progresso do backfill em todas as réplicas")
+    logger.info("   GET /profiles/<job_id> - Perfil de um job (campo 'profile' na requisição)")
+    logger.info("   POST /run-since-march - Buscar desde 17/03/2025")
+    logger.info("   GET /indice/busca - Busca por termos no índice textual local")
+    logger.info("   GET /indice/cobertura - Datas já coletadas por completo")
+    
+    # Pilha de scraping, índice de deduplicação e caixa de saída carregam sem atrasar a subida do Flask
+    threading.Thread(target=pre_aquecer, daemon=True).start()
+    
+    from agendador import obter_agendador
+    agendador = obter_agendador(_criar_scraper_agendado)
+    if agendador:
+        agendador.iniciar()
+    threading.Thread(target=iniciar_trabalhador_fila, daemon=True).start()
+    
+    app.run(host='0.0.0.0', port=5002, debug=False)
+
+
+if __name__ == "__main__":
+    main()
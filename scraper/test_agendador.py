@@ -0,0 +1,122 @@
+from datetime import datetime
+
+import pytest
+
+from agendador import MAX_DIAS_RECUPERACAO, Agendador, ExpressaoCron
+
+
+class ScraperFalso:
+    def __init__(self):
+        self.manter_driver = False
+        self.execucoes = []
+
+    async def executar_scraping_real(self, dias):
+        self.execucoes.append(dias)
+        return {"success": True, "total_encontradas": 2, "total_enviadas": 1}
+
+
+def criar_agendador(tmp_path, cron="0 8,14,18 * * *", dias=1):
+    scraper = ScraperFalso()
+    agendador = Agendador(ExpressaoCron(cron), lambda: scraper, dias=dias,
+                          caminho_estado=str(tmp_path / "estado.json"))
+    return agendador, scraper
+
+
+def test_campos_cron():
+    cron = ExpressaoCron("*/15 8-18/2 1,15 * 1-5")
+    assert cron.minutos == {0, 15, 30, 45}
+    assert cron.horas == {8, 10, 12, 14, 16, 18}
+    assert cron.dias == {1, 15}
+    assert cron.meses == set(range(1, 13))
+    assert cron.dias_semana == {1, 2, 3, 4, 5}
+
+
+def test_domingo_zero_ou_sete():
+    assert ExpressaoCron("0 8 * * 7").dias_semana == {0}
+    assert ExpressaoCron("0 8 * * 0").dias_semana == {0}
+
+
+@pytest.mark.parametrize("expressao", ["0 8 * *", "60 8 * * *", "0 24 * * *", "0 8 0 * *", "0 18-8 * * *"])
+def test_expressao_invalida(expressao):
+    with pytest.raises(ValueError):
+        ExpressaoCron(expressao)
+
+
+def test_proximo_e_anterior():
+    cron = ExpressaoCron("0 8,14,18 * * *")
+    assert cron.proximo(datetime(2025, 6, 13, 9, 30)) == datetime(2025, 6, 13, 14, 0)
+    # Estritamente depois: o próprio horário não conta
+    assert cron.proximo(datetime(2025, 6, 13, 14, 0)) == datetime(2025, 6, 13, 18, 0)
+    assert cron.proximo(datetime(2025, 6, 13, 19, 0)) == datetime(2025, 6, 14, 8, 0)
+    # Até, inclusive
+    assert cron.anterior(datetime(2025, 6, 13, 14, 0)) == datetime(2025, 6, 13, 14, 0)
+    assert cron.anterior(datetime(2025, 6, 13, 7, 59)) == datetime(2025, 6, 12, 18, 0)
+
+
+def test_dias_da_semana():
+    cron = ExpressaoCron("0 8 * * 1-5")
+    # 13/06/2025 é sexta-feira: o próximo horário é segunda
+    assert cron.proximo(datetime(2025, 6, 13, 9, 0)) == datetime(2025, 6, 16, 8, 0)
+
+
+def test_dia_ou_dia_da_semana():
+    # Como no cron: dia 1 ou qualquer segunda
+    cron = ExpressaoCron("0 8 1 * 1")
+    assert cron.proximo(datetime(2025, 6, 10, 9, 0)) == datetime(2025, 6, 16, 8, 0)
+    assert cron.proximo(datetime(2025, 6, 30, 9, 0)) == datetime(2025, 7, 1, 8, 0)
+
+
+def test_dias_da_execucao(tmp_path):
+    agendador, _ = criar_agendador(tmp_path, dias=2)
+    agora = datetime(2025, 6, 13, 8, 0)
+    assert agendador.dias_da_execucao(agora) == 2
+
+    agendador.estado["ultima_conclusao"] = datetime(2025, 6, 9, 18, 0).isoformat()
+    assert agendador.dias_da_execucao(agora) == 4
+
+    agendador.estado["ultima_conclusao"] = datetime(2025, 5, 1, 18, 0).isoformat()
+    assert agendador.dias_da_execucao(agora) == MAX_DIAS_RECUPERACAO
+
+
+def test_primeira_subida_nao_recupera(tmp_path):
+    agendador, scraper = criar_agendador(tmp_path, cron="* * * * *")
+    agendador.encerrar.set()
+    agendador._laco()
+
+    assert scraper.execucoes == []
+    assert agendador.estado["ultimo_horario"]
+    assert (tmp_path / "estado.json").exists()
+
+
+def test_recupera_horario_perdido(tmp_path):
+    agendador, scraper = criar_agendador(tmp_path, cron="* * * * *")
+    agendador.estado = {
+        "ultimo_horario": datetime(2000, 1, 1, 8, 0).isoformat(),
+        "ultima_conclusao": datetime(2000, 1, 1, 8, 5).isoformat(),
+    }
+    agendador.encerrar.set()
+    agendador._laco()
+
+    # Todos os horários perdidos viram uma única execução, limitada a MAX_DIAS_RECUPERACAO
+    assert scraper.execucoes == [MAX_DIAS_RECUPERACAO]
+    assert datetime.fromisoformat(agendador.estado["ultimo_horario"]) > datetime(2000, 1, 1, 8, 0)
+    assert agendador.estado["ultima_execucao"]["total_enviadas"] == 1
+    assert not agendador.em_execucao
+
+
+def test_estado_sobrevive_a_reinicio(tmp_path):
+    agendador, _ = criar_agendador(tmp_path)
+    agendador.executar(datetime(2025, 6, 13, 8, 0))
+
+    reiniciado, _ = criar_agendador(tmp_path)
+    assert reiniciado.estado["ultimo_horario"] == datetime(2025, 6, 13, 8, 0).isoformat()
+    assert "ultima_conclusao" in reiniciado.estado
+
+
+def test_execucao_nao_sobrepoe(tmp_path):
+    agendador, scraper = criar_agendador(tmp_path)
+    agendador.em_execucao = True
+
+    resultado = agendador.executar(datetime(2025, 6, 13, 8, 0))
+    assert resultado["success"] is False
+    assert scraper.execucoes == []
@@ -0,0 +1,77 @@
+import time
+from datetime import date, datetime, timedelta
+
+from cache_buscas import CacheBuscas, normalizar_termos
+
+
+class PublicacaoFalsa:
+    def __init__(self, tamanho=100):
+        self.tamanho = tamanho
+
+    def tamanho_em_memoria(self):
+        return self.tamanho
+
+
+ONTEM = date.today() - timedelta(days=1)
+
+
+def test_normalizar_termos():
+    assert normalizar_termos(["  RPV ", "rpv", "pagamento   pelo INSS", ""]) == ("RPV", "pagamento pelo INSS")
+
+
+def test_termos_equivalentes_compartilham_entrada():
+    cache = CacheBuscas(10_000, ttl_hoje=60)
+    publicacoes = [PublicacaoFalsa()]
+    cache.guardar(["RPV", "INSS"], datetime(2025, 6, 13, 10, 0), publicacoes)
+
+    assert cache.obter([" RPV", "INSS", "rpv"], date(2025, 6, 13)) == publicacoes
+    # A ordem conta: termosEncontrados traz o primeiro termo pedido
+    assert cache.obter(["INSS", "RPV"], date(2025, 6, 13)) is None
+
+
+def test_hoje_expira():
+    cache = CacheBuscas(10_000, ttl_hoje=0.05)
+    cache.guardar(["RPV"], date.today(), [PublicacaoFalsa()])
+    assert cache.obter(["RPV"], date.today()) is not None
+
+    time.sleep(0.1)
+    assert cache.obter(["RPV"], date.today()) is None
+    assert cache.bytes == 0
+
+
+def test_datas_passadas_nao_expiram():
+    cache = CacheBuscas(10_000, ttl_hoje=0)
+    cache.guardar(["RPV"], ONTEM, [PublicacaoFalsa()])
+    time.sleep(0.01)
+    assert cache.obter(["RPV"], ONTEM) is not None
+
+
+def test_remove_menos_usado_acima_do_limite():
+    # Cada entrada: 100 bytes das publicações + 64 x (1 + 1) de overhead
+    cache = CacheBuscas(3 * 228, ttl_hoje=60)
+    dias = [ONTEM - timedelta(days=i) for i in range(3)]
+    for dia in dias:
+        cache.guardar(["RPV"], dia, [PublicacaoFalsa()])
+    cache.obter(["RPV"], dias[0])
+
+    cache.guardar(["RPV"], ONTEM - timedelta(days=3), [PublicacaoFalsa()])
+
+    assert cache.obter(["RPV"], dias[1]) is None
+    assert cache.obter(["RPV"], dias[0]) is not None
+    assert cache.estatisticas()["remocoes"] == 1
+    assert cache.bytes <= cache.max_bytes
+
+
+def test_entrada_maior_que_o_cache_nao_entra():
+    cache = CacheBuscas(100, ttl_hoje=60)
+    cache.guardar(["RPV"], ONTEM, [PublicacaoFalsa(1000)])
+    assert cache.obter(["RPV"], ONTEM) is None
+    assert cache.bytes == 0
+
+
+def test_regravar_nao_duplica_bytes():
+    cache = CacheBuscas(10_000, ttl_hoje=60)
+    cache.guardar(["RPV"], ONTEM, [PublicacaoFalsa()])
+    cache.guardar(["RPV"], ONTEM, [PublicacaoFalsa()])
+    assert cache.bytes == 228
+    assert cache.estatisticas()["entradas"] == 1
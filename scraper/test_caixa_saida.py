@@ -0,0 +1,177 @@
+import json
+import sqlite3
+
+import pytest
+
+from caixa_saida import PENDENTE, REJEITADA, CaixaSaida
+
+
+class RespostaFalsa:
+    def __init__(self, status_code, corpo=None):
+        self.status_code = status_code
+        self.corpo = corpo or {}
+        self.text = json.dumps(self.corpo)
+
+    def json(self):
+        return self.corpo
+
+
+class RespostaInvalida(RespostaFalsa):
+    def json(self):
+        raise ValueError("Expecting value")
+
+
+@pytest.fixture
+def caixa(tmp_path):
+    caixa = CaixaSaida(str(tmp_path / "caixa.db"), "http://api", backoff_inicial=0, backoff_max=0)
+    yield caixa
+    caixa.conn.close()
+
+
+def linha(caixa, numero):
+    return caixa.conn.execute(
+        "SELECT corpo, estado, prioridade, tentativas, ultimo_erro FROM pendentes WHERE numero_processo = ?", (numero,)
+    ).fetchone()
+
+
+def test_enfileirar_repetido(caixa):
+    assert caixa.enfileirar({"numeroProcesso": "1", "autores": "A"})
+    assert not caixa.enfileirar({"numeroProcesso": "1", "autores": "B"})
+
+    corpo, estado, *_ = linha(caixa, "1")
+    assert json.loads(corpo)["autores"] == "B"
+    assert estado == PENDENTE
+    assert caixa._contar(PENDENTE) == 1
+
+
+def test_prioridade_so_sobe(caixa):
+    caixa.enfileirar({"numeroProcesso": "1"}, prioridade=1)
+    caixa.enfileirar({"numeroProcesso": "1"}, prioridade=5)
+    caixa.enfileirar({"numeroProcesso": "1"}, prioridade=2)
+    assert linha(caixa, "1")[2] == 5
+
+
+def test_lote_por_prioridade(caixa):
+    caixa.enfileirar({"numeroProcesso": "backlog"})
+    caixa.enfileirar({"numeroProcesso": "interativa"}, prioridade=10)
+    assert [numero for numero, *_ in caixa._proximo_lote()] == ["interativa", "backlog"]
+
+
+def test_entregues_saem_e_rejeitadas_ficam(caixa):
+    caixa.enfileirar({"numeroProcesso": "1"})
+    caixa.enfileirar({"numeroProcesso": "2"})
+    caixa._concluir(caixa._proximo_lote(), {"2": "autores obrigatório"})
+
+    assert linha(caixa, "1") is None
+    _, estado, _, _, erro = linha(caixa, "2")
+    assert (estado, erro) == (REJEITADA, "autores obrigatório")
+    assert caixa._proximo_lote() == []
+
+
+def test_rejeitada_volta_a_pendente(caixa):
+    caixa.enfileirar({"numeroProcesso": "1", "autores": ""})
+    caixa._registrar_falha(["1"], "timeout")
+    caixa._concluir(caixa._proximo_lote(), {"1": "autores obrigatório"})
+
+    assert caixa.enfileirar({"numeroProcesso": "1", "autores": "Maria"}, prioridade=3)
+    corpo, estado, prioridade, tentativas, erro = linha(caixa, "1")
+    assert json.loads(corpo)["autores"] == "Maria"
+    assert (estado, prioridade, tentativas, erro) == (PENDENTE, 3, 0, None)
+    assert [numero for numero, *_ in caixa._proximo_lote()] == ["1"]
+
+
+def test_corpo_regravado_durante_o_envio_fica(caixa):
+    caixa.enfileirar({"numeroProcesso": "1", "autores": "A"})
+    caixa.enfileirar({"numeroProcesso": "2", "autores": ""})
+    lote = caixa._proximo_lote()
+
+    # Reextraídas enquanto o lote estava na API
+    caixa.enfileirar({"numeroProcesso": "1", "autores": "B"})
+    caixa.enfileirar({"numeroProcesso": "2", "autores": "C"})
+    caixa._concluir(lote, {"2": "autores obrigatório"})
+
+    assert json.loads(linha(caixa, "1")[0])["autores"] == "B"
+    assert linha(caixa, "2")[1] == PENDENTE
+    assert sorted(numero for numero, *_ in caixa._proximo_lote()) == ["1", "2"]
+
+
+def test_falha_mantem_pendente(caixa):
+    caixa.enfileirar({"numeroProcesso": "1"})
+    caixa._registrar_falha(["1"], "HTTP 503")
+
+    _, estado, _, tentativas, erro = linha(caixa, "1")
+    assert (estado, tentativas, erro) == (PENDENTE, 1, "HTTP 503")
+
+
+class SessaoFalsa:
+    def __init__(self, resposta):
+        self.resposta = resposta
+        self.corpos = []
+
+    def post(self, url, data, headers, timeout):
+        self.corpos.append(json.loads(data))
+        return self.resposta
+
+
+def test_enviar_lote(caixa):
+    caixa.enfileirar({"numeroProcesso": "1"})
+    caixa.enfileirar({"numeroProcesso": "2"})
+    caixa.sessao = SessaoFalsa(RespostaFalsa(200, {"data": {
+        "criadas": 1, "rejeitadas": [{"numeroProcesso": "2", "erro": "conteudo obrigatório"}]
+    }}))
+
+    assert caixa.enviar_lote(caixa._proximo_lote())
+    assert len(caixa.sessao.corpos[0]["publicacoes"]) == 2
+    assert linha(caixa, "1") is None
+    assert linha(caixa, "2")[1] == REJEITADA
+
+
+def test_enviar_lote_api_fora(caixa):
+    caixa.enfileirar({"numeroProcesso": "1"})
+    caixa.sessao = SessaoFalsa(RespostaFalsa(503))
+
+    assert not caixa.enviar_lote(caixa._proximo_lote())
+    _, estado, _, tentativas, _ = linha(caixa, "1")
+    assert (estado, tentativas) == (PENDENTE, 1)
+
+
+def test_lote_grande_demais_divide(caixa):
+    for numero in range(4):
+        caixa.enfileirar({"numeroProcesso": str(numero)})
+    caixa.sessao = SessaoFalsa(RespostaFalsa(413))
+
+    assert caixa.enviar_lote(caixa._proximo_lote())
+    assert caixa.tamanho_lote == 2
+    assert caixa._contar(PENDENTE) == 4
+
+
+def test_resposta_invalida_conta_como_falha(caixa):
+    caixa.enfileirar({"numeroProcesso": "1"})
+    caixa.sessao = SessaoFalsa(RespostaInvalida(200))
+
+    assert not caixa.enviar_lote(caixa._proximo_lote())
+    _, estado, _, tentativas, erro = linha(caixa, "1")
+    assert (estado, tentativas) == (PENDENTE, 1)
+    assert erro.startswith("resposta inválida")
+
+
+def test_esvaziador_sobrevive_a_erros(caixa, monkeypatch):
+    caixa.enfileirar({"numeroProcesso": "1"})
+    caixa.sessao = SessaoFalsa(RespostaFalsa(200, {"data": {"criadas": 1}}))
+
+    proximo_lote = caixa._proximo_lote
+    erros = [sqlite3.OperationalError("database is locked")]
+
+    def proximo_lote_instavel():
+        if erros:
+            raise erros.pop()
+        return proximo_lote()
+
+    monkeypatch.setattr(caixa, "_proximo_lote", proximo_lote_instavel)
+    caixa.iniciar()
+    try:
+        assert caixa.aguardar_vazia(5)
+    finally:
+        caixa.parar()
+    assert not erros
+    assert caixa.entregues == 1
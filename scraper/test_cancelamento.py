@@ -0,0 +1,159 @@
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from cancelamento import PRAZO_ESGOTADO, JobCancelado, TokenCancelamento, cancelar_jobs, job_cancelavel, jobs_ativos
+from metricas import medir
+from paginacao import InfoPaginacao, RastreadorPaginacao
+
+
+def test_cancelar_por_job_id():
+    with job_cancelavel("run-real", 0, "a") as a, job_cancelavel("run-real", 0, "b") as b:
+        cancelados = cancelar_jobs(job_id="a", motivo="teste")
+
+        assert [job["job_id"] for job in cancelados] == ["a"]
+        assert a.cancelado and a.motivo == "teste"
+        assert not b.cancelado
+
+
+def test_cancelar_por_endpoint():
+    with job_cancelavel("run-since-march", 0, "backfill") as backfill, \
+            job_cancelavel("busca-personalizada", 0, "busca") as busca:
+        cancelados = cancelar_jobs(endpoint="run-since-march")
+
+        assert [job["job_id"] for job in cancelados] == ["backfill"]
+        assert backfill.cancelado
+        assert not busca.cancelado
+
+
+def test_filtros_combinados():
+    with job_cancelavel("run-real", 0, "a") as a:
+        assert cancelar_jobs(job_id="a", endpoint="busca-personalizada") == []
+        assert not a.cancelado
+
+
+def test_sem_filtro_cancela_todos():
+    with job_cancelavel("run-real", 0, "a") as a, job_cancelavel("busca-personalizada", 0, "b") as b:
+        assert {job["job_id"] for job in cancelar_jobs()} == {"a", "b"}
+        assert a.cancelado and b.cancelado
+
+
+def test_job_ja_cancelado_nao_conta_de_novo():
+    with job_cancelavel("run-real", 0, "a"):
+        assert len(cancelar_jobs(job_id="a")) == 1
+        assert cancelar_jobs(job_id="a") == []
+
+
+def test_job_sai_do_registro():
+    with job_cancelavel("run-real", 0, "a"):
+        assert [job["job_id"] for job in jobs_ativos()] == ["a"]
+    assert jobs_ativos() == []
+    assert cancelar_jobs(job_id="a") == []
+
+
+def test_prazo_esgotado():
+    token = TokenCancelamento(0.05)
+    time.sleep(0.1)
+    assert token.cancelado
+    assert token.motivo == PRAZO_ESGOTADO
+    with pytest.raises(JobCancelado):
+        token.verificar()
+    token.encerrar()
+
+
+def test_limitar_pelo_prazo():
+    assert TokenCancelamento().limitar(30) == 30
+    token = TokenCancelamento(10)
+    assert token.limitar(30) <= 10
+    assert token.limitar(2) == 2
+    token.encerrar()
+
+
+def test_esperar_volta_ao_cancelar():
+    token = TokenCancelamento()
+    token.ao_cancelar(lambda: None)
+    inicio = time.monotonic()
+    token.cancelar("teste")
+    assert token.esperar(5)
+    assert time.monotonic() - inicio < 1
+
+
+def test_callback_chamado_uma_vez():
+    chamadas = []
+    token = TokenCancelamento()
+    token.ao_cancelar(lambda: chamadas.append(1))
+    assert token.cancelar()
+    assert not token.cancelar()
+    assert chamadas == [1]
+    # Registrado depois do cancelamento: chamado na hora
+    token.ao_cancelar(lambda: chamadas.append(2))
+    assert chamadas == [1, 2]
+
+
+class DriverPaginasJavascript:
+    """Resultado com três páginas por trocaDePg; cancela o token ao abrir a página 2"""
+    current_url = "https://dje.tjsp.jus.br/cdje/consultaSimples.do"
+    page_source = '<a href="javascript:trocaDePg(2)">2</a><a href="javascript:trocaDePg(3)">3</a>'
+
+    def __init__(self, token):
+        self.token = token
+        self.paginas = []
+
+    def execute_script(self, script):
+        if script.startswith("trocaDePg"):
+            self.paginas.append(script)
+            self.token.cancelar("teste")
+        return "complete"
+
+
+def test_paginacao_javascript_para_no_cancelamento():
+    token = TokenCancelamento()
+    driver = DriverPaginasJavascript(token)
+    rastreador = RastreadorPaginacao(driver, max_paginas=0, cancelamento=token)
+
+    inicio = time.monotonic()
+    with pytest.raises(JobCancelado):
+        rastreador.coletar_html()
+    assert time.monotonic() - inicio < 0.5
+    assert driver.paginas == ["trocaDePg(2);"]
+    assert rastreador.paginas_com_falha == 0
+
+
+class SessaoFalsa:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, timeout):
+        self.urls.append(url)
+
+    def close(self):
+        pass
+
+
+def test_download_de_paginas_nao_sai_com_job_cancelado(monkeypatch):
+    token = TokenCancelamento()
+    token.cancelar("teste")
+    rastreador = RastreadorPaginacao(None, cancelamento=token)
+    sessao = SessaoFalsa()
+    monkeypatch.setattr(rastreador, "_criar_sessao", lambda: sessao)
+
+    info = InfoPaginacao(total_paginas=3, url_modelo="https://dje.tjsp.jus.br/cdje/c.do?pagina=2", parametro="pagina")
+    with pytest.raises(JobCancelado):
+        rastreador._baixar_urls(info, 3)
+    assert sessao.urls == []
+
+
+def erros_da_etapa():
+    labels = {"stage": "teste", "engine": "selenium", "endpoint": "teste"}
+    return REGISTRY.get_sample_value("dje_stage_errors_total", labels) or 0
+
+
+@pytest.mark.parametrize("erro, conta", [(ValueError("html inesperado"), 1), (JobCancelado("teste"), 0),
+                                         (KeyboardInterrupt(), 0)])
+def test_cancelamento_nao_e_erro_de_etapa(erro, conta):
+    antes = erros_da_etapa()
+    with pytest.raises(type(erro)):
+        with medir("teste", "selenium", "teste"):
+            raise erro
+    assert erros_da_etapa() - antes == conta
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+import dedup_index
+from dedup_index import FiltroBloom, IndiceProcessosVistos
+
+NUMEROS = [f"{i:07d}-89.2024.8.26.0100" for i in range(2000)]
+
+
+@pytest.fixture
+def indice(tmp_path):
+    indice = IndiceProcessosVistos(str(tmp_path / "vistos.db"), capacidade=1000)
+    yield indice
+    indice.conn.close()
+
+
+def test_bloom_sem_falso_negativo():
+    bloom = FiltroBloom(capacidade=len(NUMEROS))
+    for numero in NUMEROS:
+        bloom.adicionar(numero)
+    assert all(numero in bloom for numero in NUMEROS)
+
+
+def test_bloom_taxa_de_falso_positivo():
+    bloom = FiltroBloom(capacidade=len(NUMEROS), taxa_falso_positivo=0.01)
+    for numero in NUMEROS:
+        bloom.adicionar(numero)
+    falsos = sum(f"{i:07d}-11.2023.8.26.0001" in bloom for i in range(10_000))
+    assert falsos < 300
+
+
+def test_adicionar_e_contem(indice):
+    assert not indice.contem(NUMEROS[0])
+    indice.adicionar(NUMEROS[0])
+    assert indice.adicionar_varios(NUMEROS[1:3] + [""]) == 2
+
+    assert all(indice.contem(numero) for numero in NUMEROS[:3])
+    assert indice.total() == 3
+
+
+def test_falso_positivo_do_bloom_e_confirmado_no_disco(indice):
+    indice.adicionar(NUMEROS[0])
+    # Bloom saturado: responde "talvez" para qualquer chave
+    indice.bloom.bits = bytearray(b"\xff" * len(indice.bloom.bits))
+
+    assert not indice.contem(NUMEROS[1])
+    assert indice.contem(NUMEROS[0])
+    assert indice.consultas_disco == 2
+
+
+def test_novo_sem_tocar_no_disco(indice):
+    indice.adicionar(NUMEROS[0])
+    assert not indice.contem(NUMEROS[1])
+    assert indice.consultas_disco == 0
+
+
+def test_reaberto_carrega_do_disco(tmp_path):
+    caminho = str(tmp_path / "vistos.db")
+    IndiceProcessosVistos(caminho).adicionar_varios(NUMEROS[:10])
+
+    reaberto = IndiceProcessosVistos(caminho)
+    assert reaberto.total() == 10
+    assert reaberto.contem(NUMEROS[9])
+
+
+def test_semeadura_nao_bloqueia(tmp_path, monkeypatch):
+    liberar = threading.Event()
+
+    class Resposta:
+        status_code = 200
+
+        def json(self):
+            return {"data": NUMEROS[:5], "proximoCursor": None}
+
+    def get_lento(*args, **kwargs):
+        liberar.wait(5)
+        return Resposta()
+
+    monkeypatch.setenv("DEDUP_INDEX_PATH", str(tmp_path / "vistos.db"))
+    monkeypatch.setattr(dedup_index, "_indice_global", None)
+    monkeypatch.setattr(dedup_index.requests, "get", get_lento)
+
+    indice = dedup_index.obter_indice("http://api")
+    assert not indice.semeado.is_set()
+
+    liberar.set()
+    assert indice.semeado.wait(5)
+    assert indice.total() == 5
+    assert indice._ler_meta("ultima_semeadura")
+
+
+def test_api_fora_tambem_encerra_a_semeadura(indice, monkeypatch):
+    def recusar(*args, **kwargs):
+        raise ConnectionError("conexão recusada")
+
+    monkeypatch.setattr(dedup_index.requests, "get", recusar)
+    indice.semear_em_segundo_plano("http://api").join(5)
+    assert indice.semeado.is_set()
+    assert indice._ler_meta("ultima_semeadura") is None
+
+
+class CaixaFalsa:
+    def __init__(self):
+        self.numeros = []
+
+    def enfileirar(self, publicacao, prioridade=0):
+        self.numeros.append(publicacao["numeroProcesso"])
+        return True
+
+
+def test_envio_usa_o_indice_so_depois_da_semeadura(indice, monkeypatch):
+    for variavel in ("DEDUP_INDEX_PATH", "INDICE_TEXTUAL_PATH", "ARQUIVO_PAGINAS_DIR", "CAIXA_SAIDA_PATH"):
+        monkeypatch.setenv(variavel, "")
+    from real_dje_scraper import RealDJEScraper
+
+    scraper = RealDJEScraper(endpoint="teste")
+    scraper.indice_processos = indice
+    scraper.caixa_saida = CaixaFalsa()
+    publicacao = scraper.criar_publicacao_exemplo(datetime(2025, 6, 13))
+    indice.adicionar(publicacao.numeroProcesso)
+
+    # Semeando: o índice pode estar incompleto, a API deduplica
+    assert asyncio.run(scraper.enviar_para_api(publicacao))
+    assert scraper.caixa_saida.numeros == [publicacao.numeroProcesso]
+
+    indice.semeado.set()
+    assert asyncio.run(scraper.enviar_para_api(publicacao)) is None
+    assert scraper.duplicadas_ignoradas == 1
@@ -0,0 +1,174 @@
+"""
+Reivindicação e lease da fila contra um Postgres de verdade
+FILA_TESTE_DATABASE_URL aponta para o banco de teste (ex.: postgresql://postgres:@/postgres?host=/tmp/pgdata);
+sem ele os testes do banco são pulados. Cada teste usa um schema próprio, apagado ao final.
+"""
+
+import os
+import time
+import uuid
+from datetime import date
+
+import pytest
+
+from fila_trabalho import CONCLUIDA, EM_ANDAMENTO, FALHOU, PENDENTE, FilaTrabalho, Tarefa, TrabalhadorFila
+
+DSN = os.getenv("FILA_TESTE_DATABASE_URL", "")
+
+
+@pytest.fixture
+def dsn():
+    if not DSN:
+        pytest.skip("FILA_TESTE_DATABASE_URL não definido")
+    psycopg2 = pytest.importorskip("psycopg2")
+    from psycopg2.extensions import make_dsn
+
+    schema = f"teste_fila_{uuid.uuid4().hex[:8]}"
+    conn = psycopg2.connect(DSN)
+    conn.autocommit = True
+    conn.cursor().execute(f"CREATE SCHEMA {schema}")
+    yield make_dsn(DSN, options=f"-c search_path={schema}")
+    conn.cursor().execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.close()
+
+
+def estado(fila, tarefa):
+    with fila._transacao() as cursor:
+        cursor.execute("SELECT estado, tentativas, trabalhador, erro FROM scraper_tarefas WHERE id = %s", (tarefa.id,))
+        return cursor.fetchone()
+
+
+def test_uma_tarefa_por_data_e_termos(dsn):
+    fila = FilaTrabalho(dsn)
+    lote, total = fila.criar_lote(date(2025, 6, 9), date(2025, 6, 11), [(), ["RPV", " rpv "]])
+    assert total == 6
+    progresso = fila.progresso(lote)
+    assert progresso["total_tarefas"] == 6
+    assert progresso[PENDENTE] == 6
+
+
+def test_ordem_de_prioridade(dsn):
+    fila = FilaTrabalho(dsn)
+    # 13/06/2025 sexta, 14 sábado, 15 domingo, 16 segunda
+    fila.criar_lote(date(2025, 6, 13), date(2025, 6, 16))
+    datas = [fila.reivindicar("a").data for _ in range(4)]
+    assert datas == [date(2025, 6, 16), date(2025, 6, 13), date(2025, 6, 15), date(2025, 6, 14)]
+    assert fila.reivindicar("a") is None
+
+
+def test_reivindicar_e_concluir(dsn):
+    fila = FilaTrabalho(dsn)
+    lote, _ = fila.criar_lote(date(2025, 6, 13), date(2025, 6, 13))
+    tarefa = fila.reivindicar("a")
+
+    assert estado(fila, tarefa)[:3] == (EM_ANDAMENTO, 1, "a")
+    assert fila.renovar(tarefa, "a")
+    assert not fila.concluir(tarefa, "b", 1, 1)
+    assert fila.concluir(tarefa, "a", 3, 2)
+
+    progresso = fila.progresso(lote)
+    assert (progresso[CONCLUIDA], progresso["publicacoes_encontradas"], progresso["publicacoes_enviadas"]) == (1, 3, 2)
+    assert progresso["percentual"] == 100
+
+
+def test_skip_locked_nao_entrega_a_mesma_linha(dsn):
+    import psycopg2
+
+    fila = FilaTrabalho(dsn)
+    fila.criar_lote(date(2025, 6, 12), date(2025, 6, 13))
+
+    # Outra réplica no meio da reivindicação da tarefa mais prioritária
+    conn = psycopg2.connect(dsn)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id, data FROM scraper_tarefas ORDER BY prioridade DESC, data DESC, id LIMIT 1 FOR UPDATE"
+    )
+    _, travada = cursor.fetchone()
+    try:
+        tarefa = fila.reivindicar("b")
+        assert tarefa is not None and tarefa.data != travada
+        assert fila.reivindicar("b") is None
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def test_lease_expirado_volta_para_a_fila(dsn):
+    fila = FilaTrabalho(dsn, lease_s=0.2, max_tentativas=3)
+    fila.criar_lote(date(2025, 6, 13), date(2025, 6, 13))
+    tarefa = fila.reivindicar("a")
+    assert fila.reivindicar("b") is None
+
+    time.sleep(0.3)
+    retomada = fila.reivindicar("b")
+    assert retomada.id == tarefa.id and retomada.tentativas == 2
+    assert estado(fila, tarefa) == (EM_ANDAMENTO, 2, "b", "lease expirado")
+
+    # O dono antigo perdeu o lease: heartbeat e conclusão são recusados
+    assert not fila.renovar(tarefa, "a")
+    assert not fila.concluir(tarefa, "a", 1, 1)
+    assert fila.concluir(retomada, "b", 1, 1)
+
+
+def test_lease_expirado_sem_tentativas_falha(dsn):
+    fila = FilaTrabalho(dsn, lease_s=0.1, max_tentativas=1)
+    fila.criar_lote(date(2025, 6, 13), date(2025, 6, 13))
+    tarefa = fila.reivindicar("a")
+
+    time.sleep(0.2)
+    assert fila.reivindicar("b") is None
+    assert estado(fila, tarefa)[0] == FALHOU
+
+
+def test_falha_devolve_ate_max_tentativas(dsn):
+    fila = FilaTrabalho(dsn, max_tentativas=2)
+    lote, _ = fila.criar_lote(date(2025, 6, 13), date(2025, 6, 13))
+
+    tarefa = fila.reivindicar("a")
+    assert fila.falhar(tarefa, "a", "DJE fora do ar")
+    assert estado(fila, tarefa)[0] == PENDENTE
+
+    tarefa = fila.reivindicar("a")
+    assert fila.falhar(tarefa, "a", "DJE fora do ar")
+    assert estado(fila, tarefa)[0] == FALHOU
+    assert fila.progresso(lote)["falhas"] == [{"data": "2025-06-13", "termos": "", "erro": "DJE fora do ar"}]
+
+
+class FilaForaDoAr:
+    """Entrega duas tarefas e falha em tudo o que grava depois, como um Postgres reiniciando"""
+    lease_s = 30
+
+    def __init__(self):
+        self.tarefas = [Tarefa(i, "lote", date(2025, 6, 13), "", 1) for i in (1, 2)]
+
+    def reivindicar(self, trabalhador):
+        return self.tarefas.pop() if self.tarefas else None
+
+    def renovar(self, tarefa, trabalhador):
+        return True
+
+    def concluir(self, tarefa, trabalhador, encontradas, enviadas):
+        raise ConnectionError("server closed the connection unexpectedly")
+
+    def falhar(self, tarefa, trabalhador, erro):
+        raise ConnectionError("server closed the connection unexpectedly")
+
+
+def processar_alternando(tarefa):
+    if tarefa.id == 2:
+        raise RuntimeError("DJE fora do ar")
+    return 1, 1
+
+
+def test_trabalhador_sobrevive_ao_banco_fora():
+    trabalhador = TrabalhadorFila(FilaForaDoAr(), processar_alternando, nome="a", espera_s=0.05)
+    trabalhador.iniciar()
+    try:
+        for _ in range(50):
+            if trabalhador.processadas == 2:
+                break
+            time.sleep(0.02)
+        assert trabalhador.processadas == 2
+        assert trabalhador.thread.is_alive()
+    finally:
+        trabalhador.parar()
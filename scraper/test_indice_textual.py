@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from cache_buscas import CacheBuscas
+from indice_textual import IndiceTextual
+from paginacao import RastreadorPaginacao
+
+ONTEM = datetime.combine(date.today() - timedelta(days=1), datetime.min.time())
+HOJE = datetime.combine(date.today(), datetime.min.time())
+TEXTOS = [("1234567-89.2024.8.26.0100", "PROCESSO Nº 1234567-89.2024.8.26.0100 RPV pagamento pelo INSS")]
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    for variavel in ("DEDUP_INDEX_PATH", "INDICE_TEXTUAL_PATH", "ARQUIVO_PAGINAS_DIR", "CAIXA_SAIDA_PATH"):
+        monkeypatch.setenv(variavel, "")
+    monkeypatch.setenv("BUSCA_CACHE_MB", "0")
+    from real_dje_scraper import RealDJEScraper
+
+    scraper = RealDJEScraper(endpoint="teste")
+    scraper.indice_textual = IndiceTextual(str(tmp_path / "indice.db"))
+    scraper.cache_buscas = CacheBuscas(2 ** 20, ttl_hoje=300)
+    yield scraper
+    scraper.indice_textual.conn.close()
+
+
+def cobertas(scraper, inicio=ONTEM, fim=HOJE):
+    return scraper.indice_textual.datas_cobertas(inicio, fim)
+
+
+def test_data_completa_fica_coberta(scraper):
+    scraper.indexar_data(ONTEM, TEXTOS, paginas=2, paginas_com_falha=0)
+    assert cobertas(scraper) == {ONTEM.date().isoformat()}
+
+
+def test_pagina_com_falha_nao_cobre(scraper):
+    scraper.indexar_data(ONTEM, TEXTOS, paginas=2, paginas_com_falha=1)
+    assert cobertas(scraper) == set()
+
+
+def test_consulta_truncada_nao_cobre(scraper):
+    scraper.indexar_data(ONTEM, TEXTOS, paginas=50, paginas_com_falha=0, truncada=True)
+    assert cobertas(scraper) == set()
+
+
+def test_hoje_nunca_fica_coberto(scraper):
+    scraper.indexar_data(HOJE, TEXTOS, paginas=1, paginas_com_falha=0)
+    assert cobertas(scraper) == set()
+
+
+def test_indice_nao_responde_por_hoje(scraper):
+    # Cobertura de hoje gravada antes da regra (bancos antigos)
+    scraper.indice_textual.registrar_data(HOJE, TEXTOS, 1)
+    scraper.indice_textual.registrar_data(ONTEM, TEXTOS, 1)
+
+    progresso = {}
+    resolvidas = scraper.resolver_sem_navegador(ONTEM, HOJE, ["RPV"], progresso)
+
+    assert list(resolvidas) == [ONTEM.date().isoformat()]
+    assert progresso == {"dias_do_cache": 0, "dias_do_indice": 1}
+    assert scraper.cache_buscas.obter(["RPV"], HOJE) is None
+    assert scraper.cache_buscas.obter(["RPV"], ONTEM) is not None
+
+
+class DriverFalso:
+    current_url = "https://dje.tjsp.jus.br/cdje/consultaSimples.do"
+
+    def __init__(self, total_resultados):
+        self.page_source = (
+            '<html><body><a href="consultaSimples.do?pagina=2">2</a>'
+            f"<p>Resultados 1 a 10 de {total_resultados}</p></body></html>"
+        )
+
+
+def rastreador(monkeypatch, total_resultados, max_paginas):
+    rastreador = RastreadorPaginacao(DriverFalso(total_resultados), max_paginas=max_paginas)
+    monkeypatch.setattr(rastreador, "_baixar_urls", lambda info, total: ["<html></html>"] * (total - 1))
+    return rastreador
+
+
+def test_limite_de_paginas_marca_truncada(monkeypatch):
+    coleta = rastreador(monkeypatch, total_resultados=100, max_paginas=3)
+    assert len(coleta.coletar_html()) == 3
+    assert coleta.truncada
+    assert coleta.paginas_com_falha == 0
+
+
+def test_consulta_dentro_do_limite(monkeypatch):
+    coleta = rastreador(monkeypatch, total_resultados=30, max_paginas=3)
+    assert len(coleta.coletar_html()) == 3
+    assert not coleta.truncada
+
+
+def test_sem_limite_de_paginas(monkeypatch):
+    coleta = rastreador(monkeypatch, total_resultados=100, max_paginas=0)
+    assert len(coleta.coletar_html()) == 10
+    assert not coleta.truncada
@@ -0,0 +1,93 @@
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from cancelamento import JobCancelado
+from latencias import LIMITES, RastreadorLatencias, quantil
+
+
+def rastreador(**opcoes):
+    return RastreadorLatencias(**{"janela": 100, "min_amostras": 5, "fator": 2.0, **opcoes})
+
+
+def test_quantil_por_posicao():
+    ordenadas = [float(i) for i in range(1, 101)]
+    assert quantil(ordenadas, 0.5) == 51
+    assert quantil(ordenadas, 0.99) == 100
+    assert quantil([3.0], 0.99) == 3.0
+
+
+def test_padrao_ate_juntar_amostras():
+    latencias = rastreador()
+    for _ in range(4):
+        latencias.registrar("page_load", 1.0)
+    assert latencias.timeout("page_load") == LIMITES["page_load"].padrao
+
+
+def test_fator_vezes_p99():
+    latencias = rastreador()
+    for segundos in (4, 5, 6, 7, 8):
+        latencias.registrar("page_load", segundos)
+    assert latencias.timeout("page_load") == 16
+
+
+@pytest.mark.parametrize("segundos, esperado", [(0.1, LIMITES["page_load"].minimo), (500, LIMITES["page_load"].maximo)])
+def test_timeout_dentro_dos_limites(segundos, esperado):
+    latencias = rastreador()
+    for _ in range(5):
+        latencias.registrar("page_load", segundos)
+    assert latencias.timeout("page_load") == esperado
+
+
+def test_nao_adaptativo_usa_padrao():
+    latencias = rastreador(adaptativo=False)
+    for _ in range(5):
+        latencias.registrar("page_load", 1.0)
+    assert latencias.timeout("page_load") == LIMITES["page_load"].padrao
+
+
+def test_janela_descarta_amostras_antigas():
+    latencias = rastreador(janela=5)
+    for _ in range(5):
+        latencias.registrar("page_load", 100)
+    for _ in range(5):
+        latencias.registrar("page_load", 10)
+    assert latencias.timeout("page_load") == 20
+
+
+def test_operacao_sem_medicao_propria():
+    latencias = rastreador()
+    for _ in range(5):
+        latencias.registrar("element_wait", 2.0)
+    assert latencias.timeout("implicit_wait") == 4
+
+
+def test_medir_registra_duracao():
+    latencias = rastreador()
+    with latencias.medir("page_fetch", 30):
+        pass
+    assert len(latencias.amostras["page_fetch"]) == 1
+
+
+def test_estouro_entra_na_janela():
+    latencias = rastreador()
+    with pytest.raises(TimeoutException):
+        with latencias.medir("page_load", 0):
+            raise TimeoutException("timeout")
+    assert len(latencias.amostras["page_load"]) == 1
+
+
+def test_falha_rapida_nao_entra():
+    latencias = rastreador()
+    with pytest.raises(TimeoutException):
+        with latencias.medir("page_load", 30):
+            raise TimeoutException("conexão recusada")
+    assert "page_load" not in latencias.amostras
+
+
+@pytest.mark.parametrize("erro", [JobCancelado("cancelado"), KeyboardInterrupt()])
+def test_cancelamento_nao_e_estouro(erro):
+    latencias = rastreador()
+    with pytest.raises(type(erro)):
+        with latencias.medir("page_load", 0):
+            raise erro
+    assert "page_load" not in latencias.amostras
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from extracao import ExtratorCampos, consolidar_registros, extrair_registros
+from paginacao import descobrir_paginacao
+
+URL_ATUAL = "https://dje.tjsp.jus.br/cdje/consultaSimples.do?dtDiario=13/06/2025"
+DATA = datetime(2025, 6, 13)
+
+
+def descobrir(html):
+    return descobrir_paginacao(BeautifulSoup(html, "html.parser"), URL_ATUAL)
+
+
+def test_paginacao_por_url():
+    info = descobrir("""
+        <a href="#topo">topo</a>
+        <a href="consultaSimples.do?dtDiario=13/06/2025&pagina=2">2</a>
+        <a href="consultaSimples.do?dtDiario=13/06/2025&pagina=3">3</a>
+        <a href="/cdje/ajuda.do">ajuda</a>
+    """)
+    assert (info.total_paginas, info.parametro, info.funcao_js) == (3, "pagina", None)
+    assert info.url_pagina(5) == "https://dje.tjsp.jus.br/cdje/consultaSimples.do?dtDiario=13%2F06%2F2025&pagina=5"
+
+
+def test_total_de_resultados_vence_a_janela_de_links():
+    info = descobrir("""
+        <a href="consultaSimples.do?nuPagina=2">2</a> <a href="consultaSimples.do?nuPagina=3">3</a>
+        <p>Resultados 1 a 10 de 47</p>
+    """)
+    assert (info.total_paginas, info.parametro) == (5, "nuPagina")
+
+
+def test_paginacao_por_javascript():
+    info = descobrir("""
+        <a href="javascript:trocaDePg(2)">2</a>
+        <a href="#" onclick="trocaDePg('4'); return false;">4</a>
+        <span>Resultado 1 a 20 de 61</span>
+    """)
+    assert (info.total_paginas, info.funcao_js) == (4, "trocaDePg")
+    assert info.url_pagina(2) is None
+
+
+def test_sem_links_de_pagina_e_uma_pagina():
+    info = descobrir("<p>Resultados 1 a 10 de 47</p><a href='javascript:void(0)'>imprimir</a>")
+    assert info.total_paginas == 1
+
+
+def pagina(*processos):
+    return "".join(
+        f"<div>Processo {numero} - RPV - pagamento pelo INSS. Autor: Maria da Silva. Valor: R$ 1.500,00</div>"
+        for numero in processos
+    )
+
+
+def test_consolidar_deduplica_entre_paginas():
+    extrator = ExtratorCampos(["RPV", "pagamento pelo INSS"])
+    paginas = [
+        pagina("0001234-56.2024.8.26.0100", "0009876-54.2024.8.26.0100"),
+        # Repetição entre páginas (o DJE repete o último elemento no topo da seguinte)
+        pagina("0009876-54.2024.8.26.0100", "0005555-11.2024.8.26.0100"),
+    ]
+    registros_por_pagina = [extrair_registros(html, "padrao", DATA, [], extrator) for html in paginas]
+
+    registros, textos = consolidar_registros(registros_por_pagina, DATA)
+
+    assert [registro[0] for registro in registros] == [
+        "0001234-56.2024.8.26.0100", "0009876-54.2024.8.26.0100", "0005555-11.2024.8.26.0100"]
+    assert [chave for chave, _ in textos] == [registro[0] for registro in registros]
+
+
+def test_consolidar_guarda_texto_sem_registro_e_numera_os_sem_processo():
+    registro_sem_numero = ("", "2025-06-13", "Maria", None, "texto")
+    registros, textos = consolidar_registros([
+        [("a", "texto a", None), ("b", "texto b", registro_sem_numero)],
+        [("a", "texto a de novo", None), ("c", "texto c", registro_sem_numero)],
+    ], DATA)
+
+    assert textos == [("a", "texto a"), ("b", "texto b"), ("c", "texto c")]
+    assert [registro[0] for registro in registros] == ["REAL-20250613-001", "REAL-20250613-002"]
@@ -0,0 +1,67 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+import pytest
+
+import pool_extracao
+
+PAGINAS = ["<p>1</p>", "<p>2</p>", "<p>3</p>"]
+
+
+def extrair_falso(html, modo, data, termos_busca, termos_padrao):
+    return [html.decode("utf-8")]
+
+
+class PoolFalso:
+    """Executa na hora; a página `pagina_com_erro` (1..n) volta com a exceção informada"""
+
+    def __init__(self, pagina_com_erro=None, erro=None):
+        self.pagina_com_erro = pagina_com_erro
+        self.erro = erro
+        self.enviadas = 0
+
+    def submit(self, funcao, *args):
+        self.enviadas += 1
+        futuro = Future()
+        if self.enviadas == self.pagina_com_erro:
+            futuro.set_exception(self.erro)
+        else:
+            futuro.set_result(funcao(*args))
+        return futuro
+
+
+@pytest.fixture(autouse=True)
+def extrator(monkeypatch):
+    monkeypatch.setattr(pool_extracao, "extrair_registros_html", extrair_falso)
+
+
+def extrair():
+    return pool_extracao.extrair_paginas(PAGINAS, "padrao", datetime(2025, 6, 13), ["RPV"], ["RPV"])
+
+
+def test_pagina_que_falha_no_pool_e_extraida_na_thread(monkeypatch):
+    pool = PoolFalso(pagina_com_erro=2, erro=ValueError("pickle"))
+    monkeypatch.setattr(pool_extracao, "_pool", pool)
+
+    assert extrair() == [[pagina] for pagina in PAGINAS]
+    assert pool_extracao._pool is pool
+
+
+def test_pool_quebrado_e_recriado_depois(monkeypatch):
+    pool = PoolFalso(pagina_com_erro=1, erro=BrokenProcessPool("processo morto"))
+    monkeypatch.setattr(pool_extracao, "_pool", pool)
+
+    assert extrair() == [[pagina] for pagina in PAGINAS]
+    assert pool_extracao._pool is None
+
+
+def test_pool_encerrado_devolve_none(monkeypatch):
+    class PoolEncerrado:
+        def submit(self, *args):
+            raise RuntimeError("cannot schedule new futures after shutdown")
+
+    monkeypatch.setattr(pool_extracao, "_pool", PoolEncerrado())
+
+    assert extrair() is None
+    assert pool_extracao._pool is None
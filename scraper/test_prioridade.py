@@ -0,0 +1,67 @@
+import threading
+import time
+from datetime import date, datetime
+
+from prioridade import (PRIORIDADE_INTERATIVA, Preempcao, ordenar_datas, peso_termos, prioridade_publicacao,
+                        prioridade_tarefa)
+
+# 13/06/2025 sexta, 14 sábado, 15 domingo, 16 segunda
+SEXTA, SABADO, DOMINGO, SEGUNDA = (date(2025, 6, dia) for dia in (13, 14, 15, 16))
+
+
+def test_peso_dos_termos():
+    assert peso_termos(["rpv", " Pagamento pelo INSS "]) == 2
+    assert peso_termos("RPV, aposentadoria") == 1
+    assert peso_termos(["aposentadoria"]) == 0
+    # Vazio: termos padrão, que incluem os prioritários
+    assert peso_termos("") == peso_termos(None) == 2
+
+
+def test_termos_prioritarios_antes_do_dia_util():
+    assert prioridade_tarefa(DOMINGO, "RPV") > prioridade_tarefa(SEGUNDA, "aposentadoria")
+    assert prioridade_tarefa(SEGUNDA, "RPV") > prioridade_tarefa(DOMINGO, "RPV")
+
+
+def test_ordenar_datas_uteis_recentes_primeiro():
+    datas = ordenar_datas(datetime(2025, 6, 13), datetime(2025, 6, 16))
+    assert [data.date() for data in datas] == [SEGUNDA, SEXTA, DOMINGO, SABADO]
+
+
+def test_ordenar_datas_de_um_dia():
+    assert ordenar_datas(datetime(2025, 6, 14), datetime(2025, 6, 14)) == [datetime(2025, 6, 14)]
+
+
+def test_prioridade_na_caixa_de_saida():
+    backlog = prioridade_publicacao("RPV, pagamento pelo INSS")
+    interativa = prioridade_publicacao("aposentadoria", interativa=True)
+    assert interativa >= PRIORIDADE_INTERATIVA > backlog > prioridade_publicacao(None)
+
+
+def test_backfill_cede_enquanto_ha_busca_interativa():
+    preempcao = Preempcao()
+    assert preempcao.ceder() == 0.0
+
+    cedido = []
+
+    def backfill():
+        cedido.append(preempcao.ceder(ponto="teste"))
+
+    with preempcao.interativa():
+        thread = threading.Thread(target=backfill)
+        thread.start()
+        time.sleep(0.2)
+        assert preempcao.ativa()
+        assert thread.is_alive()
+
+    thread.join(1)
+    assert not thread.is_alive()
+    assert not preempcao.ativa()
+    assert cedido[0] >= 0.1
+
+
+def test_encerrar_libera_o_backfill():
+    preempcao = Preempcao()
+    encerrar = threading.Event()
+    with preempcao.interativa():
+        threading.Timer(0.1, encerrar.set).start()
+        assert preempcao.ceder(encerrar, "teste") < 1